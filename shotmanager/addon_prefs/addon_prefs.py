@@ -846,6 +846,67 @@ class UAS_ShotManager_AddonPrefs(AddonPreferences):
         default=True,
     )
 
+    ffmpegFilePath: StringProperty(
+        name="FFmpeg Executable",
+        description="Path to the FFmpeg executable used to composite the rendered videos outside of Blender."
+        "\nIf empty, the FFmpeg found in the system PATH is used",
+        subtype="FILE_PATH",
+        default="",
+    )
+
+    intermediateFilesRootPath: StringProperty(
+        name="Intermediate Files Folder",
+        description="Folder where the intermediate files of the rendering (images, Stamp Info images and sound of the"
+        " shots) are written, typically on a fast local drive.\nIf empty, they are written next to the rendered media",
+        subtype="DIR_PATH",
+        default="",
+    )
+
+    intermediateFilesMaxDiskUsage: IntProperty(
+        name="Intermediate Files Quota (MB)",
+        description="Maximum disk space used by the intermediate files of the rendered shots that are kept or that"
+        " are waiting to be deleted.\nWhen it is reached, the oldest kept files are deleted before rendering the"
+        " next shot.\n0 for no limit",
+        min=0,
+        default=0,
+        options=set(),
+    )
+
+    intermediateFilesBackgroundDeletion: BoolProperty(
+        name="Delete Intermediate Files in Background",
+        description="Delete the intermediate files of a rendered shot while the next shot is rendered",
+        default=True,
+        options=set(),
+    )
+
+    intermediateFilesShortShotsInRAM: BoolProperty(
+        name="Short Shots Intermediate Files in RAM",
+        description="Write the intermediate files of the short shots on the RAM disk of the system (tmpfs),"
+        " when there is one.\nThe other shots use the Intermediate Files Folder",
+        default=False,
+        options=set(),
+    )
+
+    intermediateFilesShortShotMaxFrames: IntProperty(
+        name="Short Shot Max Frames",
+        description="Maximum duration of the shots which intermediate files are written on the RAM disk",
+        min=1,
+        soft_max=500,
+        default=100,
+        options=set(),
+    )
+
+    renderPipeline_maxPendingShots: IntProperty(
+        name="Max Shots Waiting for Post-Processing",
+        description="Maximum number of rendered shots waiting for their post-processing (Stamp Info and compositing)"
+        "\nwhen the pipelined rendering is used. The rendering of the next shot is paused when it is reached,"
+        "\nwhich limits the disk space used by the intermediate images",
+        min=1,
+        soft_max=8,
+        default=2,
+        options=set(),
+    )
+
     # ****** hidden settings:
     # ------------------------------
 
@@ -1275,6 +1336,16 @@ class UAS_ShotManager_AddonPrefs(AddonPreferences):
         options=set(),
     )
 
+    stampInfo_numProcesses: IntProperty(
+        name="Stamp Info Generation Processes",
+        description="Number of processes generating the Stamp Info images in parallel, outside of Blender."
+        "\nWhen set to 0 the images are generated one after the other in Blender",
+        min=0,
+        soft_max=16,
+        default=0,
+        options=set(),
+    )
+
     # -----------------------------------------------------------
     # UI user preferences - Not exposed
     # -----------------------------------------------------------
@@ -381,6 +381,20 @@ def drawRender(context, prefs, layout):
         col = mainRow.column(align=True)
         col.prop(prefs, "separatedRenderPanel", text="Make Render Panel a Separated Tab in the Viewport N-Panel")
 
+        col.separator(factor=0.5)
+        col.prop(prefs, "ffmpegFilePath")
+        col.prop(prefs, "renderPipeline_maxPendingShots")
+
+        col.separator(factor=0.5)
+        col.prop(prefs, "intermediateFilesRootPath")
+        col.prop(prefs, "intermediateFilesMaxDiskUsage")
+        col.prop(prefs, "intermediateFilesBackgroundDeletion")
+        row = col.row()
+        row.prop(prefs, "intermediateFilesShortShotsInRAM")
+        subRow = row.row()
+        subRow.enabled = prefs.intermediateFilesShortShotsInRAM
+        subRow.prop(prefs, "intermediateFilesShortShotMaxFrames")
+
 
 def drawStampInfo(context, prefs, layout):
     box = layout.box()
@@ -416,6 +430,13 @@ def drawStampInfo(context, prefs, layout):
         subCol.prop(prefs, "delete_temp_scene")
         subCol.prop(prefs, "delete_temp_images")
 
+        propsCol.separator(factor=0.5)
+        propsCol.label(text="Stamped Images Generation:")
+        row = propsCol.row()
+        row.separator(factor=3)
+        subCol = row.column(align=True)
+        subCol.prop(prefs, "stampInfo_numProcesses", text="Parallel Processes")
+
 
 def drawFeatures(context, prefs, layout):
     box = layout.box()
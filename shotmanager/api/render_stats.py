@@ -0,0 +1,60 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Shot Manager API - Render timings and throughput statistics
+"""
+
+from shotmanager.rendering import rendering_stats
+
+
+def get_last_render_stats() -> dict:
+    """Return the statistics of the last rendering done in this session, None if nothing has been rendered yet
+    The dictionary has the following entries:
+        - take, date, job, machine: description of the rendering
+        - totalTimes: wall times of the whole job, in seconds
+        - bytesWritten: number of bytes written by the job, intermediate files included
+        - peakTempDiskUsage: peak disk space used by the intermediate files, in bytes
+        - frameTimeHistogram: list of (bin start, bin end, count) of the frame render times
+        - shots: per shot stage times, frame times, frame time histogram and written bytes. numAveragedFrames is the
+          number of frames which render time could not be measured alone and is the average time of their range
+    """
+    renderStats = rendering_stats.getLastRenderStats()
+    return None if renderStats is None else renderStats.toDict()
+
+
+def get_frame_time_histogram(shot_name: str = None, num_bins: int = 10) -> list:
+    """Return the histogram of the frame render times of the last rendering as a list of (bin start, bin end, count)
+    shot_name: if specified, only the frames of this shot are taken into account
+    """
+    renderStats = rendering_stats.getLastRenderStats()
+    return [] if renderStats is None else renderStats.getFrameTimeHistogram(shotName=shot_name, numBins=num_bins)
+
+
+def export_last_render_stats(json_filepath: str = None, csv_filepath: str = None) -> bool:
+    """Write the statistics of the last rendering in the specified json and / or csv files
+    Return False if nothing has been rendered yet or if a file cannot be written
+    """
+    renderStats = rendering_stats.getLastRenderStats()
+    if renderStats is None:
+        return False
+    exported = True
+    if json_filepath is not None:
+        exported = renderStats.exportJson(json_filepath) and exported
+    if csv_filepath is not None:
+        exported = renderStats.exportCsv(csv_filepath) and exported
+    return exported
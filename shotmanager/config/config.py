@@ -162,6 +162,7 @@ def getLoggingTags():
     tags["INIT_AND_DATA"] = False
 
     tags["SHOTS_PLAY_MODE"] = False
+    tags["SHOTS_INDEX"] = False
 
     tags["RENDER"] = False
     tags["LAYOUT"] = False
@@ -50,6 +50,15 @@ class UAS_Debug_RunFunction(Operator):
             # getSequenceListFromOtio(otioFile)
             # parseOtioFile(otioFile)
 
+        elif "checkBatchRetimeEquivalence" == self.functionName:
+            from ..retimer.retimer_batch_check import checkBatchRetimeEquivalence
+
+            mismatches = checkBatchRetimeEquivalence()
+            if mismatches:
+                self.report({"ERROR"}, f"Batch retime: {len(mismatches)} cases differ from the reference, see console")
+            else:
+                self.report({"INFO"}, "Batch retime: all the cases match the reference")
+
         return {"FINISHED"}
 
 
@@ -144,6 +144,9 @@ class UAS_PT_Shot_Manager_Debug(Panel):
         row = layout.row()
         row.operator("uas.debug_runfunction", text="parseOtioFile").functionName = "parseOtioFile"
 
+        row = layout.row()
+        row.operator("uas.debug_runfunction", text="Check Batch Retime").functionName = "checkBatchRetimeEquivalence"
+
         layout.separator()
         row = layout.row()
         row.operator("uas_utils.run_script", text="Parse XML").path = "//../debug/debug_parse_xml.py"
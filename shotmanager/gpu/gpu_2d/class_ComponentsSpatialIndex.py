@@ -0,0 +1,97 @@
+# GPLv3 License
+#
+# Copyright (C) 2020 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Spatial index of 2D components, used to find the components under the mouse
+"""
+
+from bisect import bisect_right
+
+
+def _getPrefixMax(values):
+    """Return the list of the max of the values up to each index"""
+    prefixMax = []
+    for value in values:
+        prefixMax.append(value if not len(prefixMax) else max(prefixMax[-1], value))
+    return prefixMax
+
+
+class ComponentsSpatialIndex:
+    """Index of the clamped bounding boxes of Component2D instances, in pixels in region CS
+
+    The components are grouped in rows sharing the same vertical bounds, such as the lanes of a dopesheet,
+    and the components of a row are sorted by their left bound. Getting the components at a location is then
+    in O(log n) when the rows, and the components of a row, don't overlap.
+    The bounding boxes are computed by the draw functions of the components, the index then has to be rebuilt
+    after each draw.
+    """
+
+    def __init__(self):
+        # list of (yMin, yMax, xMin list, xMax prefix max list, components list), sorted by yMin
+        self._rows = []
+        self._rowsYMin = []
+        # used to stop the search of the rows containing a location
+        self._rowsYMaxPrefix = []
+
+    def __len__(self):
+        return sum([len(row[4]) for row in self._rows])
+
+    def clear(self):
+        self._rows = []
+        self._rowsYMin = []
+        self._rowsYMaxPrefix = []
+
+    def build(self, components):
+        """Index the specified components. Those that are not visible or are fully clamped are ignored"""
+        rows = dict()
+        for component in components:
+            if not component.isVisible or component.isFullyClamped:
+                continue
+            bBox = component._clamped_bBox
+            rows.setdefault((bBox[1], bBox[3]), []).append((bBox[0], bBox[2], component))
+
+        self._rows = []
+        for (yMin, yMax), entries in sorted(rows.items(), key=lambda item: item[0]):
+            entries.sort(key=lambda entry: entry[0])
+            self._rows.append(
+                (
+                    yMin,
+                    yMax,
+                    [entry[0] for entry in entries],
+                    _getPrefixMax([entry[1] for entry in entries]),
+                    [entry[2] for entry in entries],
+                )
+            )
+        self._rowsYMin = [row[0] for row in self._rows]
+        self._rowsYMaxPrefix = _getPrefixMax([row[1] for row in self._rows])
+
+    def getComponentsAt(self, ptX, ptY):
+        """Return the list of the indexed components containing the specified location, in pixels in region CS
+        As for isInBBox(), the max values of the bounding boxes are not included in the components
+        """
+        components = []
+        rowInd = bisect_right(self._rowsYMin, ptY) - 1
+        while 0 <= rowInd and ptY < self._rowsYMaxPrefix[rowInd]:
+            _yMin, yMax, xMins, xMaxPrefix, rowComponents = self._rows[rowInd]
+            if ptY < yMax:
+                compoInd = bisect_right(xMins, ptX) - 1
+                while 0 <= compoInd and ptX < xMaxPrefix[compoInd]:
+                    if rowComponents[compoInd].isInBBox(ptX, ptY):
+                        components.append(rowComponents[compoInd])
+                    compoInd -= 1
+            rowInd -= 1
+        return components
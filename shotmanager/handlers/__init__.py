@@ -30,6 +30,7 @@ from . import sm_handlers
 # from . import sm_check_data_handlers
 from .sm_check_data_handlers import shotMngHandler_load_post_checkDataVersion
 from shotmanager.overlay_tools.viewport_camera_hud.camera_hud_handlers import shotMngHandler_load_post_cameraHUD
+from shotmanager.overlay_tools.viewport_camera_hud.camera_hud_handlers import shotMngHandler_cameraHUD_invalidateCache
 
 from .sm_overlay_tools_handlers import shotMngHandler_frame_change_pre_jumpToShot
 
@@ -72,6 +73,16 @@ def register():
     )
     bpy.app.handlers.load_post.append(shotMngHandler_load_post_cameraHUD)
 
+    # camera HUD cache
+    for handlerCateg in (
+        bpy.app.handlers.depsgraph_update_post,
+        bpy.app.handlers.undo_post,
+        bpy.app.handlers.redo_post,
+        bpy.app.handlers.load_post,
+    ):
+        utils_handlers.removeAllHandlerOccurences(shotMngHandler_cameraHUD_invalidateCache, handlerCateg=handlerCateg)
+        handlerCateg.append(shotMngHandler_cameraHUD_invalidateCache)
+
     # load
     bpy.app.handlers.load_pre.append(sm_handlers.shotMngHandler_load_pre)
     bpy.app.handlers.load_post.append(sm_handlers.shotMngHandler_load_post)
@@ -147,6 +158,13 @@ def unregister():
     utils_handlers.removeAllHandlerOccurences(
         shotMngHandler_load_post_cameraHUD, handlerCateg=bpy.app.handlers.load_post
     )
+    for handlerCateg in (
+        bpy.app.handlers.depsgraph_update_post,
+        bpy.app.handlers.undo_post,
+        bpy.app.handlers.redo_post,
+        bpy.app.handlers.load_post,
+    ):
+        utils_handlers.removeAllHandlerOccurences(shotMngHandler_cameraHUD_invalidateCache, handlerCateg=handlerCateg)
 
     if shotMngHandler_frame_change_pre_jumpToShot in bpy.app.handlers.frame_change_pre:
         bpy.app.handlers.frame_change_pre.remove(shotMngHandler_frame_change_pre_jumpToShot)
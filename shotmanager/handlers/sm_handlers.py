@@ -22,6 +22,8 @@ Handler functions
 import bpy
 from bpy.app.handlers import persistent
 
+from shotmanager.properties.shots_index import invalidateShotsStructure
+
 from shotmanager.config import config
 from shotmanager.config import sm_logging
 
@@ -42,6 +44,8 @@ def shotMngHandler_undo_pre(self, context):
 def shotMngHandler_undo_post(self, context):
     _logger.debug_ext("Handler: Undo Post", col="GREEN_LIGHT", tag="HANDLER")
 
+    invalidateShotsStructure()
+
 
 @persistent
 def shotMngHandler_redo_pre(self, context):
@@ -57,6 +61,8 @@ def shotMngHandler_redo_pre(self, context):
 def shotMngHandler_redo_post(self, context):
     _logger.debug_ext("Handler: Redo Post", col="GREEN_LIGHT", tag="HANDLER")
 
+    invalidateShotsStructure()
+
 
 @persistent
 def shotMngHandler_load_pre(self, context):
@@ -68,6 +74,8 @@ def shotMngHandler_load_pre(self, context):
 def shotMngHandler_load_post(self, context):
     _logger.debug_ext("Handler: Load Post", col="GREEN_LIGHT", tag="HANDLER")
 
+    invalidateShotsStructure()
+
     # bpy.ops.uas_shot_manager.sequence_timeline.cancel(bpy.context)
 
     # bpy.context.window_manager.event_timer_remove(bpy.ops.uas_shot_manager.sequence_timeline.draw_event)
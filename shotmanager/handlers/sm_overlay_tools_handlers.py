@@ -22,7 +22,7 @@ Handlers specific to overlay tools
 import bpy
 
 from shotmanager.utils import utils_handlers
-
+from shotmanager.properties.shots_index import getShotsIntervalIndex
 
 from shotmanager.config import config
 from shotmanager.config import sm_logging
@@ -41,11 +41,9 @@ def install_handler_for_shot(self, context):
         self.UAS_shot_manager_shots_play_mode
         and shotMngHandler_frame_change_pre_jumpToShot not in bpy.app.handlers.frame_change_pre
     ):
-        shots = props.get_shots()
-        for i, shot in enumerate(shots):
-            if shot.start <= scene.frame_current <= shot.end:
-                props.current_shot_index = i
-                break
+        shotInd = props.getFirstShotIndexContainingFrame(scene.frame_current)
+        if -1 != shotInd:
+            props.current_shot_index = shotInd
         bpy.app.handlers.frame_change_pre.append(shotMngHandler_frame_change_pre_jumpToShot)
     #     bpy.app.handlers.frame_change_post.append(shotMngHandler_frame_change_pre_jumpToShot__frame_change_post)
 
@@ -111,30 +109,23 @@ def shotMngHandler_frame_change_pre_jumpToShot(scene):
         return scene.frame_preview_end if scene.use_preview_range else scene.frame_end
 
     def _get_previous_shot(shots, current_shot_index):
-        index = current_shot_index
-        if index > 0:
-            previous_shots = [s for s in shots[:index] if s.enabled]
-            if len(previous_shots):
-                return previous_shots[-1]
+        index = shotsIndex.getPreviousEnabledShotIndex(current_shot_index)
+        if -1 != index:
+            return shots[index]
 
         return None
 
     def _get_next_shot(shots, current_shot_index):
         """If next shot is out of the anim range then return None"""
-        index = current_shot_index + 1
+        index = shotsIndex.getNextEnabledShotIndex(current_shot_index)
         # if index < len(shots) - 1:
         #     next_shots = [s for s in shots[index + 1 :] if s.enabled]
         #     if len(next_shots):
         #         return next_shots[0]
 
-        while index < len(shots):
-            if shots[index].enabled:
-                if shots[index].start <= _get_range_end() and shots[index].start >= _get_range_start():
-                    return shots[index]
-                else:
-                    return None
-            else:
-                index += 1
+        if -1 != index:
+            if shots[index].start <= _get_range_end() and shots[index].start >= _get_range_start():
+                return shots[index]
         return None
 
     def _get_max_start_frame(shot):
@@ -177,6 +168,9 @@ def shotMngHandler_frame_change_pre_jumpToShot(scene):
     if len(shotList) <= 0:
         return
 
+    # frame-to-shot lookups done in the cached interval index of the take
+    shotsIndex = getShotsIntervalIndex(props)
+
     props.restartPlay = False
 
     current_shot_index = props.current_shot_index
@@ -350,25 +344,21 @@ def shotMngHandler_frame_change_pre_jumpToShot(scene):
 
         # User is scrubbing in the timeline so try to guess a shot in the range of the timeline.
         if not (current_shot.start <= current_frame <= current_shot.end):
-            candidates = list()
-            for i, shot in enumerate(shotList):
-                # wk
-                if shot.enabled and shot.start <= current_frame <= shot.end:
-                    candidates.append((i, shot))
-
-            if 0 < len(candidates):
-                props.setCurrentShot(candidates[0][1], changeTime=False)
+            candidateInd = shotsIndex.getFirstShotIndexContainingFrame(current_frame, ignoreDisabled=True)
+
+            if -1 != candidateInd:
+                props.setCurrentShot(shotList[candidateInd], changeTime=False)
                 scene.frame_current = current_frame
             else:
                 # case were the new current time is out of every shots
                 # we then get the first shot BEFORE current time, or the very first shot if there is no shots after
-                prevShotInd = props.getFirstShotIndexBeforeFrame(current_frame, ignoreDisabled=True)
+                prevShotInd = shotsIndex.getFirstShotIndexBeforeFrame(current_frame, ignoreDisabled=True)
                 if -1 != prevShotInd:
                     props.setCurrentShot(shotList[prevShotInd], changeTime=False)
                     # don't change current time in order to let the user see changes in the scene
                     # scene.frame_current = shotList[prevShotInd].start
                 else:
-                    nextShotInd = props.getFirstShotIndexAfterFrame(current_frame, ignoreDisabled=True)
+                    nextShotInd = shotsIndex.getFirstShotIndexAfterFrame(current_frame, ignoreDisabled=True)
                     if -1 != nextShotInd:
                         props.setCurrentShot(shotList[nextShotInd], changeTime=False)
                         # don't change current time in order to let the user see changes in the scene
@@ -23,6 +23,8 @@ import bpy
 from bpy.types import Operator
 from bpy.props import StringProperty, BoolProperty, IntProperty
 
+from shotmanager.properties.shots_index import invalidateShotsStructure
+
 from shotmanager.config import config
 
 
@@ -213,6 +215,7 @@ class UAS_ShotManager_TakeRemove(Operator):
             props["current_take_name"] = currentTakeInd - 1
             props.takes.remove(currentTakeInd)
 
+        invalidateShotsStructure(context.scene)
         props.setCurrentShotByIndex(0)
 
         return {"INTERFACE"}
@@ -361,6 +364,7 @@ class UAS_ShotManager_ResetTakesToDefault(Operator):
 
         for i in range(len(takes), -1, -1):
             takes.remove(i)
+        invalidateShotsStructure(context.scene)
 
         props.createDefaultTake()
 
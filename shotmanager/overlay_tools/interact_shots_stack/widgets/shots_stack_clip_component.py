@@ -174,8 +174,18 @@ class ShotClipComponent(Component2D):
     # functions ########
     #################################################################
 
-    # override QuadObject
-    def _getFillShader(self):
+    def updateColorFromShot(self):
+        """Update the fill and text colors according to the shot"""
+        # wkip put all that in the FillShader fct?
+        if self.shot.enabled:
+            self.color = self.shot.color
+            self.textComponent.color = self.color_text
+        else:
+            self.color = self.color_disabled
+            self.textComponent.color = self.color_text_disabled
+
+    def getFillColor(self):
+        """Return the fill color of the clip, in sRGB, according to its state"""
         widColor = self.color
         opacity = self.opacity
 
@@ -196,9 +206,12 @@ class ShotClipComponent(Component2D):
             opacity = clamp(1.2 * opacity, 0, 1)
 
         color = set_color_alpha(widColor, alpha_to_linear(widColor[3] * opacity))
+        return color_to_sRGB(color)
 
+    # override QuadObject
+    def _getFillShader(self):
         UNIFORM_SHADER_2D.bind()
-        UNIFORM_SHADER_2D.uniform_float("color", color_to_sRGB(color))
+        UNIFORM_SHADER_2D.uniform_float("color", self.getFillColor())
         shader = UNIFORM_SHADER_2D
 
         return shader
@@ -228,14 +241,7 @@ class ShotClipComponent(Component2D):
 
     # override Component2D
     def draw(self, shader=None, region=None, draw_types="TRIS", cap_lines=False, preDrawOnly=False):
-
-        # wkip put all that in the FillShader fct?
-        if self.shot.enabled:
-            self.color = self.shot.color
-            self.textComponent.color = self.color_text
-        else:
-            self.color = self.color_disabled
-            self.textComponent.color = self.color_text_disabled
+        self.updateColorFromShot()
 
         # update clip from shot ########
         self.posX = self.shot.start
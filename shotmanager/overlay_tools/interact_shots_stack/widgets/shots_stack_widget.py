@@ -19,27 +19,29 @@
 UI in BGL for the Interactive Shots Stack overlay tool
 """
 
-from collections import defaultdict
-
 import os
 from mathutils import Vector
 
 import bgl
 import gpu
+from gpu_extras.batch import batch_for_shader
 
 
 from ..shots_stack_bgl import get_lane_origin_y
 
 from shotmanager.utils import utils_editors_dopesheet
 from shotmanager.utils.utils import color_to_linear
+from shotmanager.utils.utils_python import packIntervalsInLanes
 
 # from shotmanager.gpu.gpu_2d.class_Mesh2D import Mesh2D
 from shotmanager.gpu.gpu_2d.class_Mesh2D import build_rectangle_mesh
 from shotmanager.gpu.gpu_2d.class_QuadObject import QuadObject
 from shotmanager.gpu.gpu_2d.class_Component2D import Component2D
 from shotmanager.gpu.gpu_2d.class_Text2D import Text2D
+from shotmanager.gpu.gpu_2d.class_ComponentsSpatialIndex import ComponentsSpatialIndex
 
 from shotmanager.overlay_tools.workspace_info import workspace_info
+from shotmanager.properties.shots_index import getShotsDataVersion
 
 from shotmanager.overlay_tools.interact_shots_stack.widgets.shots_stack_clip_component import ShotClipComponent
 from shotmanager.overlay_tools.interact_shots_stack.widgets.shots_stack_info_component import InfoComponent
@@ -50,6 +52,7 @@ from shotmanager.config import sm_logging
 _logger = sm_logging.getLogger(__name__)
 
 UNIFORM_SHADER_2D = gpu.shader.from_builtin("2D_UNIFORM_COLOR")
+SMOOTH_COLOR_SHADER_2D = gpu.shader.from_builtin("2D_SMOOTH_COLOR")
 
 
 class ShotStackWidget:
@@ -63,6 +66,22 @@ class ShotStackWidget:
 
         self.ui_shots = list()
         self.shotComponents = []
+
+        # model of the displayed clips, rebuilt by updateModel() only when the shots change
+        # list of (shot index, shot component, lane)
+        self.shotLanes = []
+        self._modelKey = None
+
+        # geometry and batch of the fills of the clips
+        self._fillsGeometry = None
+        self._fillsGeometryKey = None
+        self._fillsBatch = None
+        self._fillsBatchColors = None
+
+        # index of the drawn clips, rebuilt after each draw, used to send the hover events only to the clips
+        # under the mouse and to the ones that were under it at the previous event
+        self.componentsIndex = ComponentsSpatialIndex()
+        self._hoveredComponents = []
         self.infoComponent = None
 
         self.prev_mouse_x = 0
@@ -209,6 +228,7 @@ class ShotStackWidget:
 
         if not len(shots):
             self.shotComponents = []
+            self._hoveredComponents = []
             return
 
         rebuildList = forceRebuild or len(self.shotComponents) != len(shots)
@@ -225,12 +245,15 @@ class ShotStackWidget:
         # rebuild the list with ALL the shots
         if rebuildList:
             self.shotComponents = []
+            self._hoveredComponents = []
 
             lane = 1
             for _i, shot in enumerate(shots):
                 shotCompo = ShotClipComponent(self.target_area, posY=lane, shot=shot, shotsStack=self)
                 shotCompo.opacity = self.opacity
                 shotCompo.color_text = self.color_text
+                # the fills of the clips are drawn in a single batch by drawShotsFills()
+                shotCompo.hasFill = False
 
                 self.shotComponents.append(shotCompo)
                 lane += 1
@@ -247,101 +270,193 @@ class ShotStackWidget:
         else:
             self.currentShotBorder.isVisible = False
 
-    def drawShots(self, preDrawOnly=False):
+    def _getModelKey(self):
         props = self.context.scene.UAS_shot_manager_props
         prefs = config.getAddonPrefs()
+        return (
+            getShotsDataVersion(),
+            self.context.scene.name,
+            props.getCurrentTakeIndex(),
+            len(props.get_shots()),
+            props.interactShotsStack_displayDisabledShots,
+            props.interactShotsStack_displayInCompactMode,
+            prefs.shtStack_firstLineIndex,
+        )
+
+    def updateModel(self):
+        """Rebuild the shot components and compute their lanes only when the shots or the display settings changed
+        Return True if the model has been rebuilt"""
+        modelKey = self._getModelKey()
+        if modelKey == self._modelKey:
+            return False
+
+        props = self.context.scene.UAS_shot_manager_props
+        self._modelKey = modelKey
         self.rebuildShotComponents()
 
-        currentShotInd = props.getCurrentShotIndex()
-        selectedShotInd = props.getSelectedShotIndex()
+        if props.interactShotsStack_displayInCompactMode:
+            self.shotLanes = self._computeLanes_compactMode()
+        else:
+            self.shotLanes = self._computeLanes()
+        for _shotInd, shotCompo, lane in self.shotLanes:
+            shotCompo.isVisible = True
+            shotCompo.posY = lane
+
+        self._fillsGeometry = None
+        self._fillsGeometryKey = None
+        _logger.debug_ext(f"Shots Stack model rebuilt: {len(self.shotLanes)} clips", tag="SHOTSTACK_EVENT")
+        return True
+
+    def _computeLanes(self):
+        """Return the list of (shot index, shot component, lane) of the displayed clips, one clip per lane"""
+        props = self.context.scene.UAS_shot_manager_props
+        prefs = config.getAddonPrefs()
 
         debug_maxShots = 5000  # 6
 
+        shotLanes = []
         lane = 1 + prefs.shtStack_firstLineIndex
-        shotCompoCurrent = None
         for i, shotCompo in enumerate(self.shotComponents):
-            shotCompo.isCurrent = i == currentShotInd
-
-            # NOTE: we use _isSelected instead of the property isSelected in order
-            # to avoid the call of the callback function _on_selected_changed, otherwise
-            # the event loops and keep redrawing all the time
-            shotCompo._isSelected = i == selectedShotInd
-
             if debug_maxShots < i:
                 shotCompo.isVisible = False
                 continue
             if not shotCompo.shot.enabled and not props.interactShotsStack_displayDisabledShots:
                 shotCompo.isVisible = False
                 continue
-
-            if i == currentShotInd:
-                shotCompoCurrent = shotCompo
-            shotCompo.isVisible = True
-            shotCompo.posY = lane
-
-            shotCompo.draw(None, self.context.region, preDrawOnly=preDrawOnly)
+            shotLanes.append((i, shotCompo, lane))
             lane += 1
+        return shotLanes
 
-        # draw quad for current shot over the result
-        self.drawCurrentShotDecoration(shotCompoCurrent, preDrawOnly=preDrawOnly)
-
-    def drawShots_compactMode(self, preDrawOnly=False):
-        # return
+    def _computeLanes_compactMode(self):
+        """Return the list of (shot index, shot component, lane) of the displayed clips, the clips being placed on
+        the first lane where they don't overlap another clip"""
         props = self.context.scene.UAS_shot_manager_props
         prefs = config.getAddonPrefs()
-        self.rebuildShotComponents()
 
-        currentShot = props.getCurrentShot()
-        selectedShot = props.getSelectedShot()
+        displayedInds = []
+        for i, shotCompo in enumerate(self.shotComponents):
+            if not props.interactShotsStack_displayDisabledShots and not shotCompo.shot.enabled:
+                shotCompo.isVisible = False
+                continue
+            displayedInds.append(i)
+
+        intervals = [(self.shotComponents[i].shot.start, self.shotComponents[i].shot.end) for i in displayedInds]
+        lanes = packIntervalsInLanes(intervals)
+
+        firstLane = 1 + prefs.shtStack_firstLineIndex
+        return [
+            (shotInd, self.shotComponents[shotInd], firstLane + lane) for shotInd, lane in zip(displayedInds, lanes)
+        ]
+
+    def _getFillsGeometryKey(self, region):
+        # the view is identified by the frame and value ranges it displays
+        return (
+            self._modelKey,
+            region.width,
+            region.height,
+            tuple(region.view2d.region_to_view(0, 0)),
+            tuple(region.view2d.region_to_view(region.width, region.height)),
+            utils_editors_dopesheet.getLaneHeight(),
+            utils_editors_dopesheet.getRulerHeight(),
+        )
 
-        shotComponentsSorted = sorted(self.shotComponents, key=lambda shotCompo: shotCompo.shot.start)
+    def _buildFillsGeometry(self, region):
+        """Return the list of the quads of the displayed clips, in region CS and clamped to the region,
+        None for the clips out of the region. Same geometry as the one computed by QuadObject.draw()"""
+        view2d = region.view2d
+        geometry = []
+        for _shotInd, shotCompo, lane in self.shotLanes:
+            shot = shotCompo.shot
+            posX = view2d.view_to_region(shot.start, 0, clip=False)[0]
+            width = view2d.view_to_region(shot.start + shot.getDuration(), 0, clip=False)[0] - posX
+            posY = view2d.view_to_region(0, utils_editors_dopesheet.getLaneToValue(lane), clip=False)[1]
+            if 1 == lane:
+                height = utils_editors_dopesheet.getLaneHeight()
+            else:
+                height = utils_editors_dopesheet.getLaneToValue(lane - 1) - utils_editors_dopesheet.getLaneToValue(lane)
+            quad = ((posX, posY), (posX, posY + height), (posX + width, posY + height), (posX + width, posY))
+            geometry.append(utils_editors_dopesheet.intersectionWithRegion(quad, region, excludeRuler=True))
+        return geometry
+
+    def drawShotsFills(self, preDrawOnly=False):
+        """Draw the fills of all the clips in a single batch
+        The geometry is rebuilt only when the model or the view change, the batch only when the geometry or the
+        colors of the clips change"""
+        region = self.context.region
+
+        geometryKey = self._getFillsGeometryKey(region)
+        if geometryKey != self._fillsGeometryKey:
+            self._fillsGeometry = self._buildFillsGeometry(region)
+            self._fillsGeometryKey = geometryKey
+            self._fillsBatch = None
+
+        fillColors = []
+        for (_shotInd, shotCompo, _lane), quad in zip(self.shotLanes, self._fillsGeometry):
+            if quad is not None:
+                shotCompo.updateColorFromShot()
+                fillColors.append(tuple(shotCompo.getFillColor()))
+            else:
+                fillColors.append(None)
+        fillColors = tuple(fillColors)
+
+        if self._fillsBatch is None or fillColors != self._fillsBatchColors:
+            vertices = []
+            colors = []
+            indices = []
+            for quad, color in zip(self._fillsGeometry, fillColors):
+                if quad is None:
+                    continue
+                firstInd = len(vertices)
+                vertices.extend(quad)
+                colors.extend((color,) * 4)
+                indices.extend(((firstInd, firstInd + 3, firstInd + 1), (firstInd + 1, firstInd + 3, firstInd + 2)))
+            self._fillsBatch = (
+                batch_for_shader(SMOOTH_COLOR_SHADER_2D, "TRIS", {"pos": vertices, "color": colors}, indices=indices)
+                if len(vertices)
+                else False
+            )
+            self._fillsBatchColors = fillColors
+
+        if self._fillsBatch and not preDrawOnly:
+            bgl.glEnable(bgl.GL_BLEND)
+            SMOOTH_COLOR_SHADER_2D.bind()
+            self._fillsBatch.draw(SMOOTH_COLOR_SHADER_2D)
+            bgl.glDisable(bgl.GL_BLEND)
 
-        shots_from_lane = defaultdict(list)
+    def drawShots(self, preDrawOnly=False):
+        props = self.context.scene.UAS_shot_manager_props
+        self.updateModel()
+
+        currentShotInd = props.getCurrentShotIndex()
+        selectedShotInd = props.getSelectedShotIndex()
 
         shotCompoCurrent = None
-        for i, shotCompo in enumerate(shotComponentsSorted):
-            if not props.interactShotsStack_displayDisabledShots and not shotCompo.shot.enabled:
-                shotCompo.isVisible = False
-                continue
-            lane = 1 + prefs.shtStack_firstLineIndex
-            if i > 0:
-                for ln, shots_in_lane in shots_from_lane.items():
-                    for s in shots_in_lane:
-                        if s.start <= shotCompo.shot.start <= s.end:
-                            break
-                    else:
-                        lane = ln
-                        break
-                else:
-                    if len(shots_from_lane):
-                        lane = max(shots_from_lane) + 1  # No free lane, make a new one.
-                    else:
-                        #   lane = ln
-                        pass
-            shots_from_lane[lane].append(shotCompo.shot)
-
-            shotCompo.isCurrent = shotCompo.shot == currentShot
+        for shotInd, shotCompo, _lane in self.shotLanes:
+            shotCompo.isCurrent = shotInd == currentShotInd
 
             # NOTE: we use _isSelected instead of the property isSelected in order
             # to avoid the call of the callback function _on_selected_changed, otherwise
             # the event loops and keep redrawing all the time
-            shotCompo._isSelected = shotCompo.shot == selectedShot
+            shotCompo._isSelected = shotInd == selectedShotInd
 
             if shotCompo.isCurrent:
                 shotCompoCurrent = shotCompo
-            shotCompo.isVisible = True
-            shotCompo.posY = lane
+
+        # the fills are drawn first, in a single batch, then the clips draw their lines, texts and handles over them
+        self.drawShotsFills(preDrawOnly=preDrawOnly)
+        for _shotInd, shotCompo, _lane in self.shotLanes:
             shotCompo.draw(None, self.context.region, preDrawOnly=preDrawOnly)
 
         # draw quad for current shot over the result
         self.drawCurrentShotDecoration(shotCompoCurrent, preDrawOnly=preDrawOnly)
 
+        # the bounding boxes of the clips are updated by their draw function
+        self.componentsIndex.build(self.shotComponents)
+
     def draw(self, preDrawOnly=False):
         if self.target_area is not None and self.context.area != self.target_area:
             return
 
-        props = self.context.scene.UAS_shot_manager_props
-
         # Debug - red rectangle ####################
         if self.useDebugComponents:
             height = 20
@@ -378,10 +493,7 @@ class ShotStackWidget:
 
         self.infoComponent.draw(None, self.context.region)
 
-        if props.interactShotsStack_displayInCompactMode:
-            self.drawShots_compactMode(preDrawOnly=preDrawOnly)
-        else:
-            self.drawShots(preDrawOnly=preDrawOnly)
+        self.drawShots(preDrawOnly=preDrawOnly)
 
     def validateAction(self):
         _logger.debug_ext("Validating Shot Stack action", col="GREEN", tag="SHOTSTACK_EVENT")
@@ -426,13 +538,28 @@ class ShotStackWidget:
         if event.type not in ["TIMER"]:
             _logger.debug_ext(f"event: type: {event.type}, value: {event.value}", col="GREEN", tag="SHOTSTACK_EVENT")
 
-        for shotCompo in self.shotComponents:
+        if event.type in ["MOUSEMOVE", "INBETWEEN_MOUSEMOVE", "TIMER"] and self.manipulatedComponent is None:
+            # hover events only change the highlight state of the clips under the mouse and of the ones
+            # that were under it at the previous event
+            hoveredComponents = self.componentsIndex.getComponentsAt(event.mouse_x - region.x, event.mouse_y - region.y)
+            eventComponents = self._hoveredComponents + [
+                shotCompo for shotCompo in hoveredComponents if shotCompo not in self._hoveredComponents
+            ]
+            self._hoveredComponents = hoveredComponents
+        else:
+            eventComponents = self.shotComponents
+
+        for shotCompo in eventComponents:
             if not shotCompo.isVisible:
                 continue
             event_handled = shotCompo.handle_event(context, event)
             if event_handled:
                 break
 
+        if eventComponents is self.shotComponents and event.type in ["MOUSEMOVE", "INBETWEEN_MOUSEMOVE"]:
+            # clips highlighted while another one was manipulated
+            self._hoveredComponents = [shotCompo for shotCompo in self.shotComponents if shotCompo.isHighlighted]
+
         # debug
         if not event_handled:
             if self.useDebugComponents:
@@ -41,6 +41,18 @@ from shotmanager.config import sm_logging
 _logger = sm_logging.getLogger(__name__)
 
 
+def _add_quad(vertices, colors, indices, x, y, sx, sy, color):
+    """Add to the buffers of a batch the 2 triangles of the rectangle with the specified bottom left corner and size"""
+    first_ind = len(vertices)
+    vertices.extend(((x, y), (x, y + sy), (x + sx, y + sy), (x + sx, y)))
+    colors.extend((color,) * 4)
+    indices.extend(((first_ind, first_ind + 1, first_ind + 2), (first_ind, first_ind + 2, first_ind + 3)))
+
+
+def _opaque(color):
+    return (color[0], color[1], color[2], 1.0)
+
+
 class BL_UI_Cursor:
     def __init__(self, move_callback=None):
         self.context = None
@@ -505,6 +517,9 @@ class BL_UI_Shot:
 
 
 class BL_UI_Timeline:
+
+    SMOOTH_COLOR_SHADER_2D = gpu.shader.from_builtin("2D_SMOOTH_COLOR")
+
     def __init__(self, x, y, width, height, target_area=None):
         self.context = None
         self.x = x
@@ -526,6 +541,13 @@ class BL_UI_Timeline:
         self.frame_cursor = BL_UI_Cursor(self.frame_cursor_moved)
         self.frame_cursor_forShotPlayMode = BL_UI_Cursor(self.frame_cursor_moved)
 
+        # retained geometry of the shots: the batch drawing all the shot quads is rebuilt only when the shots
+        # or the size of the area change
+        self._shots_batch = None
+        self._shots_batch_key = None
+        # for each displayed shot: (shot index, x, width, shot start, shot end)
+        self._shots_layout = list()
+
     def set_location(self, x, y):
         self.x = x
         self.y = y
@@ -545,71 +567,31 @@ class BL_UI_Timeline:
         self.frame_cursor.init(context)
         self.frame_cursor_forShotPlayMode.init(context, cursor_forShotPlayMode=True)
 
-    def draw_caret(self, x, color):
-        caret_width = 3
-        area_height = self.get_area_height()
-
-        y = self.height + self.y_offset
-        x_screen = x
-
-        indices = ((0, 1, 2), (0, 2, 3))
-
-        y_screen_flip = area_height - self.y_screen
-        # bottom left, top left, top right, bottom right
-        vertices = (
-            (x_screen, y_screen_flip),
-            (x_screen, y_screen_flip - self.height),
-            (x_screen + caret_width, y_screen_flip - self.height),
-            (x_screen + caret_width, y_screen_flip),
+    def _get_shots_batch_key(self, props, shots):
+        """Return a value that changes when the drawing of the shots has to be updated"""
+        shots_key = tuple(
+            (shot.name, shot.start, shot.end, shot.enabled, tuple(shot.color))
+            for shot in shots
+            if props.seqTimeline_displayDisabledShots or shot.enabled
         )
-
-        shader = gpu.shader.from_builtin("2D_UNIFORM_COLOR")
-        batch_panel = batch_for_shader(shader, "TRIS", {"pos": vertices}, indices=indices)
-
-        shader.bind()
-        # shader.uniform_float ( "color", ( 1., .1, .1, 1 ) )
-        shader.uniform_float("color", color)
-        bgl.glEnable(bgl.GL_BLEND)
-        batch_panel.draw(shader)
-        bgl.glDisable(bgl.GL_BLEND)
-
-    def draw_frame_caret(self, x, frame_width, color):
-        caret_width = frame_width
-        caret_height = self.height * 0.35
-        area_height = self.get_area_height()
-
-        y = caret_height + self.y_offset
-        x_screen = x
-
-        indices = ((0, 1, 2), (0, 2, 3))
-
-        y_screen_flip = area_height - self.y_screen
-        # bottom left, top left, top right, bottom right
-        vertices = (
-            (x_screen, y_screen_flip - self.height),
-            (x_screen, y_screen_flip - self.height + caret_height),
-            (x_screen + caret_width, y_screen_flip - self.height + caret_height),
-            (x_screen + caret_width, y_screen_flip - self.height),
+        return (
+            self.width,
+            self.height,
+            self.y,
+            props.getCurrentShotIndex(),
+            props.getSelectedShotIndex(),
+            props.seqTimeline_displayDisabledShots,
+            shots_key,
         )
 
-        shader = gpu.shader.from_builtin("2D_UNIFORM_COLOR")
-        batch_panel = batch_for_shader(shader, "TRIS", {"pos": vertices}, indices=indices)
-
-        shader.bind()
-        # shader.uniform_float("color", (1.0, 0.1, 0.1, 1))
-        shader.uniform_float("color", color)
-        bgl.glEnable(bgl.GL_BLEND)
-        batch_panel.draw(shader)
-        bgl.glDisable(bgl.GL_BLEND)
-
-    def draw_shots(self):
-        props = self.context.scene.UAS_shot_manager_props
-
-        shots = props.get_shots()
+    def _build_shots_batch(self, props, shots):
+        """Build the batch drawing the quads of all the shots, and the widgets used to draw their names"""
         currentShotIndex = props.getCurrentShotIndex()
         selectedShotIndex = props.getSelectedShotIndex()
 
         self.ui_shots.clear()
+        self._shots_layout.clear()
+        vertices, colors, indices = list(), list(), list()
 
         total_range = props.getEditDuration(ignoreDisabled=not props.seqTimeline_displayDisabledShots)
         offset_x = 0
@@ -630,26 +612,129 @@ class BL_UI_Timeline:
             s.init(self.context)
             s.shot_color = tuple(color_to_sRGB(shot.color))
             self.ui_shots.append(s)
+            self._shots_layout.append((i, offset_x, size_x, shot.start, shot.end))
+
+            # same quads as BL_UI_Shot.draw(), in the same order
+            bottom = self.y - self.height
+            line_thickness = 4
+            _add_quad(
+                vertices,
+                colors,
+                indices,
+                offset_x,
+                bottom,
+                size_x,
+                self.height,
+                s.shot_color if s.enabled else s._shot_color_disabled,
+            )
+            _add_quad(vertices, colors, indices, offset_x, bottom + 1, 1, self.height, _opaque(s._bg_color))
+            _add_quad(vertices, colors, indices, offset_x, bottom + 1, size_x, line_thickness, _opaque(s._bg_color))
+            if s.shotIsSelected:
+                _add_quad(
+                    vertices,
+                    colors,
+                    indices,
+                    offset_x,
+                    bottom,
+                    size_x,
+                    line_thickness,
+                    _opaque(s.color_selectedShot_border),
+                )
+            if s.shotIsCurrent:
+                current_thickness = line_thickness // 2 + 1 if s.shotIsSelected else line_thickness
+                _add_quad(
+                    vertices,
+                    colors,
+                    indices,
+                    offset_x,
+                    bottom,
+                    size_x,
+                    current_thickness,
+                    _opaque(s.color_currentShot_border),
+                )
 
-            s.draw()
+            offset_x += size_x
 
-            caret_pos = offset_x + (self.context.scene.frame_current - shot.start) * size_x / float(
-                shot.end + 1 - shot.start
+        self._shots_batch = None
+        if len(vertices):
+            self._shots_batch = batch_for_shader(
+                self.SMOOTH_COLOR_SHADER_2D, "TRIS", {"pos": vertices, "color": colors}, indices=indices
             )
-            frame_width = size_x / float(shot.end + 1 - shot.start)
 
-            if self.context.window_manager.UAS_shot_manager_shots_play_mode:
-                if currentShotIndex == i:
-                    caret_color = (1.0, 0.1, 0.1, 1)
-                    self.draw_frame_caret(caret_pos, frame_width, darken_color(caret_color))
-                    self.draw_caret(caret_pos, caret_color)
+    def draw_shots_names(self):
+        blf.shadow(0, 3, 0.1, 0.1, 0.1, 1)
+        blf.size(0, 12, 72)
+        for s in self.ui_shots:
+            blf.position(0, s.x + 3, s.y - s.height * 0.5, 0)
+            if s.enabled:
+                if color_is_dark(s.shot_color, 0.4):
+                    blf.color(0, *s._name_color_light)
+                else:
+                    blf.color(0, *s._name_color_dark)
             else:
-                if shot.start <= self.context.scene.frame_current and self.context.scene.frame_current <= shot.end:
-                    caret_color = (0.1, 1.0, 0.1, 1)
-                    self.draw_frame_caret(caret_pos, frame_width, darken_color(caret_color))
-                    self.draw_caret(caret_pos, caret_color)
+                blf.color(0, *s._name_color_disabled)
+            blf.draw(0, s.name)
+
+    def draw_carets(self):
+        """Draw the caret of the current frame in the shot containing it, as a separate small batch since it
+        changes at every frame"""
+        frame_current = self.context.scene.frame_current
+        play_mode = self.context.window_manager.UAS_shot_manager_shots_play_mode
+        currentShotIndex = self.context.scene.UAS_shot_manager_props.getCurrentShotIndex()
+
+        vertices, colors, indices = list(), list(), list()
+        bottom = self.y - self.height
+        for shot_index, offset_x, size_x, shot_start, shot_end in self._shots_layout:
+            if play_mode:
+                if currentShotIndex != shot_index:
+                    continue
+                caret_color = (1.0, 0.1, 0.1, 1)
+            else:
+                if not (shot_start <= frame_current <= shot_end):
+                    continue
+                caret_color = (0.1, 1.0, 0.1, 1)
+
+            frame_width = size_x / float(shot_end + 1 - shot_start)
+            caret_pos = offset_x + (frame_current - shot_start) * frame_width
+            # frame caret, then shot caret
+            _add_quad(
+                vertices,
+                colors,
+                indices,
+                caret_pos,
+                bottom,
+                frame_width,
+                self.height * 0.35,
+                darken_color(caret_color),
+            )
+            _add_quad(vertices, colors, indices, caret_pos, bottom, 3, self.height, caret_color)
+
+        if len(vertices):
+            batch = batch_for_shader(
+                self.SMOOTH_COLOR_SHADER_2D, "TRIS", {"pos": vertices, "color": colors}, indices=indices
+            )
+            self.SMOOTH_COLOR_SHADER_2D.bind()
+            bgl.glEnable(bgl.GL_BLEND)
+            batch.draw(self.SMOOTH_COLOR_SHADER_2D)
+            bgl.glDisable(bgl.GL_BLEND)
+
+    def draw_shots(self):
+        props = self.context.scene.UAS_shot_manager_props
+        shots = props.get_shots()
+
+        batch_key = self._get_shots_batch_key(props, shots)
+        if batch_key != self._shots_batch_key:
+            self._build_shots_batch(props, shots)
+            self._shots_batch_key = batch_key
+
+        if self._shots_batch is not None:
+            self.SMOOTH_COLOR_SHADER_2D.bind()
+            bgl.glEnable(bgl.GL_BLEND)
+            self._shots_batch.draw(self.SMOOTH_COLOR_SHADER_2D)
+            bgl.glDisable(bgl.GL_BLEND)
 
-            offset_x += int(self.width * float(shot.end + 1 - shot.start) / total_range)
+        self.draw_shots_names()
+        self.draw_carets()
 
     def draw(self):
         if self.target_area is not None and self.context.area != self.target_area:
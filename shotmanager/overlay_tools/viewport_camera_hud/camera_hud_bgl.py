@@ -29,82 +29,165 @@ from bpy_extras.view3d_utils import location_3d_to_region_2d
 
 from shotmanager.utils.utils_ogl import Rect, Quadrilater
 from shotmanager.utils import utils_greasepencil
+from shotmanager.properties.shots_index import getShotsDataVersion
 
 from shotmanager.config import config
 
+# data drawn by the HUD:
+#   - labels: dict {camera name: (has previous shots, list of shot labels, has next shots)}, rebuilt only when the
+#     shots, the take or the current shot change
+#   - cameras: list of [camera, storyboard frame, storyboard frame distance, labels, canvas corners] of the cameras
+#     having shots, rebuilt when the cache is invalidated. The canvas corners are computed again at each frame
+#     since the cameras can be animated
+_hudCache = {"labelsKey": None, "labels": None, "camerasKey": None, "cameras": None, "frame": None}
+
+
+def invalidateCameraHUDCache():
+    """Clear the cached cameras of the HUD
+    To be called when the cameras change. The shot labels follow the version of the shots data"""
+    _hudCache["camerasKey"] = None
+
+
+def isCameraHUDFrameChange(frame):
+    """Return True if the specified frame is not the one the canvas corners of the cached cameras are computed for"""
+    return _hudCache["frame"] is not None and frame != _hudCache["frame"]
+
+
+def _validateHUDCache(context, props):
+    scene = context.scene
+    labelsKey = (
+        getShotsDataVersion(),
+        scene.name,
+        props.getCurrentTakeIndex(),
+        props.getCurrentShotIndex(),
+    )
+    if labelsKey != _hudCache["labelsKey"]:
+        _hudCache["labelsKey"] = labelsKey
+        _hudCache["labels"] = _buildCamerasShotsLabels(props)
+        _hudCache["camerasKey"] = None
+
+    camerasKey = (labelsKey, len(scene.objects))
+    if camerasKey != _hudCache["camerasKey"]:
+        _hudCache["camerasKey"] = camerasKey
+        _hudCache["cameras"] = _buildHUDCameras(context, props)
+        _hudCache["frame"] = None
+
+    # the canvas corners depend on the camera transforms, which can be animated
+    if scene.frame_current != _hudCache["frame"]:
+        _hudCache["frame"] = scene.frame_current
+        for camData in _hudCache["cameras"]:
+            camData[4] = None
+
+
+def _buildCamerasShotsLabels(props):
+    """Return the labels of the shots of the current take, by camera name"""
+    current_shot = props.getCurrentShot()
+
+    shots_by_camera = defaultdict(list)
+    for shot in props.get_shots():
+        if shot.isCameraValid():
+            shots_by_camera[shot.camera.name].append(shot)
+
+    # restrict the number of shots to be displayed as a list
+    shot_trim_length = 2  # Limit the display of x shot before and after the current_shot
+
+    labels_by_camera = dict()
+    for camName, shots in shots_by_camera.items():
+        current_shot_index = 0
+        if current_shot in shots:
+            current_shot_index = shots.index(current_shot)
+
+        before_range = max(current_shot_index - shot_trim_length, 0)
+        after_range = min(current_shot_index + shot_trim_length + 1, len(shots))
+
+        labels = [
+            _getShotLabel(s.name, s.color, is_current=current_shot == s, is_disabled=not s.enabled)
+            for s in shots[before_range:after_range]
+        ]
+        labels_by_camera[camName] = (before_range > 0, labels, after_range < len(shots))
+
+    return labels_by_camera
+
+
+def _buildHUDCameras(context, props):
+    """Return the list of [camera, storyboard frame, distance, labels, canvas corners] of the cameras having shots
+    storyboard frame: grease pencil child of the camera on which the labels are drawn when the camera is hidden, or None
+    canvas corners: set to None, computed by _getCanvasCorners()
+    """
+    cameras = []
+    for cam in [obj for obj in context.scene.objects if obj is not None and obj.type == "CAMERA"]:
+        labels = _hudCache["labels"].get(cam.name, None)
+        if labels is None:
+            continue
+
+        gp_child = utils_greasepencil.get_greasepencil_child(cam, childType="GPENCIL")
+        distance = 0.5
+        if gp_child is not None:
+            parentShot = props.getParentShotFromGpChild(gp_child)
+            if parentShot is not None:
+                gp_props = parentShot.getGreasePencilProps(mode="STORYBOARD")
+                if gp_props is not None:
+                    distance = gp_props.distanceFromOrigin
+
+        cameras.append([cam, gp_child, distance, labels, None])
+
+    return cameras
+
+
+def _getCanvasCorners(context, camData):
+    """Return the bottom left and top left corners, in world space, of the canvas of the storyboard frame of the
+    camera at the current frame"""
+    if camData[4] is None:
+        # corners = utils_greasepencil.getCameraCorners(context, cam, distance=0.5, coordSys="WORLD")
+        corners = utils_greasepencil.getCanvasCorners(context, camData[0], distance=camData[2], coordSys="WORLD")
+        camData[4] = (corners[0], corners[3])
+    return camData[4]
+
 
 def draw_shots_names(context):
-    """Draw shot names on cameras visible in 3D in the viewport"""
+    """Draw shot names on cameras visible in 3D in the viewport
+    The cameras and their labels are cached, only their projection in the viewport is done at each draw"""
     scene = context.scene
     props = config.getAddonProps(context.scene)
+    prefs = config.getAddonPrefs()
+
+    _validateHUDCache(context, props)
+
+    font_size = prefs.cameraHUD_shotNameSize
+    blf.size(0, font_size, 72)
+    # Take maximum font height
+    _, font_height = blf.dimensions(0, "A")
+
+    region = context.region
+    region_3d = context.space_data.region_3d
+    isInCameraView = region_3d.view_perspective == "CAMERA"
 
-    # return
     # For all camera which have a shot draw on the ui a list of shots associated with it
-    cameras = [obj for obj in scene.objects if obj is not None and obj.type == "CAMERA"]
-    for cam in cameras:
-        if cam.type == "CAMERA":
-            # print(f"cam: {cam.name}, cam.visible_get(): {cam.visible_get()}")
-
-            if not (context.space_data.region_3d.view_perspective == "CAMERA" and cam == context.scene.camera):
-                if cam.visible_get():
-                    pos_2d = location_3d_to_region_2d(
-                        context.region, context.space_data.region_3d, mathutils.Vector(cam.location)
+    for camData in _hudCache["cameras"]:
+        cam, gp_child, _, labels, _ = camData
+        if isInCameraView and cam == scene.camera:
+            continue
+
+        if cam.visible_get():
+            pos_2d = location_3d_to_region_2d(region, region_3d, mathutils.Vector(cam.location))
+            if pos_2d is not None:
+                _drawShotsLabels(cam, labels, pos_2d[0], pos_2d[1], font_size, font_height, vertical=True)
+        elif gp_child is not None and gp_child.visible_get():
+            canvas_corners = _getCanvasCorners(context, camData)
+            # the labels are drawn at the bottom left corner, if the top left one is in front of the view
+            if location_3d_to_region_2d(region, region_3d, canvas_corners[1]) is not None:
+                pos_2d = location_3d_to_region_2d(region, region_3d, canvas_corners[0])
+                if pos_2d is not None:
+                    _drawShotsLabels(
+                        cam,
+                        labels,
+                        pos_2d[0],
+                        pos_2d[1],
+                        font_size,
+                        font_height,
+                        vertical=True,
+                        screen_offset=[0, 4],
                     )
-                    if pos_2d is not None:
-                        # print("pos x:", pos_2d[0])
-                        # print("pos y:", pos_2d[1])
-                        draw_all_shots_names(context, cam, pos_2d[0], pos_2d[1], vertical=True)
-                else:
-                    gp_child = utils_greasepencil.get_greasepencil_child(cam, childType="GPENCIL")
-                    parentShot = props.getParentShotFromGpChild(gp_child)
-                    distance = 0.5
-                    if parentShot is not None:
-                        gp_props = parentShot.getGreasePencilProps(mode="STORYBOARD")
-                        if gp_props is not None:
-                            distance = gp_props.distanceFromOrigin
-
-                    # corners = utils_greasepencil.getCameraCorners(context, cam, distance=0.5, coordSys="WORLD")
-                    corners = utils_greasepencil.getCanvasCorners(context, cam, distance=distance, coordSys="WORLD")
-                    frame_px = [
-                        location_3d_to_region_2d(context.region, context.space_data.region_3d, v) for v in corners
-                    ]
-                    # if not frame_px[0]:
-                    #     frame_px = [
-                    #         location_3d_to_region_2d(context.region, context.space_data.region_3d, v) for v in corners
-                    #     ]
-
-                    top_left = corners[3]
-                    if gp_child is not None and gp_child.visible_get():
-                        # if not (context.space_data.region_3d.view_perspective == "CAMERA" and cam == context.scene.camera):
-                        pos_2d = location_3d_to_region_2d(
-                            # context.region, context.space_data.region_3d, mathutils.Vector(gp_child.location + cam.location)
-                            context.region,
-                            context.space_data.region_3d,
-                            # mathutils.Vector(gp_child.matrix_world.translation),
-                            top_left,
-                        )
-                        if pos_2d is not None:
-                            # print("pos x:", pos_2d[0])
-                            # print("pos y:", pos_2d[1])
-                            # print("frame_px x:", frame_px[0])
-                            # print("frame_px y:", frame_px[1])
-
-                            # debug:
-                            # col = (1.0, 1.0, 0.0, 1.0)
-                            # Quadrilater(frame_px[0], frame_px[1], frame_px[2], frame_px[3], col).draw()
-                            # drawCameraPlane(context, distance=0.5, camera=cam)
-                            try:
-                                if frame_px[0]:
-                                    draw_all_shots_names(
-                                        context,
-                                        cam,
-                                        frame_px[0][0],
-                                        frame_px[0][1],
-                                        vertical=True,
-                                        screen_offset=[0, 4],
-                                    )
-                            except Exception as e:
-                                print(f"{e}")
 
 
 def draw_all_shots_names(context, cam, pos_x, pos_y, vertical=False, screen_offset=None):
@@ -114,73 +197,38 @@ def draw_all_shots_names(context, cam, pos_x, pos_y, vertical=False, screen_offs
     """
     props = config.getAddonProps(context.scene)
     prefs = config.getAddonPrefs()
-    current_shot = props.getCurrentShot()
-    # hud_offset_x = 19
 
-    if screen_offset is None:
-        hud_offset_x = 8
-        hud_offset_y = 0
-        x_horizontal_offset = 80
-    else:
-        hud_offset_x = screen_offset[0]
-        hud_offset_y = screen_offset[1]
-        x_horizontal_offset = 0
+    _validateHUDCache(context, props)
+    labels = _hudCache["labels"].get(cam.name, None)
+    if labels is None:
+        return ()
 
     font_size = prefs.cameraHUD_shotNameSize
-
-    blf.color(0, 1, 1, 1, 1)
-    # blf.size(0, 12, 72)
     blf.size(0, font_size, 72)
     # Take maximum font height
     _, font_height = blf.dimensions(0, "A")
-    # font_height = font_height * 0.8
 
-    shotsList_allCams = props.getShotsUsingCamera(cam)
-    if 0 == len(shotsList_allCams):
-        return ()
-
-    # keep only shots with visible cameras
-    shotsList = list()
-    for shot in shotsList_allCams:
-        gp_child = utils_greasepencil.get_greasepencil_child(shot.camera, childType="GPENCIL")
-        # if shot.isCameraValid() and (shot.camera.visible_get() or shot.camera.name == cam.name):
-        if shot.isCameraValid() and (
-            shot.camera.visible_get()
-            or shot.camera.name == cam.name
-            or (gp_child is not None and gp_child.visible_get())
-        ):
-            # if shot.camera is not None and shot.camera.visible_get():
-            shotsList.append(shot)
-
-    shot_names_by_camera = defaultdict(list)
-    for shot in shotsList:
-        shot_names_by_camera[shot.camera.name].append(shot)
-
-    #
-    # Filter out shots in order to restrict the number of shots to be displayed as a list
-    #
-    shot_trim_info = dict()
-    shot_trim_length = 2  # Limit the display of x shot before and after the current_shot
-
-    for c, shots in shot_names_by_camera.items():
-        shot_trim_info[c] = [False, False]
-
-        current_shot_index = 0
-        if current_shot in shots:
-            current_shot_index = shots.index(current_shot)
+    _drawShotsLabels(cam, labels, pos_x, pos_y, font_size, font_height, vertical=vertical, screen_offset=screen_offset)
 
-        before_range = max(current_shot_index - shot_trim_length, 0)
-        after_range = min(current_shot_index + shot_trim_length + 1, len(shots))
-        shot_names_by_camera[c] = shots[before_range:after_range]
 
-        if before_range > 0:
-            shot_trim_info[c][0] = True
-        if after_range < len(shots):
-            shot_trim_info[c][1] = True
+def _drawShotsLabels(cam, labels, pos_x, pos_y, font_size, font_height, vertical=False, screen_offset=None):
+    """Draw the labels of the shots of the camera
+    Args:
+        labels: tuple (has previous shots, list of shot labels, has next shots)
+        screen_offset: array [x, y] to offset the drawing origin
+    """
+    hasPreviousShots, shotLabels, hasNextShots = labels
 
-    # For all camera which have a shot draw on the ui a list of shots associated with it
-    # blf.size(0, font_size, 72)
+    if screen_offset is None:
+        hud_offset_x = 8
+        hud_offset_y = 0
+        x_horizontal_offset = 80
+    else:
+        hud_offset_x = screen_offset[0]
+        hud_offset_y = screen_offset[1]
+        x_horizontal_offset = 0
 
+    blf.size(0, font_size, 72)
     blf.color(0, 0.9, 0.9, 0.9, 0.9)
 
     # Move underneath object name
@@ -188,7 +236,7 @@ def draw_all_shots_names(context, cam, pos_x, pos_y, vertical=False, screen_offs
     y_offset = hud_offset_y + int(cam.show_name) * -12
 
     # Draw ... if we don't display previous shots
-    if shot_trim_info[cam.name][0]:
+    if hasPreviousShots:
         blf.position(0, pos_x + x_offset, pos_y + y_offset, 0)
         blf.draw(0, "...")
         if vertical:
@@ -197,23 +245,15 @@ def draw_all_shots_names(context, cam, pos_x, pos_y, vertical=False, screen_offs
             x_offset += x_horizontal_offset
 
     # Draw the shot names.
-    for s in shot_names_by_camera[cam.name]:
-        drawShotName(
-            pos_x + x_offset,
-            pos_y + y_offset,
-            s.name,
-            s.color,
-            font_height,
-            is_current=current_shot == s,
-            is_disabled=not s.enabled,
-        )
+    for label in shotLabels:
+        _drawShotLabel(pos_x + x_offset, pos_y + y_offset, label, font_height)
         if vertical:
             y_offset -= font_size  # Seems to do the trick for this value
         else:
             x_offset += x_horizontal_offset
 
     # Draw ... if we don't display next shots
-    if shot_trim_info[cam.name][1]:
+    if hasNextShots:
         blf.position(0, pos_x + x_offset, pos_y + y_offset, 0)
         blf.draw(0, "...")
 
@@ -223,26 +263,40 @@ def draw_all_shots_names(context, cam, pos_x, pos_y, vertical=False, screen_offs
     # blf.draw(0, str(num_cams))
 
 
-def drawShotName(pos_x, pos_y, shot_name, shot_color, font_height, is_current=False, is_disabled=False):
-    square_size = 4.0
-    square_size = font_height * 1.2
-
+def _getShotLabel(shot_name, shot_color, is_current=False, is_disabled=False):
+    """Return the tuple (name, square color, text color) used to draw the name of a shot"""
     # square
     gamma = 1.0 / 2.2
     linColor = (pow(shot_color[0], gamma), pow(shot_color[1], gamma), pow(shot_color[2], gamma), shot_color[3])
-    Rect(pos_x, pos_y - square_size * 0.1, square_size, square_size, linColor, "BOTTOM_LEFT").draw()
 
     # shot name
-    blf.position(0, pos_x + square_size * 1.25, pos_y, 0)
     if is_current:
-        blf.color(0, 0.4, 0.9, 0.1, 1)
+        textColor = (0.4, 0.9, 0.1, 1)
     elif is_disabled:
-        blf.color(0, 0.6, 0.6, 0.6, 1)
+        textColor = (0.6, 0.6, 0.6, 1)
     else:
-        blf.color(0, 0.9, 0.9, 0.9, 0.9)
+        textColor = (0.9, 0.9, 0.9, 0.9)
+
+    return (shot_name, linColor, textColor)
+
+
+def _drawShotLabel(pos_x, pos_y, label, font_height):
+    shot_name, linColor, textColor = label
+    square_size = font_height * 1.2
+
+    # square
+    Rect(pos_x, pos_y - square_size * 0.1, square_size, square_size, linColor, "BOTTOM_LEFT").draw()
+
+    # shot name
+    blf.position(0, pos_x + square_size * 1.25, pos_y, 0)
+    blf.color(0, *textColor)
     blf.draw(0, shot_name)
 
 
+def drawShotName(pos_x, pos_y, shot_name, shot_color, font_height, is_current=False, is_disabled=False):
+    _drawShotLabel(pos_x, pos_y, _getShotLabel(shot_name, shot_color, is_current, is_disabled), font_height)
+
+
 def view3d_camera_border(context):
     cam = context.scene.camera
     frame = cam.data.view_frame(scene=context.scene)
@@ -22,6 +22,10 @@ Camera HUD
 import bpy
 from bpy.app.handlers import persistent
 
+from .camera_hud_bgl import invalidateCameraHUDCache, isCameraHUDFrameChange
+
+from shotmanager.config import config
+
 
 @persistent
 def shotMngHandler_load_post_cameraHUD(self, context):
@@ -42,3 +46,13 @@ def shotMngHandler_load_post_cameraHUD(self, context):
             except Exception:
                 print("****** Paf in draw hud on camera pov handler  *")
                 # raise()
+
+
+@persistent
+def shotMngHandler_cameraHUD_invalidateCache(self, context):
+    """Called after each depsgraph update, undo and redo since the cameras may have changed
+    The depsgraph updates due to a frame change, during the playback for example, keep the cached cameras, only
+    their canvas is computed again for the new frame"""
+    if isinstance(context, bpy.types.Depsgraph) and isCameraHUDFrameChange(self.frame_current):
+        return
+    invalidateCameraHUDCache()
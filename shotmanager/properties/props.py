@@ -40,12 +40,14 @@ from .montage_interface import MontageInterface
 
 from shotmanager.rendering.rendering_settings_props import UAS_ShotManager_RenderSettings
 from shotmanager.rendering.rendering_global_props import UAS_ShotManager_RenderGlobalContext
+from shotmanager.rendering.rendering_intermediates import getIntermediateFilesRootPath
 
 from .output_params import UAS_ShotManager_OutputParams_Resolution
 
 from .shot import UAS_ShotManager_Shot
 from .shots_global_settings import UAS_ShotManager_ShotsGlobalSettings
 from .take import UAS_ShotManager_Take
+from .shots_index import getShotsIntervalIndex, getShotsEditTimeModel, getShotLocation, invalidateShotsStructure
 from .layout_settings import UAS_ShotManager_LayoutSettings
 
 from shotmanager.warnings import warnings
@@ -2534,6 +2536,7 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
             atValidIndex = min(atValidIndex, len(takes) - 1)
             takes.move(len(takes) - 1, atValidIndex)
             newTake = takes[atValidIndex]
+            invalidateShotsStructure(self.parentScene)
 
         # after a move newTake is different!
         # print(f"new added take name02: {newTake.name}")
@@ -2573,6 +2576,7 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
                 return -1
 
         self.takes.move(takeInd, newInd)
+        invalidateShotsStructure(self.parentScene)
         self.setCurrentTakeByIndex(newInd)
 
         return newInd
@@ -2803,23 +2807,11 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
 
     def getEditDuration(self, ignoreDisabled=True, takeIndex=-1):
         """Return edit duration in frames"""
-        takeInd = (
-            self.getCurrentTakeIndex()
-            if -1 == takeIndex
-            else (takeIndex if 0 <= takeIndex and takeIndex < len(self.getTakes()) else -1)
-        )
-        duration = -1
-        if -1 == takeInd:
+        editModel = getShotsEditTimeModel(self, takeIndex=takeIndex)
+        if editModel is None:
             return -1
 
-        shotList = self.getShotsList(ignoreDisabled=ignoreDisabled, takeIndex=takeIndex)
-
-        if 0 < len(shotList):
-            duration = 0
-            for sh in shotList:
-                duration += sh.getDuration()
-
-        return duration
+        return editModel.getEditDuration(ignoreDisabled=ignoreDisabled)
 
     def getEditTime(self, referenceShot, frameIndexIn3DTime, referenceLevel="TAKE", ignoreDisabled=True):
         """Return edit current time in frames, -1 if no shots or if current shot is disabled
@@ -2832,38 +2824,49 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
         if referenceShot is None:
             return frameIndInEdit
 
-        takeInd = referenceShot.getParentTakeIndex()
-        # ignoreDisabled = True
-
-        # case where specified shot is disabled -- current shot may not be in the shot list if shotList is not the whole list
-        if ignoreDisabled and not referenceShot.enabled:
-            return -1
+        takeInd, shotInd = getShotLocation(self, referenceShot)
+        if -1 == takeInd:
+            return frameIndInEdit
 
         # specified time must be in the range of the specifed shot!!!
-        # get the whole shots list
-        shotList = self.getShotsList(ignoreDisabled=ignoreDisabled, takeIndex=takeInd)
+        # case where specified shot is disabled is handled by the edit model
+        editModel = getShotsEditTimeModel(self, takeIndex=takeInd)
+        frameIndInEdit = editModel.getEditTime(shotInd, frameIndexIn3DTime, ignoreDisabled=ignoreDisabled)
 
-        if 0 < len(shotList):
-            if referenceShot.start <= frameIndexIn3DTime and frameIndexIn3DTime <= referenceShot.end:
-                frameIndInEdit = 0
-                shotInd = 0
-                while shotInd < len(shotList) and referenceShot != shotList[shotInd]:
-                    #         print("    While: shotInd: " + str(shotInd) + ", referenceShot: " + str(referenceShot) + ", shotList[shotInd]: " + str(shots[shotInd]))
-                    #         print("    frameIndInEdit: ", frameIndInEdit)
-                    if not ignoreDisabled or shotList[shotInd].enabled:
-                        frameIndInEdit += shotList[shotInd].getDuration()
-                    shotInd += 1
-
-                frameIndInEdit += frameIndexIn3DTime - referenceShot.start
-
-                if "GLOBAL_EDIT" == referenceLevel:
-                    frameIndInEdit += referenceShot.getParentTake().startInGlobalEdit
-                else:
-                    # at take level
-                    frameIndInEdit += self.editStartFrame  # at project level
+        if -1 != frameIndInEdit:
+            frameIndInEdit += self._getEditTimeOffset(takeInd, referenceLevel)
 
         return frameIndInEdit
 
+    def _getEditTimeOffset(self, takeIndex, referenceLevel="TAKE"):
+        if "GLOBAL_EDIT" == referenceLevel:
+            return self.takes[takeIndex].startInGlobalEdit
+        else:
+            # at take level
+            return self.editStartFrame  # at project level
+
+    def getShotAndFrameFromEditTime(self, editTime, referenceLevel="TAKE", ignoreDisabled=True, takeIndex=-1):
+        """Inverse of getEditTime: return the tuple (shot, frame in 3D time) corresponding to the specified edit time,
+        (None, -1) if the edit time is out of the edit
+        referenceLevel can be "TAKE" or "GLOBAL_EDIT"
+        """
+        takeInd = (
+            self.getCurrentTakeIndex()
+            if -1 == takeIndex
+            else (takeIndex if 0 <= takeIndex and takeIndex < len(self.getTakes()) else -1)
+        )
+        if -1 == takeInd:
+            return (None, -1)
+
+        editModel = getShotsEditTimeModel(self, takeIndex=takeInd)
+        shotInd, frameIn3DTime = editModel.getShotIndexAndFrameFromEditTime(
+            editTime - self._getEditTimeOffset(takeInd, referenceLevel), ignoreDisabled=ignoreDisabled
+        )
+        if -1 == shotInd:
+            return (None, -1)
+
+        return (self.takes[takeInd].shots[shotInd], frameIn3DTime)
+
     def getEditCurrentTime(self, referenceLevel="TAKE", ignoreDisabled=True):
         """Return edit current time in frames, -1 if no shots or if current shot is disabled and ignoreDisabled is True
         works only on current take
@@ -3006,6 +3009,7 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
         newShot = None
         shots = self.get_shots(takeIndex=takeInd)
 
+        invalidateShotsStructure(self.parentScene)
         newShot = shots.add()  # shot is added at the end
         newShot.parentScene = self.getParentScene()
         # newShot.parentTakeIndex = takeInd
@@ -3193,6 +3197,7 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
             if deleteCamera:
                 self.deleteShotCamera(shots[shotIndex])
             shots.remove(shotIndex)
+            invalidateShotsStructure(self.parentScene)
 
     def removeShot(self, shot, deleteCamera=False):
         """Remove the shot from its parent take
@@ -3255,6 +3260,7 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
             # print(f"La: takeInd: {takeInd}, currentTakeInd: {currentTakeInd}, shot Ind: {shotInd}")
             self.removeShot(shot, deleteCamera=deleteCamera)
             shots.remove(shotInd)
+            invalidateShotsStructure(self.parentScene)
 
     def moveShotToIndex(self, shot, newIndex):
         """
@@ -3285,6 +3291,7 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
         newInd = min(newInd, len(shots) - 1)
 
         shots.move(shotInd, newInd)
+        invalidateShotsStructure(self.parentScene)
 
         # wkipwkipwkip test if shot and current shot are from the same take!!
         # if currentShotInd == shotInd:
@@ -3294,39 +3301,16 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
         return self.getShotByIndex(newInd, takeIndex=takeInd)
 
     def getShotParentTakeIndex(self, shot):
-        for i, take in enumerate(self.takes):
-            for j, sh in enumerate(take.shots):
-                if sh == shot:
-                    return i
-        return None
+        takeInd = getShotLocation(self, shot)[0]
+        return None if -1 == takeInd else takeInd
 
     def getShotParentTake(self, shot):
-        for i, take in enumerate(self.takes):
-            for j, sh in enumerate(take.shots):
-                if sh == shot:
-                    return take
-        return -1
+        takeInd = getShotLocation(self, shot)[0]
+        return -1 if -1 == takeInd else self.takes[takeInd]
 
     def getShotIndex(self, shot):
         """Return the shot index in its parent take"""
-        # takeInd = shot.getParentTakeIndex()
-        # shotInd = -1
-
-        # # wkip a optimiser
-        # shotList = self.getShotsList(ignoreDisabled=False, takeIndex=takeInd)
-
-        # shotInd = 0
-        # while shotInd < len(shotList) and shot != shotList[shotInd]:  # wkip mettre shotList[shotInd].name?
-        #     shotInd += 1
-        # if shotInd == len(shotList):
-        #     shotInd = -1
-
-        # return shotInd
-        for i, take in enumerate(self.takes):
-            for j, sh in enumerate(take.shots):
-                if sh == shot:
-                    return j
-        return -1
+        return getShotLocation(self, shot)[1]
 
     def getShotByIndex(self, shotIndex, ignoreDisabled=False, takeIndex=-1):
         takeInd = (
@@ -3741,78 +3725,30 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
 
         return nextShotInd
 
-    # works only on current take
-    # TODO make this function work for any take
-    def getFirstShotIndexContainingFrame(self, frameIndex, ignoreDisabled=False):
+    def getFirstShotIndexContainingFrame(self, frameIndex, ignoreDisabled=False, takeIndex=-1):
         """Return the first shot containing the specifed frame, -1 if not found"""
-        firstShotInd = -1
-
-        shotList = self.get_shots()
-        shotFound = False
-
-        if len(shotList):
-            firstShotInd = 0
-            while firstShotInd < len(shotList) and not shotFound:
-                if not ignoreDisabled or shotList[firstShotInd].enabled:
-                    shotFound = shotList[firstShotInd].start <= frameIndex and frameIndex <= shotList[firstShotInd].end
-                firstShotInd += 1
-
-        if shotFound:
-            firstShotInd = firstShotInd - 1
-        else:
-            firstShotInd = -1
-
-        return firstShotInd
+        shotsIndex = getShotsIntervalIndex(self, takeIndex=takeIndex)
+        if shotsIndex is None:
+            return -1
+        return shotsIndex.getFirstShotIndexContainingFrame(frameIndex, ignoreDisabled=ignoreDisabled)
 
-    # works only on current take
-    # TODO make this function work for any take
-    def getFirstShotIndexBeforeFrame(self, frameIndex, ignoreDisabled=False):
+    def getFirstShotIndexBeforeFrame(self, frameIndex, ignoreDisabled=False, takeIndex=-1):
         """Return the first shot before the specifed frame (supposing thanks to getFirstShotIndexContainingFrame than
         frameIndex is not in a shot), -1 if not found
         """
-        firstShotInd = -1
-
-        shotList = self.get_shots()
-        shotFound = False
-
-        if len(shotList):
-            firstShotInd = len(shotList) - 1
-            while 0 <= firstShotInd and not shotFound:
-                if not ignoreDisabled or shotList[firstShotInd].enabled:
-                    shotFound = shotList[firstShotInd].end < frameIndex
-                firstShotInd -= 1
-
-        if shotFound:
-            firstShotInd = firstShotInd + 1
-        else:
-            firstShotInd = -1
-
-        return firstShotInd
+        shotsIndex = getShotsIntervalIndex(self, takeIndex=takeIndex)
+        if shotsIndex is None:
+            return -1
+        return shotsIndex.getFirstShotIndexBeforeFrame(frameIndex, ignoreDisabled=ignoreDisabled)
 
-    # works only on current take
-    # TODO make this function work for any take
-    def getFirstShotIndexAfterFrame(self, frameIndex, ignoreDisabled=False):
+    def getFirstShotIndexAfterFrame(self, frameIndex, ignoreDisabled=False, takeIndex=-1):
         """Return the first shot after the specifed frame (supposing thanks to getFirstShotIndexContainingFrame than
         frameIndex is not in a shot), -1 if not found
         """
-        firstShotInd = -1
-
-        shotList = self.get_shots()
-        shotFound = False
-
-        if len(shotList):
-            firstShotInd = 0
-            while firstShotInd < len(shotList) and not shotFound:
-                if not ignoreDisabled or shotList[firstShotInd].enabled:
-                    shotFound = frameIndex < shotList[firstShotInd].start
-                firstShotInd += 1
-
-        if shotFound:
-            firstShotInd = firstShotInd - 1
-        else:
-            firstShotInd = -1
-
-        return firstShotInd
+        shotsIndex = getShotsIntervalIndex(self, takeIndex=takeIndex)
+        if shotsIndex is None:
+            return -1
+        return shotsIndex.getFirstShotIndexAfterFrame(frameIndex, ignoreDisabled=ignoreDisabled)
 
     #############################################
     # shot cameras
@@ -4736,6 +4672,10 @@ class UAS_ShotManager_Props(MontageInterface, PropertyGroup):
                 #   filePath += bpy.path.abspath(bpy.data.filepath)     # current blender file path
                 filePath += bpy.path.abspath(self.renderRootPath)
 
+            # the intermediate files of the shots can be located elsewhere, on a faster drive for example
+            if "SH_" == outputMedia[0:3] and ("_INTERM" in outputMedia or "AUDIO" == outputMedia[3:8]):
+                filePath = getIntermediateFilesRootPath(entity, filePath)
+
             if not (filePath.endswith("/") or filePath.endswith("\\")):
                 filePath += FOLDER_SEPARATOR
 
@@ -41,6 +41,7 @@ from shotmanager.features.greasepencil import greasepencil as gp
 from shotmanager.utils import utils
 from shotmanager.utils import utils_greasepencil
 from .montage_interface import ShotInterface
+from .shots_index import invalidateShotsTimeIndex, incrementShotsDataVersion
 
 from shotmanager.config import config
 from shotmanager.config import sm_logging
@@ -158,10 +159,12 @@ class UAS_ShotManager_Shot(ShotInterface, PropertyGroup):
         shots = props.getShotsList(takeIndex=self.getParentTakeIndex())
         newName = utils.findFirstUniqueName(self, value, shots)
         self["name"] = newName
+        incrementShotsDataVersion()
 
     name: StringProperty(name="Name", get=_get_name, set=_set_name)
 
     def _update_enabled(self, context):
+        invalidateShotsTimeIndex(self.parentScene)
         self.selectShotInUI()
 
     enabled: BoolProperty(
@@ -195,6 +198,7 @@ class UAS_ShotManager_Shot(ShotInterface, PropertyGroup):
 
     # *** behavior here must match the one of start and end of shot preferences ***
     def _set_start(self, value):
+        invalidateShotsTimeIndex(self.parentScene)
         duration = self.getDuration()
         self["start"] = value
         if self.durationLocked:
@@ -231,6 +235,7 @@ class UAS_ShotManager_Shot(ShotInterface, PropertyGroup):
 
     # *** behavior here must match the one of start and end of shot preferences ***
     def _set_end(self, value):
+        invalidateShotsTimeIndex(self.parentScene)
         duration = self.getDuration()
         self["end"] = value
         if self.durationLocked:
@@ -334,12 +339,16 @@ class UAS_ShotManager_Shot(ShotInterface, PropertyGroup):
         else:
             return False
 
+    def _update_camera(self, context):
+        incrementShotsDataVersion()
+
     camera: PointerProperty(
         name="Camera",
         description="Select a Camera",
         type=bpy.types.Object,
         # poll=lambda self, obj: True if obj.type == "CAMERA" else False,
         poll=_filter_cameras,
+        update=_update_camera,
     )
 
     def setCamera(self, newCamera):
@@ -426,6 +435,7 @@ class UAS_ShotManager_Shot(ShotInterface, PropertyGroup):
             self.camera.color[3] = self["color"][3]
 
     def _update_color(self, context):
+        incrementShotsDataVersion()
         self.selectShotInUI()
 
     color: FloatVectorProperty(
@@ -0,0 +1,384 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Cached lookup structures built on the shots of the takes
+
+The structures are built lazily, per scene and per take, and are invalidated by the shot
+properties update functions and by the shot operations of the props (add, remove, move...)
+"""
+
+from bisect import bisect_left, bisect_right
+import heapq
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# cached interval indices, key is (scene key, take index)
+_intervalIndices = dict()
+
+# cached edit time models, key is (scene key, take index)
+_editTimeModels = dict()
+
+# cached shot locations, key is scene key, value is a dict {shot pointer: (take index, shot index)}
+_shotLocations = dict()
+
+# version of the shots data, incremented each time the cached structures are invalidated
+_shotsDataVersion = 0
+
+
+class ShotsIntervalIndex:
+    """Frame-to-shot index of the shots of a take
+    Shots are not sorted in time in a take, and they can overlap. The returned values are
+    shot indices in the whole shot list of the take, so that they match what the former linear
+    scans were returning:
+        - containing: the lowest index of the shots containing the frame
+        - before: the highest index of the shots ending strictly before the frame
+        - after: the lowest index of the shots starting strictly after the frame
+    All the queries are in O(log n)
+    """
+
+    def __init__(self, starts, ends, enabled):
+        self.starts = list(starts)
+        self.ends = list(ends)
+        self.enabled = list(enabled)
+
+        # lookup tables for ignoreDisabled False and True, built on demand
+        self._lookups = dict()
+
+        self._prevEnabled = None
+        self._nextEnabled = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _getLookup(self, ignoreDisabled):
+        lookup = self._lookups.get(ignoreDisabled, None)
+        if lookup is None:
+            lookup = self._buildLookup(ignoreDisabled)
+            self._lookups[ignoreDisabled] = lookup
+        return lookup
+
+    def _buildLookup(self, ignoreDisabled):
+        indices = [i for i in range(len(self.starts)) if not ignoreDisabled or self.enabled[i]]
+
+        # containing: elementary segments [segStarts[k], segStarts[k+1]) and the lowest index
+        # of the shots covering each of them, found with a sweep line and a min-heap on the indices
+        segStarts = sorted(set([self.starts[i] for i in indices] + [self.ends[i] + 1 for i in indices]))
+        segShots = []
+        byStart = sorted(indices, key=lambda i: self.starts[i])
+        heap = []
+        s = 0
+        for frame in segStarts:
+            while s < len(byStart) and self.starts[byStart[s]] <= frame:
+                heapq.heappush(heap, byStart[s])
+                s += 1
+            while len(heap) and self.ends[heap[0]] < frame:
+                heapq.heappop(heap)
+            segShots.append(heap[0] if len(heap) else -1)
+
+        # before: shots sorted by end, with the running max of their indices
+        byEnd = sorted(indices, key=lambda i: self.ends[i])
+        sortedEnds = [self.ends[i] for i in byEnd]
+        prefixMaxInd = []
+        maxInd = -1
+        for i in byEnd:
+            maxInd = max(maxInd, i)
+            prefixMaxInd.append(maxInd)
+
+        # after: shots sorted by start, with the running min of their indices from the end
+        sortedStarts = [self.starts[i] for i in byStart]
+        suffixMinInd = [-1] * len(byStart)
+        minInd = len(self.starts)
+        for k in range(len(byStart) - 1, -1, -1):
+            minInd = min(minInd, byStart[k])
+            suffixMinInd[k] = minInd
+
+        return (segStarts, segShots, sortedEnds, prefixMaxInd, sortedStarts, suffixMinInd)
+
+    def getFirstShotIndexContainingFrame(self, frameIndex, ignoreDisabled=False):
+        """Return the index of the first shot containing the specifed frame, -1 if not found"""
+        segStarts, segShots = self._getLookup(ignoreDisabled)[0:2]
+        k = bisect_right(segStarts, frameIndex) - 1
+        if 0 > k:
+            return -1
+        return segShots[k]
+
+    def getFirstShotIndexBeforeFrame(self, frameIndex, ignoreDisabled=False):
+        """Return the index of the last shot of the list ending before the specifed frame, -1 if not found"""
+        sortedEnds, prefixMaxInd = self._getLookup(ignoreDisabled)[2:4]
+        k = bisect_left(sortedEnds, frameIndex)
+        if 0 == k:
+            return -1
+        return prefixMaxInd[k - 1]
+
+    def getFirstShotIndexAfterFrame(self, frameIndex, ignoreDisabled=False):
+        """Return the index of the first shot of the list starting after the specifed frame, -1 if not found"""
+        sortedStarts, suffixMinInd = self._getLookup(ignoreDisabled)[4:6]
+        k = bisect_right(sortedStarts, frameIndex)
+        if len(sortedStarts) <= k:
+            return -1
+        return suffixMinInd[k]
+
+    def _buildEnabledNeighbours(self):
+        numShots = len(self.enabled)
+        self._prevEnabled = [-1] * numShots
+        self._nextEnabled = [-1] * numShots
+        prevInd = -1
+        for i in range(numShots):
+            self._prevEnabled[i] = prevInd
+            if self.enabled[i]:
+                prevInd = i
+        nextInd = -1
+        for i in range(numShots - 1, -1, -1):
+            self._nextEnabled[i] = nextInd
+            if self.enabled[i]:
+                nextInd = i
+
+    def getPreviousEnabledShotIndex(self, shotIndex):
+        """Return the index of the enabled shot preceding shotIndex in the list, -1 if none"""
+        if self._prevEnabled is None:
+            self._buildEnabledNeighbours()
+        if not 0 <= shotIndex < len(self._prevEnabled):
+            return -1
+        return self._prevEnabled[shotIndex]
+
+    def getNextEnabledShotIndex(self, shotIndex):
+        """Return the index of the enabled shot following shotIndex in the list, -1 if none"""
+        if self._nextEnabled is None:
+            self._buildEnabledNeighbours()
+        if not 0 <= shotIndex < len(self._nextEnabled):
+            return -1
+        return self._nextEnabled[shotIndex]
+
+
+class ShotsEditTimeModel:
+    """Edit time model of the shots of a take, based on the cumulated durations of the shots
+    Two prefix sums are maintained, one with all the shots and one with the enabled shots only.
+    Edit times here are relative to the start of the take edit, starting at 0.
+    Conversions from 3D time to edit time are in O(1), from edit time to 3D time in O(log n)
+    """
+
+    def __init__(self, starts, ends, enabled):
+        self.starts = list(starts)
+        self.ends = list(ends)
+        self.enabled = list(enabled)
+
+        # editStarts[ignoreDisabled][i] is the edit start of the shot i,
+        # editStarts[ignoreDisabled][-1] is the edit duration
+        self._editStarts = dict()
+        # indices and edit starts of the shots included in the edit
+        self._includedShots = dict()
+        self._includedEditStarts = dict()
+        for ignoreDisabled in (False, True):
+            editStarts = [0] * (len(self.starts) + 1)
+            includedShots = []
+            cumulatedDuration = 0
+            for i in range(len(self.starts)):
+                editStarts[i] = cumulatedDuration
+                if not ignoreDisabled or self.enabled[i]:
+                    cumulatedDuration += self.ends[i] - self.starts[i] + 1
+                    includedShots.append(i)
+            editStarts[len(self.starts)] = cumulatedDuration
+            self._editStarts[ignoreDisabled] = editStarts
+            self._includedShots[ignoreDisabled] = includedShots
+            self._includedEditStarts[ignoreDisabled] = [editStarts[i] for i in includedShots]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def getEditDuration(self, ignoreDisabled=True):
+        """Return the edit duration in frames, -1 if there is no shot in the edit"""
+        if not len(self._includedShots[ignoreDisabled]):
+            return -1
+        return self._editStarts[ignoreDisabled][-1]
+
+    def getShotEditStart(self, shotIndex, ignoreDisabled=True):
+        """Return the edit time of the first frame of the specified shot, -1 if the shot is not in the edit"""
+        if not 0 <= shotIndex < len(self.starts) or (ignoreDisabled and not self.enabled[shotIndex]):
+            return -1
+        return self._editStarts[ignoreDisabled][shotIndex]
+
+    def getEditTime(self, shotIndex, frameIndexIn3DTime, ignoreDisabled=True):
+        """Return the edit time corresponding to the specified frame of the specified shot, -1 if the shot is not in the
+        edit or if the frame is out of the shot range
+        """
+        if not 0 <= shotIndex < len(self.starts) or (ignoreDisabled and not self.enabled[shotIndex]):
+            return -1
+        if not self.starts[shotIndex] <= frameIndexIn3DTime <= self.ends[shotIndex]:
+            return -1
+        return self._editStarts[ignoreDisabled][shotIndex] + frameIndexIn3DTime - self.starts[shotIndex]
+
+    def getShotIndexAndFrameFromEditTime(self, editTime, ignoreDisabled=True):
+        """Return the tuple (shot index, frame in 3D time) corresponding to the specified edit time, (-1, -1) if the
+        edit time is out of the edit
+        """
+        includedShots = self._includedShots[ignoreDisabled]
+        if not len(includedShots) or not 0 <= editTime < self._editStarts[ignoreDisabled][-1]:
+            return (-1, -1)
+
+        includedEditStarts = self._includedEditStarts[ignoreDisabled]
+        k = bisect_right(includedEditStarts, editTime) - 1
+        shotInd = includedShots[k]
+        return (shotInd, self.starts[shotInd] + editTime - includedEditStarts[k])
+
+
+def _getSceneKey(scene):
+    """Return the key of the scene in the caches
+    The address of the scene data is used rather than its name so that renaming a scene doesn't leave stale
+    entries under its old name. The caches are cleared on file load, undo and redo, when addresses can change
+    """
+    return scene.as_pointer() if scene is not None else 0
+
+
+def getShotsIntervalIndex(props, takeIndex=-1):
+    """Return the interval index of the shots of the specified take, built if not already in cache
+    Return None if the take is not valid
+    """
+    takeInd = (
+        props.getCurrentTakeIndex()
+        if -1 == takeIndex
+        else (takeIndex if 0 <= takeIndex and takeIndex < len(props.getTakes()) else -1)
+    )
+    if -1 == takeInd:
+        return None
+
+    shots = props.takes[takeInd].shots
+    key = (_getSceneKey(props.parentScene), takeInd)
+    index = _intervalIndices.get(key, None)
+
+    # number of shots checked as a safety net for collections modified without invalidation
+    if index is None or len(index) != len(shots):
+        index = ShotsIntervalIndex([sh.start for sh in shots], [sh.end for sh in shots], [sh.enabled for sh in shots])
+        _intervalIndices[key] = index
+        _logger.debug_ext(f"Shots interval index built for take {takeInd}: {len(shots)} shots", tag="SHOTS_INDEX")
+
+    return index
+
+
+def getShotsEditTimeModel(props, takeIndex=-1):
+    """Return the edit time model of the shots of the specified take, built if not already in cache
+    Return None if the take is not valid
+    """
+    takeInd = (
+        props.getCurrentTakeIndex()
+        if -1 == takeIndex
+        else (takeIndex if 0 <= takeIndex and takeIndex < len(props.getTakes()) else -1)
+    )
+    if -1 == takeInd:
+        return None
+
+    shots = props.takes[takeInd].shots
+    key = (_getSceneKey(props.parentScene), takeInd)
+    model = _editTimeModels.get(key, None)
+
+    # number of shots checked as a safety net for collections modified without invalidation
+    if model is None or len(model) != len(shots):
+        model = ShotsEditTimeModel([sh.start for sh in shots], [sh.end for sh in shots], [sh.enabled for sh in shots])
+        _editTimeModels[key] = model
+        _logger.debug_ext(f"Shots edit time model built for take {takeInd}: {len(shots)} shots", tag="SHOTS_INDEX")
+
+    return model
+
+
+def _buildShotLocations(props):
+    locations = dict()
+    for i, take in enumerate(props.takes):
+        for j, sh in enumerate(take.shots):
+            locations[sh.as_pointer()] = (i, j)
+    _logger.debug_ext(f"Shots locations built: {len(locations)} shots", tag="SHOTS_INDEX")
+    return locations
+
+
+def getShotLocation(props, shot):
+    """Return a tuple (take index, shot index) locating the shot in the takes of props, (-1, -1) if not found
+    Shots are identified by the address of their data, which is stable as long as the shots and takes
+    collections are not modified. The map is then rebuilt when the cached location doesn't match the shot
+    anymore, which makes it robust to collection changes done without invalidation.
+    """
+    if shot is None:
+        return (-1, -1)
+
+    def _isValidLocation(location):
+        if location is None:
+            return False
+        takeInd, shotInd = location
+        if not takeInd < len(props.takes) or not shotInd < len(props.takes[takeInd].shots):
+            return False
+        return props.takes[takeInd].shots[shotInd] == shot
+
+    sceneKey = _getSceneKey(props.parentScene)
+    shotKey = shot.as_pointer()
+    locations = _shotLocations.get(sceneKey, None)
+
+    if locations is not None:
+        location = locations.get(shotKey, None)
+        if _isValidLocation(location):
+            return location
+
+    locations = _buildShotLocations(props)
+    _shotLocations[sceneKey] = locations
+    location = locations.get(shotKey, None)
+    if _isValidLocation(location):
+        return location
+
+    return (-1, -1)
+
+
+def getShotsDataVersion():
+    """Return the version of the shots data, which changes each time shots are added, removed, reordered
+    or when their start, end, enabled state, name, color or camera change. Used by the UI to know when to rebuild
+    its own caches
+    """
+    return _shotsDataVersion
+
+
+def incrementShotsDataVersion():
+    """Change the version of the shots data without clearing the cached indices
+    To be called when the name, color or camera of a shot change"""
+    global _shotsDataVersion
+    _shotsDataVersion += 1
+
+
+def invalidateShotsStructure(scene=None):
+    """Clear all the cached data about the shots of the specified scene, of all the scenes if scene is None
+    To be called when shots or takes are added, removed, copied or reordered
+    """
+    if scene is None:
+        _shotLocations.clear()
+    else:
+        _shotLocations.pop(_getSceneKey(scene), None)
+    invalidateShotsTimeIndex(scene)
+
+
+def invalidateShotsTimeIndex(scene=None):
+    """Clear the cached shot indices and edit time models of all the takes of the specified scene,
+    of all the scenes if scene is None
+    To be called when the start, end or enabled state of a shot change
+    """
+    global _shotsDataVersion
+    _shotsDataVersion += 1
+
+    for cache in (_intervalIndices, _editTimeModels):
+        if scene is None:
+            cache.clear()
+        else:
+            sceneKey = _getSceneKey(scene)
+            for key in [k for k in cache if k[0] == sceneKey]:
+                del cache[key]
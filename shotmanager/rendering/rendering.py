@@ -31,9 +31,17 @@ import bpy
 
 from shotmanager.rendering.rendering_stampinfo import setStampInfoSettings, renderStampedInfoForShot
 from shotmanager.rendering import rendering_functions
+from shotmanager.rendering import rendering_fingerprint
+from shotmanager.rendering.rendering_pipeline import ShotPostProcessingPipeline
+from shotmanager.rendering import rendering_manifest
+from shotmanager.rendering import rendering_stats
+from shotmanager.rendering.rendering_intermediates import IntermediateFilesManager, deleteFile
+from shotmanager.rendering.rendering_audio import TakeAudioMixdown
+from shotmanager.rendering.rendering_farm import launchRenderWithVSECompositeInFarm
 
 from shotmanager.utils import utils
 from shotmanager.utils import utils_editors_3dview
+from shotmanager.utils import utils_ffmpeg
 from shotmanager.utils.utils_shot_manager import getStampInfo
 from shotmanager.utils import utils_store_context as utilsStore
 from shotmanager.utils.utils_os import module_can_be_imported, format_path_for_os, is_admin
@@ -44,6 +52,20 @@ from shotmanager.config import sm_logging
 _logger = sm_logging.getLogger(__name__)
 
 
+def _getPipelineJobDoneCallback(renderManifest, renderStats):
+    """Return the function recording in the manifest and in the render statistics the stages done by a
+    post-processing job of the pipeline"""
+
+    def onJobDone(job):
+        renderStats.addStageTime(job["shotName"], "postProcessing", job["postProcessingTime"])
+        renderStats.addWrittenFiles([job["outputFilePath"]], shotName=job["shotName"])
+        if renderManifest is not None:
+            renderManifest.setStageDone(job["shotName"], "stamp")
+            renderManifest.setStageDone(job["shotName"], "composite", files=[job["outputFilePath"]])
+
+    return onJobDone
+
+
 def launchRenderWithVSEComposite(
     context,
     renderPreset=None,
@@ -61,6 +83,9 @@ def launchRenderWithVSEComposite(
     area=None,
     override_all_viewports=False,
     fileListOnly=False,
+    manifestFilePath=None,
+    compositingBackend=None,
+    renderStatsSuffix="",
 ):
     """Generate the media for the specified takes
     Return a dictionary with a list of all the created files and a list of failed ones.
@@ -69,34 +94,17 @@ def launchRenderWithVSEComposite(
 
     Args:
         filesDict (dict)= {"rendered_files": newMediaFiles, "failed_files": failedFiles}
+        manifestFilePath: path of the render job manifest, used to resume the rendering if it is interrupted.
+            If None the manifest is written in the root folder of the rendering
+        compositingBackend: "VSE" or "FFMPEG", overrides the compositing backend of the render preset when specified
+        renderStatsSuffix: added to the name of the exported render statistics files, to get distinct files for the
+            renderings running in parallel
         specificFrame (int): When specified, only this frame is rendered. Handles are ignored and the resulting media in an image, not a video
         fileListOnly (bool):    When set to True, no rendering nor change in the scene are done, the function just
                                 returns the list of the files to generate
     """
 
-    def _deleteTempFiles(dirPath):
-        # delete unsused rendered frames
-        if config.devDebug:
-            _logger.debug_ext(f"Cleaning shot temp dir: {dirPath}")
-
-        if os.path.exists(dirPath):
-            _logger.info_ext(f"Deleting shot temp folder: {dirPath}\n", col="PINK")
-            files_in_directory = os.listdir(dirPath)
-            # filtered_files = [file for file in files_in_directory if file.endswith(".png") or file.endswith(".wav")]
-            filtered_files = [file for file in files_in_directory]
-
-            for file in filtered_files:
-                path_to_file = os.path.join(dirPath, file)
-                try:
-                    os.remove(path_to_file)
-                except Exception:
-                    _logger.exception(f"*** File locked (by system?): {path_to_file}")
-                    print(f"\n*** File locked (by system?): {path_to_file}")
-            try:
-                os.rmdir(dirPath)
-            except Exception:
-                _logger.error_ext(f"Cannot delete folder: {dirPath}")
-
+    def _deleteTempScenes():
         if config.devDebug:
             _logger.debug_ext("Cleaning temp scenes")
 
@@ -119,6 +127,9 @@ def launchRenderWithVSEComposite(
     colorRenderTimes = "CYAN"
 
     renderMode = "PROJECT" if renderPreset is None else renderPreset.renderMode
+    if compositingBackend is None:
+        compositingBackend = "VSE" if renderPreset is None else renderPreset.compositingBackend
+    concatWithoutReencoding = renderPreset is not None and renderPreset.concatWithoutReencoding
     playblastSuffix = "_PLAYBLAST" if "PLAYBLAST" == renderMode else ""
     renderInfo = dict()
     preset_useStampInfo = useStampInfoForRendering(context, renderPreset)
@@ -382,12 +393,99 @@ def launchRenderWithVSEComposite(
     # currentTakeRenderTime = previousTakeRenderTime
 
     startRenderTime = time.monotonic()
-    allRenderTimes = dict()
+    renderStats = rendering_stats.RenderStats(
+        takeName,
+        jobInfo={
+            "blendFile": bpy.data.filepath,
+            "scene": scene.name,
+            "renderMode": renderMode,
+            "renderHandles": renderHandles,
+            "resolution": [scene.render.resolution_x, scene.render.resolution_y],
+            "addonVersion": props.version()[0] if props.version() is not None else None,
+        },
+    )
 
     startFrameIn3D = -1
     startFrameInEdit = -1
     startShot = None
 
+    # the folders of intermediate files of the rendered shots are deleted in the background
+    intermediatesManager = IntermediateFilesManager(
+        maxDiskUsage=prefs.intermediateFilesMaxDiskUsage * 1024 * 1024,
+        backgroundDeletion=prefs.intermediateFilesBackgroundDeletion,
+    )
+
+    # the sound of the shots is extracted from a single mixdown of the take, done when the first shot needs it
+    takeAudioMixdown = None
+    takeAudioDir = None
+    useTakeAudioMixdown = (
+        renderPreset is not None
+        and renderPreset.mixdownAudioPerTake
+        and renderSound
+        and specificFrame is None
+        and not fileListOnly
+        and len(shotList)
+    )
+    if useTakeAudioMixdown and props.useBGSounds:
+        # only the background sound of the current shot is unmuted, so each shot needs its own mixdown
+        _logger.debug_ext("Take audio mixdown disabled: shots background sounds are used", col="YELLOW")
+        useTakeAudioMixdown = False
+    if useTakeAudioMixdown:
+        mixdownHandles = handles if renderHandles else 0
+        takeAudioDir = str(
+            Path(props.getOutputMediaPath("TK_VIDEO", take, rootPath=rootPath)).parent / "_TakeAudio_Intermediate"
+        )
+        takeAudioMixdown = TakeAudioMixdown(
+            str(Path(takeAudioDir) / f"{takeName}_TakeAudio.wav"),
+            min([shot.start for shot in shotList]) - mixdownHandles,
+            max([shot.end for shot in shotList]) + mixdownHandles,
+            utils.getSceneEffectiveFps(scene),
+        )
+
+    # progress of the rendering, used to resume it if it is interrupted
+    renderManifest = None
+    if not fileListOnly and specificFrame is None and renderPreset is not None and renderPreset.resumeRender:
+        renderManifest = rendering_manifest.RenderJobManifest(
+            manifestFilePath
+            if manifestFilePath is not None
+            else rendering_manifest.getRenderManifestFilePath(rootPath, takeName),
+            resume=True,
+            jobInfo={
+                "blendFile": bpy.data.filepath,
+                "scene": scene.name,
+                "take": takeName,
+                "renderMode": renderMode,
+                "renderHandles": renderHandles,
+            },
+        )
+
+    # the Stamp Info images and the video of a shot are generated in a background thread while the next
+    # shot is rendered
+    shotsPipeline = None
+    if (
+        "FFMPEG" == compositingBackend
+        and renderPreset.usePipelinedRendering
+        and not fileListOnly
+        and generateShotVideos
+        and specificFrame is None
+        and "VIDEO" == renderPreset.outputMediaMode
+    ):
+        ffmpegPath = utils_ffmpeg.getFFmpegPath()
+        if ffmpegPath is None:
+            _logger.warning_ext("Pipelined rendering: FFmpeg not found, the shot videos are generated sequentially")
+        else:
+            shotsPipeline = ShotPostProcessingPipeline(maxPendingShots=prefs.renderPipeline_maxPendingShots)
+
+            deleteShotTempFiles = True
+            if props.use_project_settings:
+                if renderPreset.bypass_rendering_project_settings and renderPreset.keepIntermediateFiles:
+                    deleteShotTempFiles = False
+            else:
+                deleteShotTempFiles = not renderPreset.keepIntermediateFiles
+            if deleteShotTempFiles and config.devDebug and config.devDebug_keepVSEContent:
+                deleteShotTempFiles = False
+
+    failedFiles = []
     for i, shot in enumerate(shotList):
         if 0 == i:
             startFrameIn3D = shot.start
@@ -412,9 +510,34 @@ def launchRenderWithVSEComposite(
         if shot.enabled:
             sequenceFiles.append(compositedMediaPath)
 
-        if not rerenderExistingShotVideos:
-            if Path(compositedMediaPath).exists():
-                print(f" - File {Path(compositedMediaPath).name} already computed")
+        # the fingerprint is written next to each generated shot video, so that the next renderings can skip the
+        # shots which content didn't change
+        shotFingerprint = None
+        if not rerenderExistingShotVideos or (not fileListOnly and specificFrame is None):
+            shotFingerprint = rendering_fingerprint.computeShotFingerprint(
+                scene,
+                shot,
+                renderPreset,
+                handles if renderHandles else 0,
+                stampInfoSettings=stampInfoSettings if preset_useStampInfo else None,
+            )
+
+        # only the shots which content changed since their last rendering are rendered again
+        if not rerenderExistingShotVideos and Path(compositedMediaPath).exists():
+            previousFingerprint = rendering_fingerprint.readShotFingerprint(compositedMediaPath)
+            if previousFingerprint is None:
+                print(f" - File {Path(compositedMediaPath).name} already computed, without fingerprint")
+                continue
+            if shotFingerprint == previousFingerprint:
+                print(f" - File {Path(compositedMediaPath).name} already computed and up to date")
+                continue
+            print(f" - File {Path(compositedMediaPath).name} already computed but shot content changed")
+
+        if renderManifest is not None:
+            shotHandles = handles if renderHandles else 0
+            renderManifest.startShot(shot.name, shot.start - shotHandles, shot.end + shotHandles)
+            if generateShotVideos and renderManifest.isStageDone(shot.name, "composite"):
+                print(f" - File {Path(compositedMediaPath).name} already rendered by the interrupted render job")
                 continue
 
         if not fileListOnly:
@@ -447,14 +570,19 @@ def launchRenderWithVSEComposite(
 
             _logger.info_ext(infoStr, col="GREEN")
 
-            # if False:  # debug
-            _deleteTempFiles(newTempRenderPath)
+            # the intermediate files of an interrupted rendering of the shot are kept to be resumed
+            intermediatesManager.enforceQuota()
+            if renderManifest is None or not renderManifest.hasProgress(shot.name):
+                intermediatesManager.clearDir(newTempRenderPath)
+            _deleteTempScenes()
+            renderStats.addTempDir(newTempRenderPath)
 
             # wkip if bg sounds used
             #  props.enableBGSoundForShot()
 
             # set scene as current
-            context.window.scene = scene
+            if context.window is not None:  # case where Blender is running in background
+                context.window.scene = scene
 
             # NOTE: inside setCurrentShot there is a call to updateStoryboardFramesDisplay, but not forced
             props.setCurrentShot(shot)
@@ -465,10 +593,9 @@ def launchRenderWithVSEComposite(
             if override_all_viewports:
                 for area in context.screen.areas:
                     utils.setCurrentCameraToViewport2(context, area)
-            else:
+            elif context.screen is not None:  # case where Blender is running in background
                 utils.setCurrentCameraToViewport2(context, viewportArea)
 
-            numFramesInShot = scene.frame_end - scene.frame_start + 1
             previousFrameRenderTime = time.monotonic()
             currentFrameRenderTime = previousFrameRenderTime
 
@@ -490,54 +617,89 @@ def launchRenderWithVSEComposite(
 
             renderShotContent = True
             if renderShotContent and not fileListOnly:
+                startImagesRenderTime = time.monotonic()
+                shotRangeStart, shotRangeEnd = scene.frame_start, scene.frame_end
 
-                if renderFrameByFrame:
-                    for f, currentFrame in enumerate(range(scene.frame_start, scene.frame_end + 1)):
-                        # scene.frame_current = currentFrame
-                        scene.frame_set(currentFrame)
-
-                        # scene.render.filepath = shot.getOutputMediaPath(
-                        #     rootPath=rootPath, insertTempFolder=True, specificFrame=scene.frame_current
-                        # )
-                        scene.render.filepath = shot.getOutputMediaPath(
-                            "SH_INTERM_IMAGE_SEQ" + playblastSuffix,
-                            rootPath=rootPath,
-                            specificFrame=scene.frame_current,
-                        )
-
-                        print("      \n")
-                        textInfo = f"Frame: {currentFrame}  ( {f + 1} / {numFramesInShot} )"
-                        textInfo02 = f"Shot: {shot.name}"
-                        print("      ------------------------------------------")
-                        print("      \n" + textInfo + "  -  " + textInfo02)
+                # the frames rendered in animation mode are marked as done as soon as their image is written
+                def _setFrameDone(frame, frameTime):
+                    if renderManifest is not None:
+                        renderManifest.setFramesDone(shot.name, frame, frame, throttled=True)
 
-                        if "PLAYBLAST" == renderMode:
-                            if renderPreset.stampRenderInfo and not preset_useStampInfo:
-                                scene.render.use_stamp_frame = False
-                                scene.render.use_stamp_note = True
-                                scene.render.stamp_note_text += textInfo02 + "\\n" + textInfo
-
-                        if renderWithOpengl:
-                            #     _logger.debug("ici loop playblast")
+                # frames already rendered by an interrupted rendering are skipped
+                genericFramePath = shot.getOutputMediaPath(
+                    "SH_INTERM_IMAGE_SEQ" + playblastSuffix, rootPath=rootPath, genericFrame=True
+                )
+                frameRangesToRender = [(shotRangeStart, shotRangeEnd)]
+                if renderManifest is not None:
+                    framesToRender = renderManifest.getFramesToRender(
+                        shot.name,
+                        shotRangeStart,
+                        shotRangeEnd,
+                        lambda frame: rendering_manifest.getImageSequenceFilePath(genericFramePath, frame),
+                    )
+                    frameRangesToRender = rendering_manifest.getContiguousFrameRanges(framesToRender)
 
-                            bpy.ops.render.opengl(animation=False, write_still=True)
+                if renderFrameByFrame:
+                    # the frames are rendered one by one, or by chunks of contiguous frames in animation mode
+                    chunkSize = max(1, props.renderContext.renderFrameChunkSize)
 
+                    # output paths are computed once per shot
+                    genericChunkPath = shot.getOutputMediaPath(
+                        "SH_INTERM_IMAGE_SEQ" + playblastSuffix,
+                        rootPath=rootPath,
+                        provideExtension=False,
+                        genericFrame=True,
+                    )
+                    framePadding = props.getFramePadding()
+                    pathHead, _, pathTail = genericFramePath.rpartition(framePadding)
+                    framePaths = [
+                        pathHead + str(frame).rjust(len(framePadding), "0") + pathTail
+                        for frame in range(shotRangeStart, shotRangeEnd + 1)
+                    ]
+
+                    chunks = [
+                        (chunkStart, min(chunkStart + chunkSize - 1, rangeEnd))
+                        for rangeStart, rangeEnd in frameRangesToRender
+                        for chunkStart in range(rangeStart, rangeEnd + 1, chunkSize)
+                    ]
+                    for chunkStart, chunkEnd in chunks:
+                        measuredFrameTimes = None
+
+                        if 1 == chunkSize:
+                            scene.frame_set(chunkStart)
+                            scene.render.filepath = framePaths[chunkStart - shotRangeStart]
+                            if renderWithOpengl:
+                                bpy.ops.render.opengl(animation=False, write_still=True)
+                            else:
+                                bpy.ops.render.render(animation=False, write_still=True)
                         else:
-                            #     _logger.debug("ici loop pas playblast")
-                            bpy.ops.render.render(animation=False, write_still=True)
-                            # bpy.ops.render.render(animation=False, write_still=True)
-
-                            currentFrameRenderTime = time.monotonic()
-                            print(
-                                f"      \nFrame render time: {(currentFrameRenderTime - previousFrameRenderTime):0.2f} sec."
-                            )
-                            previousFrameRenderTime = currentFrameRenderTime
-
-                        # currentFrameRenderTime = time.monotonic()
-                        # print(
-                        #     f"      \nFrame render time: {(currentFrameRenderTime - previousFrameRenderTime):0.2f} sec."
-                        # )
-                        # previousFrameRenderTime = currentFrameRenderTime
+                            scene.frame_start = chunkStart
+                            scene.frame_end = chunkEnd
+                            scene.render.filepath = genericChunkPath
+                            framesMonitor = rendering_functions.RenderedFramesMonitor(onFrameWritten=_setFrameDone)
+                            with framesMonitor:
+                                if renderWithOpengl:
+                                    bpy.ops.render.opengl(animation=True, write_still=False)
+                                else:
+                                    bpy.ops.render.render(animation=True, write_still=False)
+                            measuredFrameTimes = framesMonitor.frameTimes
+
+                        currentFrameRenderTime = time.monotonic()
+                        print(
+                            f"      Shot: {shot.name}, frames {chunkStart} - {chunkEnd} / {shotRangeEnd}:"
+                            f" {(currentFrameRenderTime - previousFrameRenderTime):0.2f} sec."
+                        )
+                        renderStats.addFramesTime(
+                            shot.name,
+                            chunkStart,
+                            chunkEnd,
+                            currentFrameRenderTime - previousFrameRenderTime,
+                            measuredFrameTimes=measuredFrameTimes,
+                        )
+                        previousFrameRenderTime = currentFrameRenderTime
+
+                        if renderManifest is not None:
+                            renderManifest.setFramesDone(shot.name, chunkStart, chunkEnd)
 
                 # render all in one anim pass
                 else:
@@ -557,17 +719,50 @@ def launchRenderWithVSEComposite(
                         scene.render.use_stamp_note = True
                         scene.render.stamp_note_text = textInfo02
 
-                    if renderWithOpengl:
-                        #    _logger.debug("ici PAS loop Playblast opengl")
-                        # print(f"scene.frame_start: {scene.frame_start}")
-                        # print(f"scene.frame_end: {scene.frame_end}")
-
-                        bpy.ops.render.opengl(animation=True, write_still=False)
-
-                    # _logger.debug("Render Opengl done")
-                    else:
-                        # _logger.debug("ici PAS loop pas playblast")
-                        bpy.ops.render.render(animation=True, write_still=False)
+                    for rangeStart, rangeEnd in frameRangesToRender:
+                        startRangeRenderTime = time.monotonic()
+                        scene.frame_start = rangeStart
+                        scene.frame_end = rangeEnd
+                        # the render time of each frame is measured by the render handlers
+                        framesMonitor = rendering_functions.RenderedFramesMonitor(onFrameWritten=_setFrameDone)
+                        with framesMonitor:
+                            if renderWithOpengl:
+                                #    _logger.debug("ici PAS loop Playblast opengl")
+                                # print(f"scene.frame_start: {scene.frame_start}")
+                                # print(f"scene.frame_end: {scene.frame_end}")
+
+                                bpy.ops.render.opengl(animation=True, write_still=False)
+
+                            # _logger.debug("Render Opengl done")
+                            else:
+                                # _logger.debug("ici PAS loop pas playblast")
+                                bpy.ops.render.render(animation=True, write_still=False)
+
+                        renderStats.addFramesTime(
+                            shot.name,
+                            rangeStart,
+                            rangeEnd,
+                            time.monotonic() - startRangeRenderTime,
+                            measuredFrameTimes=framesMonitor.frameTimes,
+                        )
+                        if renderManifest is not None:
+                            renderManifest.setFramesDone(shot.name, rangeStart, rangeEnd)
+
+                scene.frame_start = shotRangeStart
+                scene.frame_end = shotRangeEnd
+                imagesRenderTime = time.monotonic() - startImagesRenderTime
+                renderStats.addStageTime(shot.name, "images", imagesRenderTime)
+                renderStats.addWrittenFiles(
+                    [
+                        rendering_manifest.getImageSequenceFilePath(genericFramePath, frame)
+                        for rangeStart, rangeEnd in frameRangesToRender
+                        for frame in range(rangeStart, rangeEnd + 1)
+                    ],
+                    shotName=shot.name,
+                )
+                renderStats.sampleTempDiskUsage()
+                if renderManifest is not None:
+                    renderManifest.setStageDone(shot.name, "images", duration=imagesRenderTime)
 
             renderedImgSeq_resolution = renderResolution
 
@@ -576,6 +771,7 @@ def launchRenderWithVSEComposite(
             #######################
             infoImgSeq = None
             infoImgSeq_resolution = renderedImgSeq_resolution
+            stampFrames = []
             if preset_useStampInfo:
                 # returns "#####" if specificFrame is None, a formated frame otherwise
                 # frameIndStr = props.getFramePadding(frame=specificFrame)
@@ -589,21 +785,41 @@ def launchRenderWithVSEComposite(
                 )
                 infoImgSeq_resolution = renderResolutionFramed
 
-                renderStampedInfoForShot(
-                    stampInfoSettings,
-                    props,
-                    take,
-                    shot,
-                    rootPath,
-                    newTempRenderPath,
-                    renderResolution,
-                    infoImgSeq_resolution,
-                    handles,
-                    render_handles=renderHandles,
-                    specificFrame=specificFrame,
-                    stampInfoCustomSettingsDict=stampInfoCustomSettingsDict,
-                    verbose=True,
+                # in pipelined rendering the stamp stage is done by the post-processing job of the shot
+                stampStageDone = (
+                    renderManifest is not None
+                    and shotsPipeline is None
+                    and renderManifest.isStageDone(shot.name, "stamp")
                 )
+                if not stampStageDone:
+                    startStampRenderTime = time.monotonic()
+                    stampFrames = renderStampedInfoForShot(
+                        stampInfoSettings,
+                        props,
+                        take,
+                        shot,
+                        rootPath,
+                        newTempRenderPath,
+                        renderResolution,
+                        infoImgSeq_resolution,
+                        handles,
+                        render_handles=renderHandles,
+                        specificFrame=specificFrame,
+                        stampInfoCustomSettingsDict=stampInfoCustomSettingsDict,
+                        collectFramesOnly=shotsPipeline is not None,
+                        verbose=True,
+                    )
+                    if shotsPipeline is None:
+                        stampRenderTime = time.monotonic() - startStampRenderTime
+                        stampFiles = [
+                            rendering_manifest.getImageSequenceFilePath(infoImgSeq, frame)
+                            for frame in range(scene.frame_start, scene.frame_end + 1)
+                        ]
+                        renderStats.addStageTime(shot.name, "stamp", stampRenderTime)
+                        renderStats.addWrittenFiles(stampFiles, shotName=shot.name)
+                        renderStats.sampleTempDiskUsage()
+                        if renderManifest is not None:
+                            renderManifest.setStageDone(shot.name, "stamp", duration=stampRenderTime, files=stampFiles)
 
             # print render time
             #######################
@@ -616,13 +832,12 @@ def launchRenderWithVSEComposite(
                 col=colorRenderTimes,
             )
 
-            allRenderTimes[shot.name + "_" + "images"] = deltaTime
-
             #######################
             # render sound
             #######################
 
             audioFilePath = None
+            audioStageDone = False
             if specificFrame is None and renderSound:
                 # render sound
                 # audioFilePath = (
@@ -637,16 +852,13 @@ def launchRenderWithVSEComposite(
                     + ".wav"
                 )
                 _logger.debug(f"\n Sound for shot {shot.name}:  {audioFilePath}")
+                audioStageDone = renderManifest is not None and renderManifest.isStageDone(shot.name, "audio")
 
+            if audioFilePath is not None and not audioStageDone:
+                startAudioRenderTime = time.monotonic()
                 if Path(audioFilePath).exists():
                     print(" *** Sound file still exists... Should have been deleted ***")
-                    try:
-                        os.remove(audioFilePath)
-                        if Path(audioFilePath).exists():
-                            print(f"\n*** File locked (by system?): {audioFilePath}")
-                    except Exception:
-                        _logger.exception(f"\n*** File locked (by system?): {audioFilePath}")
-                        print(f"\n*** Exception : File locked (by system?): {audioFilePath}")
+                    if not deleteFile(audioFilePath):
                         audioFilePath = (
                             str(Path(audioFilePath).parent)
                             + "/"
@@ -667,8 +879,21 @@ def launchRenderWithVSEComposite(
                 # scene.frame_end = 50
                 # bpy.ops.render.opengl(animation=True, write_still=False)
                 # https://blenderartists.org/t/scripterror-mixdown-operstor/548056/4
-                bpy.ops.sound.mixdown(filepath=audioFilePath, relative_path=False, container="WAV", codec="PCM")
+                audioExtracted = False
+                if takeAudioMixdown is not None:
+                    if not takeAudioMixdown.mixedDown:
+                        takeAudioMixdown.mixdown(scene)
+                    audioExtracted = takeAudioMixdown.extractShotAudio(
+                        audioFilePath, scene.frame_start, scene.frame_end
+                    )
+                if not audioExtracted:
+                    bpy.ops.sound.mixdown(filepath=audioFilePath, relative_path=False, container="WAV", codec="PCM")
                 # bpy.ops.sound.mixdown(filepath=audioFilePath, relative_path=False, container="MP3", codec="MP3")
+                audioRenderTime = time.monotonic() - startAudioRenderTime
+                renderStats.addStageTime(shot.name, "audio", audioRenderTime)
+                renderStats.addWrittenFiles([audioFilePath], shotName=shot.name)
+                if renderManifest is not None:
+                    renderManifest.setStageDone(shot.name, "audio", duration=audioRenderTime, files=[audioFilePath])
 
             # renderedImgSeq = newTempRenderPath + shot.getOutputMediaPath(providePath=False, genericFrame=True)
 
@@ -677,7 +902,37 @@ def launchRenderWithVSEComposite(
                 "SH_IMAGE_SEQ" + playblastSuffix, providePath=False, genericFrame=True
             )
 
-            if generateShotVideos:
+            if generateShotVideos and shotsPipeline is not None:
+
+                #######################
+                # Generate shot video in the background
+                #######################
+
+                # the intermediate image sequences are numbered from the first rendered frame of the scene
+                shotsPipeline.submit(
+                    {
+                        "shotName": shot.name,
+                        "ffmpegPath": ffmpegPath,
+                        "outputFilePath": compositedMediaPath,
+                        "fps": projectFps,
+                        "outputResolution": list(infoImgSeq_resolution),
+                        "startFrame": scene.frame_start,
+                        "numFrames": scene.frame_end - scene.frame_start + 1,
+                        "handles": handles if renderHandles else 0,
+                        "bgSequencePath": renderedImgSeq,
+                        "overSequencePath": infoImgSeq,
+                        "audioFilePath": audioFilePath,
+                        "stampFrames": stampFrames,
+                        "stampRenderResolution": list(infoImgSeq_resolution),
+                        "stampInnerHeight": renderResolution[1],
+                        "stampNumProcesses": prefs.stampInfo_numProcesses,
+                        "fingerprint": shotFingerprint,
+                        "tempDirToDelete": newTempRenderPath if deleteShotTempFiles else None,
+                    },
+                    onDone=_getPipelineJobDoneCallback(renderManifest, renderStats),
+                )
+
+            elif generateShotVideos:
 
                 #######################
                 # Generate shot video
@@ -685,6 +940,7 @@ def launchRenderWithVSEComposite(
 
                 # use vse_render to store all the elements to composite
 
+                startCompositeTime = time.monotonic()
                 vse_render.clearMedia()
                 if specificFrame is None:
                     vse_render.inputBGMediaPath = renderedImgSeq
@@ -738,7 +994,7 @@ def launchRenderWithVSEComposite(
                     if renderHandles:
                         video_frame_end += 2 * handles
 
-                    vse_render.compositeVideoInVSE(
+                    compositeDone = vse_render.compositeVideoInVSE(
                         projectFps,
                         video_frame_start,
                         video_frame_end,
@@ -751,9 +1007,11 @@ def launchRenderWithVSEComposite(
                         output_media_mode=renderPreset.outputMediaMode,
                         importAtFrame=video_frame_start,
                         frame_padding=padding,
+                        backend=compositingBackend,
+                        handles=handles if renderHandles else 0,
                     )
                 else:
-                    vse_render.compositeVideoInVSE(
+                    compositeDone = vse_render.compositeVideoInVSE(
                         projectFps,
                         specificFrame,
                         specificFrame,
@@ -765,8 +1023,23 @@ def launchRenderWithVSEComposite(
                         output_media_mode=renderPreset.outputMediaMode,
                         importAtFrame=0,
                         frame_padding=padding,
+                        backend=compositingBackend,
                     )
 
+                compositeTime = time.monotonic() - startCompositeTime
+                renderStats.addStageTime(shot.name, "composite", compositeTime)
+                renderStats.sampleTempDiskUsage()
+                if compositeDone:
+                    if shotFingerprint is not None:
+                        rendering_fingerprint.writeShotFingerprint(compositedMediaPath, shotFingerprint)
+                    renderStats.addWrittenFiles([compositedMediaPath], shotName=shot.name)
+                    if renderManifest is not None:
+                        renderManifest.setStageDone(
+                            shot.name, "composite", duration=compositeTime, files=[compositedMediaPath]
+                        )
+                else:
+                    failedFiles.append(compositedMediaPath)
+
                 # bpy.ops.render.render("INVOKE_DEFAULT", animation=False, write_still=True)
                 # bpy.ops.render.render('INVOKE_DEFAULT', animation = True)
                 # bpy.ops.render.opengl ( animation = True )
@@ -782,8 +1055,9 @@ def launchRenderWithVSEComposite(
                     deleteTempFiles = False
 
                 # deleteTempFiles = not config.devDebug_keepVSEContent and not renderPreset.keepIntermediateFiles
+                intermediatesManager.release(newTempRenderPath, keep=not deleteTempFiles)
                 if deleteTempFiles:
-                    _deleteTempFiles(newTempRenderPath)
+                    _deleteTempScenes()
 
             else:
                 #######################
@@ -820,10 +1094,17 @@ def launchRenderWithVSEComposite(
                 col=colorRenderTimes,
             )
 
-            allRenderTimes[shot.name + "_" + "full"] = deltaTime
+            renderStats.addStageTime(shot.name, "total", deltaTime)
 
             _logger.info_ext("\n----------------------------------------------------", col="GREEN")
 
+    if shotsPipeline is not None:
+        _logger.info_ext("Pipelined rendering: Waiting for the post-processing of the last shots...")
+        failedFiles.extend(shotsPipeline.finish()[1])
+
+    # the shot videos are listed before being generated
+    newMediaFiles = [mediaFile for mediaFile in newMediaFiles if mediaFile not in failedFiles]
+
     #######################
     # render sequence video
     #######################
@@ -835,7 +1116,7 @@ def launchRenderWithVSEComposite(
         display=displayRenderTimes,
         col=colorRenderTimes,
     )
-    allRenderTimes["AllShots"] = deltaTime
+    renderStats.setTotalTime("AllShots", deltaTime)
 
     startSequenceRenderTime = time.monotonic()
     sequenceOutputFullPath = ""
@@ -862,10 +1143,17 @@ def launchRenderWithVSEComposite(
 
             _logger.info_ext(f"  Rendered sequence from shot videos: {sequenceOutputFullPath}")
 
-            if not fileListOnly:
+            if len(failedFiles):
+                _logger.error_ext("Some shot videos failed to be generated, the sequence video is not generated")
+            elif not fileListOnly:
                 # print(f"sequenceFiles: {sequenceFiles}")
                 vse_render.buildSequenceVideoFromMedia(
-                    sequenceOutputFullPath, handles, projectFps, mediaFiles=sequenceFiles
+                    sequenceOutputFullPath,
+                    handles,
+                    projectFps,
+                    mediaFiles=sequenceFiles,
+                    backend=compositingBackend,
+                    concatWithoutReencoding=concatWithoutReencoding,
                 )
 
                 # currentTakeRenderTime = time.monotonic()
@@ -895,7 +1183,11 @@ def launchRenderWithVSEComposite(
 
             if len(renderedShotSequencesArr):
                 vse_render.buildSequenceVideoFromMedia(
-                    sequenceOutputFullPath, handles, projectFps, mediaDictArr=renderedShotSequencesArr
+                    sequenceOutputFullPath,
+                    handles,
+                    projectFps,
+                    mediaDictArr=renderedShotSequencesArr,
+                    backend=compositingBackend,
                 )
 
             deleteTempFiles = True
@@ -910,10 +1202,13 @@ def launchRenderWithVSEComposite(
 
             # deleteTempFiles = not config.devDebug_keepVSEContent and not renderPreset.keepIntermediateFiles
             # deleteTempFiles = False
+            # _deleteTempFiles(newTempRenderPath)
+            for i in range(len(renderedShotSequencesArr)):
+                intermediatesManager.release(
+                    str(Path(renderedShotSequencesArr[i]["bg"]).parent), keep=not deleteTempFiles
+                )
             if deleteTempFiles:
-                # _deleteTempFiles(newTempRenderPath)
-                for i in range(len(renderedShotSequencesArr)):
-                    _deleteTempFiles(str(Path(renderedShotSequencesArr[i]["bg"]).parent))
+                _deleteTempScenes()
 
         renderInfo["scene"] = scene.name
         renderInfo["outputFullPath"] = sequenceOutputFullPath
@@ -926,7 +1221,8 @@ def launchRenderWithVSEComposite(
         renderInfo["renderSound"] = renderSound
 
         deltaTime = time.monotonic() - startSequenceRenderTime
-        allRenderTimes["SequenceVideo"] = deltaTime
+        renderStats.setTotalTime("SequenceVideo", deltaTime)
+        renderStats.addWrittenFiles([sequenceOutputFullPath])
     else:
         # set the shot from the Animation rendering as the output sequence so that it can be opened
         # in a player
@@ -940,7 +1236,6 @@ def launchRenderWithVSEComposite(
     # startFrameIn3D = -1
     # startFrameInEdit = -1
 
-    failedFiles = []
     filesDict = {
         "rendered_files": newMediaFiles,
         "failed_files": failedFiles,
@@ -951,12 +1246,34 @@ def launchRenderWithVSEComposite(
         filesDict["playblastInfos"] = renderInfo
 
     deltaTime = time.monotonic() - startRenderTime
-    allRenderTimes["Sequence and shots"] = deltaTime
+    renderStats.setTotalTime("Sequence and shots", deltaTime)
+
+    if takeAudioDir is not None:
+        intermediatesManager.release(takeAudioDir)
+    intermediatesManager.finish()
+
+    # the rendering of the take is complete, there is nothing to resume anymore
+    if renderManifest is not None and not len(failedFiles):
+        renderManifest.delete()
+
+    # the statistics files are not media, they are not added to the rendered files
+    if not fileListOnly and renderPreset is not None and renderPreset.exportRenderStats:
+        for statsFilePath in renderStats.export(rootPath, suffix=renderStatsSuffix):
+            _logger.info_ext(f"Render statistics written: {statsFilePath}")
 
     if displayRenderTimes:
         _logger.info_ext("\nRender times:", tag="RENDERTIME", col=colorRenderTimes)
-        for key, value in allRenderTimes.items():
+        for shotName, shotData in renderStats.shots.items():
+            for stage, value in shotData["stageTimes"].items():
+                key = f"{shotName}_{stage}"
+                _logger.info_ext(f"{key:>20}: {value:0.2f} sec.", tag="RENDERTIME", col=colorRenderTimes)
+        for key, value in renderStats.totalTimes.items():
             _logger.info_ext(f"{key:>20}: {value:0.2f} sec.", tag="RENDERTIME", col=colorRenderTimes)
+        _logger.info_ext(
+            f"{'Bytes written':>20}: {renderStats.bytesWritten}, peak temp disk usage: {renderStats.peakTempDiskUsage}",
+            tag="RENDERTIME",
+            col=colorRenderTimes,
+        )
 
         _logger.info_ext("\n", tag="RENDERTIME", col=colorRenderTimes)
 
@@ -1175,17 +1492,32 @@ def launchRender(context, renderMode, rootPath, area=None):
                 takesToRender = [currentTakeInd]
 
         for takeInd in takesToRender:
-            renderedFilesDict = launchRenderWithVSEComposite(
-                context,
-                preset,
-                takeIndex=takeInd,
-                filePath=props.renderRootPath,
-                fileListOnly=False,
-                rerenderExistingShotVideos=preset.rerenderExistingShotVideos,
-                generateSequenceVideo=preset.generateEditVideo,
-                renderAlsoDisabled=preset.renderAlsoDisabled,
-                area=area,
-            )
+            renderedFilesDict = None
+            if 0 < preset.farmNumWorkers:
+                renderedFilesDict = launchRenderWithVSECompositeInFarm(
+                    context,
+                    preset,
+                    preset.farmNumWorkers,
+                    takeIndex=takeInd,
+                    filePath=props.renderRootPath,
+                    rerenderExistingShotVideos=preset.rerenderExistingShotVideos,
+                    generateSequenceVideo=preset.generateEditVideo,
+                    renderAlsoDisabled=preset.renderAlsoDisabled,
+                )
+
+            # the farm cannot be used, the shots are rendered in the current session
+            if renderedFilesDict is None:
+                renderedFilesDict = launchRenderWithVSEComposite(
+                    context,
+                    preset,
+                    takeIndex=takeInd,
+                    filePath=props.renderRootPath,
+                    fileListOnly=False,
+                    rerenderExistingShotVideos=preset.rerenderExistingShotVideos,
+                    generateSequenceVideo=preset.generateEditVideo,
+                    renderAlsoDisabled=preset.renderAlsoDisabled,
+                    area=area,
+                )
 
             if preset.renderOtioFile:
                 bpy.context.window.scene = scene
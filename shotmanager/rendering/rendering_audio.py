@@ -0,0 +1,91 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Sound of the rendered shots mixed down once for the whole take
+
+Instead of calling the mixdown operator of Blender for each shot, the sound of the range covering all the rendered
+shots, handles included, is mixed down once in a PCM wav file. The sound of each shot is then copied from it,
+the position of its samples being computed from the shot range.
+"""
+
+import os
+import wave
+from pathlib import Path
+
+import bpy
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+class TakeAudioMixdown:
+    """Sound of a range of frames of the scene, from which the sound of the shots is extracted"""
+
+    def __init__(self, filePath, frameStart, frameEnd, fps):
+        """Args:
+        frameStart, frameEnd: range of the scene covered by the sound, included
+        fps: frame rate of the scene
+        """
+        self.filePath = filePath
+        self.frameStart = frameStart
+        self.frameEnd = frameEnd
+        self.fps = fps
+        self.mixedDown = False
+
+    def mixdown(self, scene):
+        """Mix down the sound of the range of the scene in the wav file"""
+        previousFrameStart = scene.frame_start
+        previousFrameEnd = scene.frame_end
+        scene.frame_start = self.frameStart
+        scene.frame_end = self.frameEnd
+
+        Path(self.filePath).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(self.filePath):
+            os.remove(self.filePath)
+        bpy.ops.sound.mixdown(filepath=self.filePath, relative_path=False, container="WAV", codec="PCM")
+
+        scene.frame_start = previousFrameStart
+        scene.frame_end = previousFrameEnd
+        self.mixedDown = True
+
+    def _frameToSample(self, frame, sampleRate):
+        return round((frame - self.frameStart) * sampleRate / self.fps)
+
+    def extractShotAudio(self, outputFilePath, frameStart, frameEnd):
+        """Write the sound of the range of frames, included, in a wav file with the same format as the mixdown
+        Return False if the range is not covered by the mixdown or if the mixdown cannot be read"""
+        if frameStart < self.frameStart or self.frameEnd < frameEnd:
+            _logger.error_ext(f"Audio range {frameStart}-{frameEnd} not in the take mixdown: {self.filePath}")
+            return False
+
+        try:
+            with wave.open(self.filePath, "rb") as takeAudio:
+                params = takeAudio.getparams()
+                firstSample = self._frameToSample(frameStart, params.framerate)
+                lastSample = min(self._frameToSample(frameEnd + 1, params.framerate), params.nframes)
+                takeAudio.setpos(min(firstSample, params.nframes))
+                samples = takeAudio.readframes(max(0, lastSample - firstSample))
+
+            with wave.open(outputFilePath, "wb") as shotAudio:
+                shotAudio.setparams(params)
+                shotAudio.writeframes(samples)
+        except Exception as e:
+            _logger.error_ext(f"Cannot extract the shot audio from the take mixdown: {e}")
+            return False
+        return True
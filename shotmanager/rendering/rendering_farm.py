@@ -0,0 +1,287 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Local render farm: the shots of a take are rendered in parallel by background Blender processes
+
+The coordinator, running in the current Blender session, splits the shots into disjoint subsets and starts one
+worker per subset with the command:
+    blender -b file.blend --python rendering_farm_worker.py -- job.json
+Each worker renders its shots with launchRenderWithVSEComposite() and the same render preset, then writes its
+rendered and failed files in a json file. The coordinator gathers them and builds the sequence video.
+The VSE compositing needs a window, which background processes don't have, so the workers always composite the
+shot videos with FFmpeg, whatever the compositing backend of the preset.
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import bpy
+
+from shotmanager.utils import utils
+from shotmanager.utils import utils_ffmpeg
+from shotmanager.utils.utils_os import format_path_for_os
+from shotmanager.rendering import rendering_manifest
+
+from shotmanager.config import config
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# name of the render presets in the add-on properties, per render mode
+_renderPresetNames = {
+    "STILL": "renderSettingsStill",
+    "ANIMATION": "renderSettingsAnim",
+    "ALL": "renderSettingsAll",
+    "PLAYBLAST": "renderSettingsPlayblast",
+}
+
+
+def getWorkerScriptPath():
+    return str(Path(__file__).parent / "rendering_farm_worker.py")
+
+
+def splitShotsForWorkers(shots, numWorkers):
+    """Distribute the shots into at most numWorkers disjoint subsets of similar total durations.
+    The longest shots are assigned first, each one to the worker with the smallest amount of frames to render
+    Return a list of lists of shot indices, each one in the order of the specified shots
+    """
+    workersShots = [[] for _ in range(max(1, numWorkers))]
+    workersDurations = [0] * len(workersShots)
+    for shotInd in sorted(range(len(shots)), key=lambda i: shots[i].getDuration(), reverse=True):
+        workerInd = workersDurations.index(min(workersDurations))
+        workersShots[workerInd].append(shotInd)
+        workersDurations[workerInd] += shots[shotInd].getDuration()
+    return [sorted(shotInds) for shotInds in workersShots if len(shotInds)]
+
+
+def launchRenderWithVSECompositeInFarm(
+    context,
+    renderPreset,
+    numWorkers,
+    takeIndex=-1,
+    filePath="",
+    rerenderExistingShotVideos=True,
+    generateSequenceVideo=True,
+    render_handles=True,
+    renderSound=True,
+    renderAlsoDisabled=False,
+):
+    """Render the shot videos of the specified take in numWorkers background Blender processes, then build the
+    sequence video in the current session.
+    The workers open the saved version of the current file, which then has to be saved before the call.
+    Return the same dictionary as launchRenderWithVSEComposite(), or None if the farm cannot be used
+    """
+    scene = context.scene
+    props = config.getAddonProps(scene)
+    vse_render = context.window_manager.UAS_vse_render
+
+    blendFilePath = bpy.data.filepath
+    if "" == blendFilePath:
+        _logger.error_ext("Render Farm: The current file has to be saved to be rendered by the farm")
+        return None
+    if bpy.data.is_dirty:
+        _logger.warning_ext("Render Farm: The current file has unsaved changes, they will not be rendered")
+    if utils_ffmpeg.getFFmpegPath() is None:
+        _logger.error_ext("Render Farm: FFmpeg is required by the workers to composite the shot videos")
+        return None
+
+    if -1 == takeIndex:
+        takeIndex = props.getCurrentTakeIndex()
+    take = props.getTakeByIndex(takeIndex)
+
+    # same shots as in launchRenderWithVSEComposite()
+    shotList = [
+        shot
+        for shot in take.getShotList(ignoreDisabled=not renderAlsoDisabled)
+        if not shot.get_name().endswith("_removed") or shot.enabled
+    ]
+    allTakeShots = take.getShotList(ignoreDisabled=False)
+
+    rootPath = filePath if "" != filePath else os.path.dirname(bpy.data.filepath)
+    rootPath = format_path_for_os(bpy.path.abspath(rootPath))
+
+    handles = props.getHandlesDuration()
+    projectFps = props.project_fps if props.use_project_settings else utils.getSceneEffectiveFps(scene)
+
+    startRenderTime = time.monotonic()
+
+    #######################
+    # start the workers
+    #######################
+
+    jobsDir = tempfile.mkdtemp(prefix="ShotManager_RenderFarm_")
+    workers = []
+    for workerInd, shotInds in enumerate(splitShotsForWorkers(shotList, numWorkers)):
+        workerShots = [shotList[i] for i in shotInds]
+        job = {
+            "scene": scene.name,
+            "takeIndex": takeIndex,
+            "shotIndices": [allTakeShots.index(shot) for shot in workerShots],
+            "renderPresetName": _renderPresetNames[renderPreset.renderMode],
+            "filePath": rootPath,
+            "rerenderExistingShotVideos": rerenderExistingShotVideos,
+            "render_handles": render_handles,
+            "renderSound": renderSound,
+            "renderAlsoDisabled": renderAlsoDisabled,
+            # background processes have no window for the VSE
+            "compositingBackend": "FFMPEG",
+            "resultFilePath": os.path.join(jobsDir, f"worker_{workerInd:02d}_result.json"),
+            # the shots are distributed to the workers the same way as long as the number of workers is the same
+            "manifestFilePath": rendering_manifest.getRenderManifestFilePath(
+                rootPath, take.getName_PathCompliant(), suffix=f"_worker{workerInd:02d}"
+            ),
+            "renderStatsSuffix": f"_worker{workerInd:02d}",
+        }
+        jobFilePath = os.path.join(jobsDir, f"worker_{workerInd:02d}_job.json")
+        with open(jobFilePath, "w") as f:
+            json.dump(job, f, indent=4)
+
+        logFilePath = os.path.join(jobsDir, f"worker_{workerInd:02d}.log")
+        command = [bpy.app.binary_path, "-b", blendFilePath, "--python", getWorkerScriptPath(), "--", jobFilePath]
+        with open(logFilePath, "w") as logFile:
+            process = subprocess.Popen(command, stdout=logFile, stderr=subprocess.STDOUT)
+
+        shotNames = ", ".join([shot.name for shot in workerShots])
+        _logger.info_ext(f"Render Farm: Worker {workerInd} started for shots: {shotNames}", col="GREEN")
+        workers.append({"process": process, "job": job, "shots": workerShots, "log": logFilePath})
+
+    #######################
+    # gather the results
+    #######################
+
+    renderedFilesSet = set()
+    failedFiles = []
+    allWorkersSucceeded = True
+    for workerInd, worker in enumerate(workers):
+        returnCode = worker["process"].wait()
+        resultFilePath = worker["job"]["resultFilePath"]
+
+        if 0 == returnCode and os.path.exists(resultFilePath):
+            with open(resultFilePath, "r") as f:
+                workerFilesDict = json.load(f)
+            renderedFilesSet.update(workerFilesDict["rendered_files"])
+            failedFiles.extend(workerFilesDict["failed_files"])
+        else:
+            allWorkersSucceeded = False
+            _logger.error_ext(
+                f"Render Farm: Worker {workerInd} failed (return code: {returnCode}), see log: {worker['log']}"
+            )
+            for shot in worker["shots"]:
+                failedFiles.append(shot.getOutputMediaPath("SH_VIDEO", rootPath=rootPath, insertSeqPrefix=True))
+
+        _logger.info_ext(
+            f"Render Farm: Worker {workerInd} done: {time.monotonic() - startRenderTime:0.2f} sec.", tag="RENDERTIME"
+        )
+
+    # the job files and the logs of the workers are kept only to investigate failures
+    if allWorkersSucceeded and not len(failedFiles):
+        shutil.rmtree(jobsDir, ignore_errors=True)
+    else:
+        _logger.error_ext(f"Render Farm: Job files and worker logs kept in: {jobsDir}")
+
+    # keep the order of the shots in the take
+    newMediaFiles = []
+    sequenceFiles = []
+    for shot in shotList:
+        compositedMediaPath = shot.getOutputMediaPath("SH_VIDEO", rootPath=rootPath, insertSeqPrefix=True)
+        if compositedMediaPath in renderedFilesSet:
+            newMediaFiles.append(compositedMediaPath)
+            if shot.enabled:
+                sequenceFiles.append(compositedMediaPath)
+
+    #######################
+    # render sequence video
+    #######################
+
+    sequenceOutputFullPath = ""
+    if generateSequenceVideo:
+        if len(failedFiles):
+            _logger.error_ext("Render Farm: Some shots failed to render, the sequence video is not generated")
+        else:
+            sequenceOutputFullPath = props.getOutputMediaPath("TK_VIDEO", take, rootPath=rootPath, insertSeqPrefix=True)
+            _logger.info_ext(f"  Rendered sequence from shot videos: {sequenceOutputFullPath}")
+            vse_render.buildSequenceVideoFromMedia(
+                sequenceOutputFullPath,
+                handles,
+                projectFps,
+                mediaFiles=sequenceFiles,
+                backend=renderPreset.compositingBackend,
+                concatWithoutReencoding=renderPreset.concatWithoutReencoding,
+            )
+            newMediaFiles.append(sequenceOutputFullPath)
+
+    _logger.info_ext(
+        f"Render Farm: All shots and sequence render time: {time.monotonic() - startRenderTime:0.2f} sec.",
+        tag="RENDERTIME",
+    )
+
+    filesDict = {
+        "rendered_files": newMediaFiles,
+        "failed_files": failedFiles,
+        "sequence_video_file": sequenceOutputFullPath,
+    }
+    return filesDict
+
+
+def renderFarmJob(job):
+    """Render the shots of the specified job, called in the background Blender process of a farm worker
+    Args:
+        job: dictionary written by launchRenderWithVSECompositeInFarm()
+    """
+    from shotmanager.rendering.rendering import launchRenderWithVSEComposite
+
+    scene = bpy.data.scenes.get(job["scene"], None)
+    if scene is None:
+        _logger.error_ext(f"Render Farm Worker: Scene {job['scene']} not found")
+        return False
+    if utils_ffmpeg.getFFmpegPath() is None:
+        _logger.error_ext("Render Farm Worker: FFmpeg not found, the shot videos cannot be composited")
+        return False
+
+    props = config.getAddonProps(scene)
+    take = props.getTakeByIndex(job["takeIndex"])
+    allTakeShots = take.getShotList(ignoreDisabled=False)
+    renderPreset = getattr(props, job["renderPresetName"])
+
+    # the scene of the job is not necessarily the active scene of the saved file
+    with bpy.context.temp_override(scene=scene):
+        filesDict = launchRenderWithVSEComposite(
+            bpy.context,
+            renderPreset,
+            takeIndex=job["takeIndex"],
+            filePath=job["filePath"],
+            rerenderExistingShotVideos=job["rerenderExistingShotVideos"],
+            generateSequenceVideo=False,
+            specificShotList=[allTakeShots[i] for i in job["shotIndices"]],
+            render_handles=job["render_handles"],
+            renderSound=job["renderSound"],
+            renderAlsoDisabled=job["renderAlsoDisabled"],
+            manifestFilePath=job["manifestFilePath"],
+            compositingBackend=job.get("compositingBackend", "FFMPEG"),
+            renderStatsSuffix=job.get("renderStatsSuffix", ""),
+        )
+
+    with open(job["resultFilePath"], "w") as f:
+        json.dump({"rendered_files": filesDict["rendered_files"], "failed_files": filesDict["failed_files"]}, f)
+    return True
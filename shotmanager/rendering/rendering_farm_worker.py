@@ -0,0 +1,45 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Script run by the background Blender processes of the local render farm, see rendering_farm.py
+Usage:
+    blender -b file.blend --python rendering_farm_worker.py -- job.json
+"""
+
+import sys
+import json
+import traceback
+
+
+def main():
+    jobFilePath = sys.argv[sys.argv.index("--") + 1]
+    with open(jobFilePath, "r") as f:
+        job = json.load(f)
+
+    # Shot Manager has to be enabled in the preferences of the Blender used by the farm
+    from shotmanager.rendering.rendering_farm import renderFarmJob
+
+    if not renderFarmJob(job):
+        sys.exit(1)
+
+
+try:
+    main()
+except Exception:
+    traceback.print_exc()
+    sys.exit(1)
@@ -0,0 +1,262 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Content fingerprints of the shots, used to re-render only the shots that changed since their last rendering
+
+The fingerprint of a shot is a hash of what makes its rendered video: the shot range and handles, the camera,
+the animation keys, with their fcurve modifiers, of the objects, the scene and the world, the grease pencil frames
+located in the rendered range, the Stamp Info settings and the render preset.
+It is written in a json file next to the shot video each time the video is generated.
+Notes:
+    - Changes that are not animated, such as mesh editing or static transformations of objects other than the
+      camera, are not part of the fingerprint. Rendering with rerenderExistingShotVideos set to True is required
+      to take them into account
+    - Drivers are not part of the fingerprint
+    - Shot videos without fingerprint file, such as the ones rendered by previous versions, are considered as up
+      to date
+"""
+
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# version of the content of the fingerprint, to increment when it changes so that previous fingerprints are obsolete
+_fingerprintVersion = 2
+
+# Stamp Info settings set by the rendering for each shot, the values they are computed from are part of the
+# fingerprint instead
+_shotDependentStampInfoSettings = (
+    "rna_type",
+    "renderRootPath",
+    "renderRootPathUsed",
+    "stampInfoUsed",
+    "edit3DFrame",
+    "edit3DTotalNumber",
+    "sequenceName",
+    "shotName",
+    "takeName",
+    "shotHandles",
+    "cornerNote",
+    "cornerNoteUsed",
+    "bottomNote",
+    "bottomNoteUsed",
+    "notesUsed",
+    "notesLine01",
+    "notesLine02",
+    "notesLine03",
+)
+
+# render preset settings that do not change the content of the shot videos
+_renderPresetSettingsNotInVideo = (
+    "rna_type",
+    "name",
+    "rerenderExistingShotVideos",
+    "farmNumWorkers",
+    "usePipelinedRendering",
+    "concatWithoutReencoding",
+    "resumeRender",
+    "exportRenderStats",
+    "mixdownAudioPerTake",
+    "renderAllTakes",
+    "renderOtioFile",
+    "otioFileType",
+    "generateEditVideo",
+    "updatePlayblastInVSM",
+    "openRenderedVideoInPlayer",
+)
+
+
+def getShotFingerprintFilePath(mediaPath):
+    """Return the path of the json file storing the fingerprint of the specified shot media"""
+    mediaPath = Path(mediaPath)
+    return str(mediaPath.with_name(mediaPath.stem + "_fingerprint.json"))
+
+
+def readShotFingerprint(mediaPath):
+    """Return the fingerprint stored next to the specified shot media, None if not found or not readable"""
+    filePath = getShotFingerprintFilePath(mediaPath)
+    if not Path(filePath).exists():
+        return None
+    try:
+        with open(filePath, "r") as f:
+            return json.load(f).get("fingerprint", None)
+    except Exception:
+        _logger.warning_ext(f"Cannot read shot fingerprint file: {filePath}")
+        return None
+
+
+def writeShotFingerprint(mediaPath, fingerprint):
+    filePath = getShotFingerprintFilePath(mediaPath)
+    try:
+        with open(filePath, "w") as f:
+            json.dump({"version": _fingerprintVersion, "fingerprint": fingerprint}, f, indent=4)
+    except Exception:
+        _logger.error_ext(f"Cannot write shot fingerprint file: {filePath}")
+
+
+def _getRNAValues(struct, excludedNames=("rna_type",)):
+    """Return a dictionary with the values of the properties of the specified struct, pointers and collections
+    being ignored
+    """
+    values = dict()
+    for prop in struct.bl_rna.properties:
+        if prop.identifier in excludedNames or prop.type in ("POINTER", "COLLECTION"):
+            continue
+        value = getattr(struct, prop.identifier)
+        if isinstance(value, set):
+            value = sorted(value)
+        elif not isinstance(value, str) and hasattr(value, "__len__"):
+            value = list(value)
+        values[prop.identifier] = value
+    return values
+
+
+def _hashKeysInRange(hasher, fcurve, rangeStart, rangeEnd):
+    """Hash the keys of the fcurve located in the range, and the keys just before and after it since they
+    also define the interpolated values in the range, and the settings of the modifiers of the fcurve
+    """
+    numKeys = len(fcurve.keyframe_points)
+    hasher.update(f"{fcurve.data_path}[{fcurve.array_index}]:{fcurve.mute}:{fcurve.extrapolation}".encode())
+    hasher.update(f"{len(fcurve.modifiers)}:{numKeys}".encode())
+    for modifier in fcurve.modifiers:
+        hasher.update(json.dumps(_getRNAValues(modifier), sort_keys=True, default=str).encode())
+    if not numKeys:
+        return
+
+    co = np.empty(numKeys * 2, dtype=np.float64)
+    fcurve.keyframe_points.foreach_get("co", co)
+    co = co.reshape(-1, 2)
+
+    firstInd = max(0, int(np.searchsorted(co[:, 0], rangeStart, side="left")) - 1)
+    lastInd = min(numKeys, int(np.searchsorted(co[:, 0], rangeEnd, side="right")) + 1)
+    hasher.update(co[firstInd:lastInd].tobytes())
+
+    for handleName in ("handle_left", "handle_right"):
+        handles = np.empty(numKeys * 2, dtype=np.float64)
+        fcurve.keyframe_points.foreach_get(handleName, handles)
+        hasher.update(handles.reshape(-1, 2)[firstInd:lastInd].tobytes())
+
+    hasher.update(str([k.interpolation for k in fcurve.keyframe_points[firstInd:lastInd]]).encode())
+
+
+def _getAnimatedIDs(obj):
+    """Return the datablocks related to the object that can hold an animation"""
+    ids = [obj]
+    if obj.data is not None:
+        ids.append(obj.data)
+        shapeKeys = getattr(obj.data, "shape_keys", None)
+        if shapeKeys is not None:
+            ids.append(shapeKeys)
+    for matSlot in obj.material_slots:
+        if matSlot.material is not None:
+            ids.append(matSlot.material)
+            if matSlot.material.node_tree is not None:
+                ids.append(matSlot.material.node_tree)
+    return ids
+
+
+def _hashGreasePencil(hasher, gpData, rangeStart, rangeEnd):
+    """Hash the grease pencil frames displayed in the range, including the one displayed at the range start"""
+    for layer in gpData.layers:
+        hasher.update(f"{layer.info}:{layer.hide}:{layer.opacity}:{len(layer.frames)}".encode())
+        frameNumbers = [f.frame_number for f in layer.frames]
+        firstInd = max(0, int(np.searchsorted(frameNumbers, rangeStart, side="right")) - 1)
+        for frame in layer.frames[firstInd:]:
+            if rangeEnd < frame.frame_number:
+                break
+            hasher.update(f"{frame.frame_number}:{len(frame.strokes)}".encode())
+            for stroke in frame.strokes:
+                points = np.empty(len(stroke.points) * 3, dtype=np.float32)
+                stroke.points.foreach_get("co", points)
+                hasher.update(points.tobytes())
+                hasher.update(f"{stroke.material_index}:{stroke.line_width}".encode())
+
+
+def computeShotFingerprint(scene, shot, renderPreset, handles, stampInfoSettings=None):
+    """Return a hexadecimal hash of the content that defines the rendered video of the shot
+    Args:
+        handles: number of handle frames rendered before and after the shot range
+        stampInfoSettings: Stamp Info settings if they are used for the rendering, None otherwise
+    """
+    hasher = hashlib.sha1()
+    rangeStart = shot.start - handles
+    rangeEnd = shot.end + handles
+
+    shotValues = {
+        "version": _fingerprintVersion,
+        "name": shot.name,
+        "enabled": shot.enabled,
+        "start": shot.start,
+        "end": shot.end,
+        "handles": handles,
+        "notes": [shot.note01, shot.note02, shot.note03],
+        "resolution": [scene.render.resolution_x, scene.render.resolution_y, scene.render.resolution_percentage],
+        "fps": [scene.render.fps, scene.render.fps_base],
+        "renderPreset": _getRNAValues(renderPreset, excludedNames=_renderPresetSettingsNotInVideo),
+    }
+
+    camera = shot.camera
+    if camera is not None:
+        shotValues["camera"] = camera.name
+        shotValues["cameraData"] = _getRNAValues(camera.data)
+        if camera.animation_data is None or camera.animation_data.action is None:
+            shotValues["cameraMatrix"] = [list(row) for row in camera.matrix_world]
+
+    if stampInfoSettings is not None:
+        shotValues["stampInfo"] = _getRNAValues(stampInfoSettings, excludedNames=_shotDependentStampInfoSettings)
+
+    hasher.update(json.dumps(shotValues, sort_keys=True, default=str).encode())
+
+    # animation of the scene in the rendered range
+    hashedIDs = set()
+    hashedGPData = set()
+
+    def _hashAnimatedID(animatedID):
+        if animatedID in hashedIDs:
+            return
+        hashedIDs.add(animatedID)
+        animData = animatedID.animation_data
+        if animData is None or animData.action is None:
+            return
+        hasher.update(f"{animatedID.name}:{animData.action.name}".encode())
+        for fcurve in animData.action.fcurves:
+            _hashKeysInRange(hasher, fcurve, rangeStart, rangeEnd)
+
+    _hashAnimatedID(scene)
+    if scene.world is not None:
+        _hashAnimatedID(scene.world)
+        if scene.world.node_tree is not None:
+            _hashAnimatedID(scene.world.node_tree)
+
+    for obj in sorted(scene.objects, key=lambda o: o.name):
+        hasher.update(f"{obj.name}:{obj.hide_render}".encode())
+        for animatedID in _getAnimatedIDs(obj):
+            _hashAnimatedID(animatedID)
+
+        if "GPENCIL" == obj.type and obj.data not in hashedGPData:
+            hashedGPData.add(obj.data)
+            _hashGreasePencil(hasher, obj.data, rangeStart, rangeEnd)
+
+    return hasher.hexdigest()
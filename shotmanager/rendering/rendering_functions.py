@@ -19,6 +19,10 @@
 Rendering functions
 """
 
+import time
+
+import bpy
+
 
 def applyVideoSettings(scene, props, mode, renderMode, renderPreset):
     """
@@ -54,3 +58,42 @@ def applyVideoSettings(scene, props, mode, renderMode, renderPreset):
                 scene.render.image_settings.file_format = "PNG"
                 scene.render.use_file_extension = True
                 # renderMode = "PROJECT" if renderPreset is None else renderPreset.renderMode
+
+
+class RenderedFramesMonitor:
+    """
+    Record the frames written by an animation rendering operator and their render time, through the render_pre and
+    render_write handlers, during the block.
+    The frames of renderings that don't call these handlers are not recorded.
+    """
+
+    def __init__(self, onFrameWritten=None):
+        """Args:
+        onFrameWritten: function called with the frame and its render time in seconds each time an image is written
+        """
+        self.onFrameWritten = onFrameWritten
+        self.frameTimes = dict()
+        self._frameStartTime = None
+
+    def _onRenderPre(self, scene, *args):
+        self._frameStartTime = time.monotonic()
+
+    def _onRenderWrite(self, scene, *args):
+        if self._frameStartTime is None:
+            return
+        frameTime = time.monotonic() - self._frameStartTime
+        self._frameStartTime = None
+        self.frameTimes[scene.frame_current] = frameTime
+        if self.onFrameWritten is not None:
+            self.onFrameWritten(scene.frame_current, frameTime)
+
+    def __enter__(self):
+        bpy.app.handlers.render_pre.append(self._onRenderPre)
+        bpy.app.handlers.render_write.append(self._onRenderWrite)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._onRenderPre in bpy.app.handlers.render_pre:
+            bpy.app.handlers.render_pre.remove(self._onRenderPre)
+        if self._onRenderWrite in bpy.app.handlers.render_write:
+            bpy.app.handlers.render_write.remove(self._onRenderWrite)
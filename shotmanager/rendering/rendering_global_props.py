@@ -20,7 +20,7 @@ Global Render properties
 """
 
 from bpy.types import PropertyGroup
-from bpy.props import BoolProperty, EnumProperty
+from bpy.props import BoolProperty, EnumProperty, IntProperty
 
 from shotmanager.config import sm_logging
 
@@ -40,18 +40,28 @@ class UAS_ShotManager_RenderGlobalContext(PropertyGroup):
         options=set(),
     )
 
-    # dev only
     renderFrameIterationMode: EnumProperty(
         name="Frame Iteration Mode",
-        description="Use animation rendering mode or render each frame independently in a loop (*** Dev. purpose only ***)",
+        description="Use animation rendering mode or render the frames independently in a loop."
+        "\nNot used by the playblasts",
         items=(
             ("ANIM", "Anim.", "Images are rendered as a sequence"),
-            ("LOOP", "Loop", "Images are computed independently, in a custom loop"),
+            ("LOOP", "Loop", "Images are computed independently, or by chunks, in a custom loop"),
         ),
         default="ANIM",
         options=set(),
     )
 
+    renderFrameChunkSize: IntProperty(
+        name="Frames per Chunk",
+        description="Number of contiguous frames rendered in animation mode at each iteration of the Loop mode."
+        "\nWhen set to 1 the frames are rendered one by one",
+        min=1,
+        soft_max=100,
+        default=1,
+        options=set(),
+    )
+
     def _update_renderEngine(self, context):
         pass
 
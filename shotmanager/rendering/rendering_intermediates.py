@@ -0,0 +1,170 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Storage of the intermediate files of the rendering
+
+The intermediate files of a shot (rendered images, Stamp Info images and sound) are written in a folder per shot.
+This folder is located next to the rendered media, or in the folder specified in the add-on preferences, typically
+on a fast local drive, or on a RAM disk for the short shots when one is available (tmpfs on Linux).
+The IntermediateFilesManager deletes the folders of the rendered shots in a background thread and keeps the disk
+space they use under the quota set in the preferences.
+"""
+
+import os
+import time
+import concurrent.futures
+from pathlib import Path
+
+import bpy
+
+from shotmanager.rendering.rendering_stats import getDirSize
+
+from shotmanager.config import config
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# RAM-backed file system where the intermediate files of the short shots can be written
+_ramDiskPath = "/dev/shm"
+
+
+def getRAMDiskPath():
+    """Return the path of the RAM disk of the system, None if there is none"""
+    if os.path.isdir(_ramDiskPath) and os.access(_ramDiskPath, os.W_OK):
+        return _ramDiskPath
+    return None
+
+
+def getIntermediateFilesRootPath(shot, rootPath):
+    """Return the root folder of the intermediate files of the specified shot according to the add-on preferences
+    Args:
+        rootPath: root folder of the rendered media, used when no specific location is set
+    """
+    prefs = config.getAddonPrefs()
+    intermRootPath = None
+
+    if prefs.intermediateFilesShortShotsInRAM and shot.getDuration() <= prefs.intermediateFilesShortShotMaxFrames:
+        intermRootPath = getRAMDiskPath()
+    if intermRootPath is None and "" != prefs.intermediateFilesRootPath:
+        intermRootPath = bpy.path.abspath(prefs.intermediateFilesRootPath)
+    if intermRootPath is None:
+        return rootPath
+
+    # the location is shared by all the files, their intermediate files are then separated
+    blendFileName = Path(bpy.data.filepath).stem if "" != bpy.data.filepath else "Untitled"
+    return str(Path(intermRootPath) / "ShotManager_Intermediates" / blendFileName)
+
+
+def deleteFile(filePath, numRetries=3, retryDelay=0.2):
+    """Delete the file, trying again after a delay if it is locked (by the system or by a player for example)
+    Return True if the file doesn't exist anymore"""
+    for retryInd in range(numRetries + 1):
+        try:
+            os.remove(filePath)
+            return True
+        except FileNotFoundError:
+            return True
+        except Exception:
+            if retryInd < numRetries:
+                time.sleep(retryDelay)
+    _logger.error_ext(f"*** File locked (by system?): {filePath}")
+    return False
+
+
+def deleteDir(dirPath, numRetries=3, retryDelay=0.2):
+    """Delete the files of the specified directory, then the directory itself
+    Return True if the directory doesn't exist anymore"""
+    if not os.path.exists(dirPath):
+        return True
+    for fileName in os.listdir(dirPath):
+        deleteFile(os.path.join(dirPath, fileName), numRetries=numRetries, retryDelay=retryDelay)
+    try:
+        os.rmdir(dirPath)
+    except Exception:
+        _logger.error_ext(f"Cannot delete folder: {dirPath}")
+        return False
+    return True
+
+
+class IntermediateFilesManager:
+    """Lifecycle of the folders of intermediate files of the rendered shots"""
+
+    def __init__(self, maxDiskUsage=0, backgroundDeletion=True):
+        """Args:
+        maxDiskUsage: maximum disk space used by the folders, in bytes. 0 for no limit
+        backgroundDeletion: if True the folders are deleted in a background thread
+        """
+        self.maxDiskUsage = maxDiskUsage
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1) if backgroundDeletion else None
+        self._pendingDeletions = []
+        # folders kept once their shot is rendered, the oldest first
+        self._keptDirs = []
+
+    def clearDir(self, dirPath):
+        """Delete the content of a folder before writing the intermediate files of a shot in it"""
+        self._keptDirs = [d for d in self._keptDirs if d != dirPath]
+        deleteDir(dirPath)
+
+    def release(self, dirPath, keep=False):
+        """Called once the intermediate files of a shot are not used anymore
+        Args:
+            keep: if True the folder is kept, unless it has to be evicted to stay under the disk quota
+        """
+        if keep:
+            if dirPath not in self._keptDirs:
+                self._keptDirs.append(dirPath)
+            self.enforceQuota()
+        elif self._executor is None:
+            deleteDir(dirPath)
+        else:
+            self._pendingDeletions.append((dirPath, self._executor.submit(deleteDir, dirPath)))
+
+    def _removeDoneDeletions(self):
+        self._pendingDeletions = [(d, future) for d, future in self._pendingDeletions if not future.done()]
+
+    def getDiskUsage(self):
+        """Return the disk space used by the kept folders and by the ones waiting to be deleted, in bytes"""
+        self._removeDoneDeletions()
+        dirPaths = self._keptDirs + [dirPath for dirPath, _ in self._pendingDeletions]
+        return sum([getDirSize(dirPath) for dirPath in dirPaths])
+
+    def enforceQuota(self):
+        """Evict the oldest kept folders, then wait for the pending deletions, until the disk usage is under the
+        quota. Called before the rendering of a shot"""
+        if self.maxDiskUsage <= 0:
+            return
+        while len(self._keptDirs) and self.maxDiskUsage < self.getDiskUsage():
+            dirPath = self._keptDirs.pop(0)
+            _logger.info_ext(f"Intermediate files quota reached, deleting kept folder: {dirPath}", col="PINK")
+            deleteDir(dirPath)
+        if self.maxDiskUsage < self.getDiskUsage():
+            _logger.debug_ext("Intermediate files quota reached, waiting for the pending deletions")
+            self.finishDeletions()
+
+    def finishDeletions(self):
+        """Wait for the pending deletions to be done"""
+        for _, future in self._pendingDeletions:
+            future.result()
+        self._pendingDeletions = []
+
+    def finish(self):
+        """Wait for the pending deletions and stop the background thread"""
+        self.finishDeletions()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
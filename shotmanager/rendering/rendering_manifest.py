@@ -0,0 +1,203 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Render job manifest, used to resume a rendering interrupted by a crash
+
+The manifest is a json file written in the render root folder during the rendering of a take. For each shot it
+lists the processing stages that are done (images, stamp, audio, composite), with their duration, and the ranges
+of frames whose images have been rendered. It is saved after each step, so that it always reflects the files on disk.
+The frames marked as done one by one during an animation rendering are saved at most every few seconds: a crash can
+then lose the last ones, which are simply rendered again.
+When a rendering is resumed, the frames and the stages marked as done are not processed again, provided that
+their files are still valid.
+"""
+
+import os
+import re
+import json
+import time
+from pathlib import Path
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# version of the content of the manifest, to increment when it changes so that previous manifests are ignored
+_manifestVersion = 2
+
+# minimal delay in seconds between two saves of the manifest when frames are marked as done one by one
+_throttledSaveInterval = 5.0
+
+# processing stages of a shot, in their order of execution
+shotStages = ("images", "stamp", "audio", "composite")
+
+
+def getRenderManifestFilePath(rootPath, takeName, suffix=""):
+    """Return the path of the manifest of the rendering of the specified take
+    Args:
+        suffix: used to get distinct manifests for the renderings running in parallel, such as the farm workers
+    """
+    return str(Path(rootPath) / f"_RenderJob_{takeName}{suffix}.json")
+
+
+def getImageSequenceFilePath(imageSequencePath, frame):
+    """Return the path of the image of the frame from an image sequence path using # for the frame index"""
+    return re.sub(r"#+", lambda m: str(frame).rjust(len(m.group(0)), "0"), imageSequencePath)
+
+
+def getContiguousFrameRanges(frames):
+    """Return the list of the ranges (first frame, last frame) of contiguous frames of the sorted list of frames"""
+    frameRanges = []
+    for frame in frames:
+        if len(frameRanges) and frameRanges[-1][1] + 1 == frame:
+            frameRanges[-1][1] = frame
+        else:
+            frameRanges.append([frame, frame])
+    return [tuple(frameRange) for frameRange in frameRanges]
+
+
+def addFrameRange(frameRanges, frameStart, frameEnd):
+    """Return the sorted list of the disjoint ranges [first frame, last frame] of frameRanges to which the specified
+    range is added, contiguous ranges being merged"""
+    newRanges = []
+    for rangeStart, rangeEnd in frameRanges:
+        if rangeEnd + 1 < frameStart or frameEnd + 1 < rangeStart:
+            newRanges.append([rangeStart, rangeEnd])
+        else:
+            frameStart = min(frameStart, rangeStart)
+            frameEnd = max(frameEnd, rangeEnd)
+    newRanges.append([frameStart, frameEnd])
+    return sorted(newRanges)
+
+
+def isValidFile(filePath):
+    """Return True if the file exists and is not empty"""
+    return filePath is not None and os.path.isfile(filePath) and 0 < os.path.getsize(filePath)
+
+
+class RenderJobManifest:
+    """Progress of the rendering of the shots of a take, saved in a json file"""
+
+    def __init__(self, filePath, resume=False, jobInfo=None):
+        """Args:
+        resume: if True the content of the existing manifest file is loaded, otherwise a new manifest is started
+        jobInfo: dictionary describing the rendering, such as the scene and the render preset. When resuming,
+            the previous manifest is used only if it has the same job info
+        """
+        self.filePath = filePath
+        self._lastSaveTime = 0.0
+        self.data = {"version": _manifestVersion, "job": jobInfo if jobInfo is not None else dict(), "shots": dict()}
+
+        if resume and os.path.exists(filePath):
+            try:
+                with open(filePath, "r") as f:
+                    previousData = json.load(f)
+                if _manifestVersion == previousData.get("version") and self.data["job"] == previousData.get("job"):
+                    self.data = previousData
+                    _logger.info_ext(f"Resuming render job from manifest: {filePath}", col="GREEN")
+                else:
+                    _logger.warning_ext(f"Render job manifest is obsolete or from another job, not resumed: {filePath}")
+            except Exception:
+                _logger.warning_ext(f"Cannot read render job manifest: {filePath}")
+
+        self.save()
+
+    def save(self):
+        """Write the manifest. The file is replaced only once fully written so that a crash cannot corrupt it"""
+        self._lastSaveTime = time.monotonic()
+        self.data["updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        tmpFilePath = self.filePath + ".tmp"
+        try:
+            Path(self.filePath).parent.mkdir(parents=True, exist_ok=True)
+            with open(tmpFilePath, "w") as f:
+                json.dump(self.data, f, indent=4)
+            os.replace(tmpFilePath, self.filePath)
+        except Exception:
+            _logger.error_ext(f"Cannot write render job manifest: {self.filePath}")
+
+    def delete(self):
+        """Delete the manifest file"""
+        try:
+            if os.path.exists(self.filePath):
+                os.remove(self.filePath)
+        except Exception:
+            _logger.error_ext(f"Cannot delete render job manifest: {self.filePath}")
+
+    def _getShotData(self, shotName):
+        if shotName not in self.data["shots"]:
+            self.data["shots"][shotName] = {"frameRange": None, "frames": [], "stages": dict()}
+        return self.data["shots"][shotName]
+
+    def startShot(self, shotName, frameStart, frameEnd):
+        """Register the rendered range of the shot. If the range changed since the previous rendering, the progress
+        of the shot is cleared"""
+        shotData = self._getShotData(shotName)
+        if [frameStart, frameEnd] != shotData["frameRange"]:
+            self.data["shots"][shotName] = {"frameRange": [frameStart, frameEnd], "frames": [], "stages": dict()}
+            self.save()
+
+    def hasProgress(self, shotName):
+        """Return True if some frames or stages of the shot are done"""
+        shotData = self.data["shots"].get(shotName, None)
+        return shotData is not None and (len(shotData["frames"]) or len(shotData["stages"]))
+
+    def clearShot(self, shotName):
+        if shotName in self.data["shots"]:
+            frameRange = self.data["shots"][shotName]["frameRange"]
+            self.data["shots"][shotName] = {"frameRange": frameRange, "frames": [], "stages": dict()}
+            self.save()
+
+    def setFramesDone(self, shotName, frameStart, frameEnd, throttled=False):
+        """Args:
+        throttled: if True the manifest is saved only if the previous save is older than a few seconds. Used when
+            the frames are marked as done one by one
+        """
+        shotData = self._getShotData(shotName)
+        shotData["frames"] = addFrameRange(shotData["frames"], frameStart, frameEnd)
+        if not throttled or _throttledSaveInterval <= time.monotonic() - self._lastSaveTime:
+            self.save()
+
+    def getFramesToRender(self, shotName, frameStart, frameEnd, getFramePath):
+        """Return the sorted list of the frames of the range that are not done or which image is not valid
+        Args:
+            getFramePath: function returning the path of the image of the specified frame
+        """
+        doneRanges = self._getShotData(shotName)["frames"]
+
+        def _isDone(frame):
+            return any([rangeStart <= frame <= rangeEnd for rangeStart, rangeEnd in doneRanges])
+
+        return [f for f in range(frameStart, frameEnd + 1) if not _isDone(f) or not isValidFile(getFramePath(f))]
+
+    def setStageDone(self, shotName, stage, duration=None, files=None):
+        """Args:
+        files: list of the files generated by the stage, checked when the rendering is resumed
+        """
+        self._getShotData(shotName)["stages"][stage] = {
+            "duration": duration,
+            "files": files if files is not None else [],
+        }
+        self.save()
+
+    def isStageDone(self, shotName, stage):
+        """Return True if the stage of the shot is done and the files it generated are still valid"""
+        stageData = self.data["shots"].get(shotName, {"stages": dict()})["stages"].get(stage, None)
+        if stageData is None:
+            return False
+        return all([isValidFile(filePath) for filePath in stageData["files"]])
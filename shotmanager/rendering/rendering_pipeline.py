@@ -0,0 +1,130 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Pipelined rendering: the post-processing of a shot runs while the next shot is rendered
+
+Once the images of a shot are rendered by Blender on the main thread, a post-processing job is submitted to a
+background thread. The job generates the Stamp Info images in worker processes, composites the video of the shot
+with FFmpeg, then deletes the intermediate files.
+The number of shots waiting for their post-processing is limited: when it is reached the submission waits for the
+oldest job to finish, so that the disk space used by the intermediate images stays bounded.
+Notes:
+    - The jobs only get plain data, bpy must not be used out of the main thread
+"""
+
+import time
+from collections import deque
+import concurrent.futures
+
+from shotmanager.stampinfo.properties import infoImage
+from shotmanager.utils import utils_ffmpeg
+from shotmanager.rendering import rendering_fingerprint
+from shotmanager.rendering.rendering_intermediates import deleteDir
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+def postProcessShot(job):
+    """Generate the Stamp Info images and the video of a rendered shot
+    Args:
+        job: dictionary with the keys:
+            shotName, ffmpegPath, outputFilePath, fps, outputResolution, startFrame, numFrames, handles,
+            bgSequencePath, overSequencePath, audioFilePath, stampFrames, stampRenderResolution, stampInnerHeight,
+            stampNumProcesses, fingerprint, tempDirToDelete
+        The duration of the post-processing is set to the key postProcessingTime once done
+    Return the path of the generated video
+    """
+    startTime = time.monotonic()
+
+    if job["overSequencePath"] is not None and len(job["stampFrames"]):
+        infoImage.renderStampedImagesInProcesses(
+            job["stampFrames"],
+            job["stampRenderResolution"][0],
+            job["stampRenderResolution"][1],
+            job["stampInnerHeight"],
+            max(1, job["stampNumProcesses"]),
+        )
+
+    utils_ffmpeg.compositeMedia(
+        job["ffmpegPath"],
+        job["outputFilePath"],
+        job["fps"],
+        job["outputResolution"],
+        job["bgSequencePath"],
+        job["startFrame"],
+        job["numFrames"],
+        overSequencePath=job["overSequencePath"],
+        audioFilePath=job["audioFilePath"],
+        handles=job["handles"],
+    )
+
+    if job["fingerprint"] is not None:
+        rendering_fingerprint.writeShotFingerprint(job["outputFilePath"], job["fingerprint"])
+
+    if job["tempDirToDelete"] is not None:
+        deleteDir(job["tempDirToDelete"])
+
+    job["postProcessingTime"] = time.monotonic() - startTime
+    _logger.info_ext(
+        f"Render Pipeline: Shot {job['shotName']} post-processed in {job['postProcessingTime']:0.2f} sec.",
+        tag="RENDERTIME",
+    )
+    return job["outputFilePath"]
+
+
+class ShotPostProcessingPipeline:
+    """Run the post-processing jobs of the rendered shots, one after the other, in a background thread"""
+
+    def __init__(self, maxPendingShots=2):
+        self.maxPendingShots = max(1, maxPendingShots)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pendingJobs = deque()
+        self.renderedFiles = []
+        self.failedFiles = []
+
+    def submit(self, job, onDone=None):
+        """Add the post-processing job of a rendered shot to the queue. If the queue is full, wait for the oldest job
+        to be done before returning
+        Args:
+            onDone: function called with the job once it is successfully done, on the thread calling the pipeline
+        """
+        while self.maxPendingShots <= len(self._pendingJobs):
+            _logger.debug_ext(f"Render Pipeline: Queue full, waiting for shot {self._pendingJobs[0][0]['shotName']}")
+            self._waitForOldestJob()
+        self._pendingJobs.append((job, self._executor.submit(postProcessShot, job), onDone))
+
+    def _waitForOldestJob(self):
+        job, future, onDone = self._pendingJobs.popleft()
+        try:
+            self.renderedFiles.append(future.result())
+        except Exception as e:
+            _logger.error_ext(f"Render Pipeline: Post-processing of shot {job['shotName']} failed: {e}")
+            self.failedFiles.append(job["outputFilePath"])
+            return
+        if onDone is not None:
+            onDone(job)
+
+    def finish(self):
+        """Wait for all the submitted jobs to be done and stop the background thread
+        Return the lists of the rendered and of the failed video files"""
+        while len(self._pendingJobs):
+            self._waitForOldestJob()
+        self._executor.shutdown(wait=True)
+        return self.renderedFiles, self.failedFiles
@@ -103,7 +103,74 @@ class UAS_ShotManager_RenderSettings(PropertyGroup):
         default=True,
     )
 
-    rerenderExistingShotVideos: BoolProperty(name="Re-render Exisiting Shot Videos", default=True)
+    rerenderExistingShotVideos: BoolProperty(
+        name="Re-render Exisiting Shot Videos",
+        description="Render all the shots again. When disabled, only the shots which animation, camera, range,"
+        "\nStamp Info or render settings changed since their last rendering are rendered again."
+        "\nChanges that are not animated, such as mesh editing or static transformations of objects"
+        "\nother than the camera, are not detected",
+        default=True,
+    )
+
+    # only used by ALL
+    farmNumWorkers: IntProperty(
+        name="Farm Workers",
+        description="Number of background Blender processes rendering the shots in parallel on this computer."
+        "\nThe current file is saved and opened by each process."
+        "\nWhen set to 0 the shots are rendered one after the other in the current Blender session",
+        min=0,
+        soft_max=16,
+        default=0,
+        options=set(),
+    )
+
+    # only used by ALL
+    usePipelinedRendering: BoolProperty(
+        name="Pipelined Post-Processing",
+        description="Generate the Stamp Info images and the video of a shot while the next shot is rendered."
+        "\nRequires the FFmpeg compositing backend. Only used when the output media is a video",
+        default=False,
+        options=set(),
+    )
+
+    # only used by ALL
+    concatWithoutReencoding: BoolProperty(
+        name="Join Shot Videos Without Re-encoding",
+        description="Build the sequence video by copying the streams of the shot videos with FFmpeg instead of"
+        " re-encoding them.\nThe videos are re-encoded if their parameters differ or if they cannot be cut at their"
+        " handles, which is the case of the shot videos composited in the VSE when the handles are not a multiple"
+        " of the key frame interval",
+        default=False,
+        options=set(),
+    )
+
+    # only used by ALL
+    resumeRender: BoolProperty(
+        name="Resume Interrupted Render",
+        description="Resume the previous rendering of the take if it was interrupted, for example by a crash."
+        "\nThe frames and the processing steps of the shots already done, and which files are still on disk,"
+        " are not rendered again.\nThe progress of the rendering is saved only when this option is enabled",
+        default=False,
+        options=set(),
+    )
+
+    # only used by ALL
+    mixdownAudioPerTake: BoolProperty(
+        name="Mix Down Audio Once per Take",
+        description="Mix down the sound of the whole take once, handles included, and extract the sound of each shot"
+        " from it instead of mixing down the sound of each shot",
+        default=False,
+        options=set(),
+    )
+
+    # only used by ALL
+    exportRenderStats: BoolProperty(
+        name="Export Render Statistics",
+        description="Write the render times of the shots and of their frames, the written bytes and the peak disk"
+        " space used by the intermediate files in json and csv files next to the rendered media",
+        default=False,
+        options=set(),
+    )
 
     bypass_rendering_project_settings: BoolProperty(
         name="Bypass Project Settings",
@@ -138,6 +205,23 @@ class UAS_ShotManager_RenderSettings(PropertyGroup):
         "\nIf set to True these files are kept on disk up to the next rendering of the shot",
         default=False,
     )
+    compositingBackend: EnumProperty(
+        name="Compositing Backend",
+        description="Tool used to composite the rendered images with the Stamp Info framing and the sound,"
+        " and to build the sequence videos",
+        items=(
+            ("VSE", "VSE", "Composite the media in a temporary scene of the Video Sequence Editor"),
+            (
+                "FFMPEG",
+                "FFmpeg",
+                "Composite the media with the FFmpeg executable set in the add-on preferences, or found in the system"
+                " PATH. This is faster and does not change the current scene.\nThe VSE is used if FFmpeg is not found",
+            ),
+        ),
+        default="VSE",
+        options=set(),
+    )
+
     # deleteIntermediateFiles: BoolProperty(
     #     name="Delete Intermediate Image Files",
     #     description="Delete the rendered and Stamp Info temporary image files when the composited output is generated."
@@ -229,10 +313,17 @@ class UAS_ShotManager_RenderSettings(PropertyGroup):
         self.renderOtioFile = False
         self.useStampInfo = True
         self.rerenderExistingShotVideos = True
+        self.farmNumWorkers = 0
+        self.usePipelinedRendering = False
+        self.concatWithoutReencoding = False
+        self.resumeRender = False
+        self.exportRenderStats = False
+        self.mixdownAudioPerTake = False
         self.bypass_rendering_project_settings = False
         self.generateImageSequence = False
         self.outputMediaMode = "VIDEO"
         self.keepIntermediateFiles = False
+        self.compositingBackend = "VSE"
         self.generateShotVideo = True
         self.generateEditVideo = False
         self.otioFileType = "XML"
@@ -196,6 +196,7 @@ def renderStampedInfoForShot(
     render_handles=True,
     specificFrame=None,
     stampInfoCustomSettingsDict=None,
+    collectFramesOnly=False,
     verbose=False,
 ):
     """Launch the rendering or the frames of the shot, with Stamp Info
@@ -207,6 +208,10 @@ def renderStampedInfoForShot(
 
     Args:
         resolution: array [width, height], resolution of the image rendered in Blender
+        collectFramesOnly: if True the images are not generated, the function returns the list of the
+            (output file path, frame data) of the frames instead, to be given to
+            infoImage.renderStampedImagesInProcesses(). This allows the generation of the images outside of
+            the main thread
     """
     if not (newTempRenderPath.endswith("/") or newTempRenderPath.endswith("\\")):
         newTempRenderPath += "\\"
@@ -339,19 +344,30 @@ def renderStampedInfoForShot(
     elif not render_handles:
         render_frame_end = shot.end
 
+    # when processes are used the values of each frame are gathered here and the images are generated afterwards
+    numProcesses = config.getAddonPrefs().stampInfo_numProcesses
+    framesToRender = []
+
+    # the scene is evaluated at each frame only if some stamped fields require it
+    frameEvaluator = stampInfoSettings.getStampFrameEvaluator(scene)
+    if verbose:
+        evalModeStr = "full frame evaluation" if frameEvaluator.needsFrameEvaluation else "metadata only"
+        _logger.info_ext(f"Stamp Info evaluation mode: {evalModeStr}")
+
     for f, currentFrame in enumerate(range(render_frame_start, render_frame_end + 1)):
 
         # TODO
         renderStampedInfoForFrame(scene, currentFrame)
 
         # scene.frame_current = currentFrame
-        scene.frame_set(currentFrame)
+        if frameEvaluator.needsFrameEvaluation:
+            scene.frame_set(currentFrame)
 
         # scene.render.filepath = shot.getOutputMediaPath(
         #     rootPath=rootPath, insertTempFolder=True, specificFrame=scene.frame_current
         # )
         scene.render.filepath = shot.getOutputMediaPath(
-            "SH_INTERM_STAMPINFO_SEQ", rootPath=rootPath, specificFrame=scene.frame_current
+            "SH_INTERM_STAMPINFO_SEQ", rootPath=rootPath, specificFrame=currentFrame
         )
         #    shotFilename = shot.getName_PathCompliant()
 
@@ -383,16 +399,36 @@ def renderStampedInfoForShot(
             # txt += f"\n    stampInfoSettings.renderRootPath: {stampInfoSettings.renderRootPath}"
             _logger.info_ext(txt)
 
-        stampInfoSettings.renderTmpImageWithStampedInfo(
-            scene,
-            currentFrame,
-            resolution=resolutionFramed,
-            innerHeight=resolution[1],
-            renderPath=newTempRenderPath,
-            renderFilename=tmpShotFilename,
-            verbose=False,
+        if collectFramesOnly or 0 < numProcesses:
+            framesToRender.append(
+                stampInfoSettings.getStampFrameData(
+                    scene,
+                    currentFrame,
+                    renderPath=newTempRenderPath,
+                    renderFilename=tmpShotFilename,
+                    frameEvaluator=frameEvaluator,
+                )
+            )
+        else:
+            stampInfoSettings.renderTmpImageWithStampedInfo(
+                scene,
+                currentFrame,
+                resolution=resolutionFramed,
+                innerHeight=resolution[1],
+                renderPath=newTempRenderPath,
+                renderFilename=tmpShotFilename,
+                frameEvaluator=frameEvaluator,
+                verbose=False,
+            )
+
+    if len(framesToRender) and not collectFramesOnly:
+        stampInfoSettings.renderTmpImagesWithStampedInfoInProcesses(
+            scene, framesToRender, numProcesses, resolution=resolutionFramed, innerHeight=resolution[1]
         )
 
+    # the static layer of the stamp images is specific to the shot
+    stampInfoSettings.clearStampTemplateLayers()
+
     if verbose:
         txt = "\n------------------------------------------\n"
         _logger.info_ext(txt, col="CYAN")
@@ -407,3 +443,6 @@ def renderStampedInfoForShot(
 
     scene.render.resolution_x = previousResX
     scene.render.resolution_y = previousResY
+
+    if collectFramesOnly:
+        return framesToRender
@@ -0,0 +1,259 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Render statistics: timings and throughput of the rendering of a take
+
+The statistics are collected by launchRenderWithVSEComposite() and contain:
+    - the wall time of each processing stage of each shot (images, stamp, audio, composite) and of the whole job
+    - the render time of each frame, from which histograms are computed. The frames rendered together by an
+      operator which doesn't report them one by one get the average time of their range
+    - the number of bytes written by each shot and by the job
+    - the peak disk space used by the intermediate files
+They can be exported as json or csv files, so that renderings can be compared across versions and computers.
+The statistics of the last rendering are available through the API, in shotmanager.api.render_stats.
+"""
+
+import os
+import csv
+import json
+import time
+import platform
+from pathlib import Path
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# version of the content of the statistics, to increment when it changes
+_statsVersion = 1
+
+# statistics of the last rendering
+_lastRenderStats = None
+
+
+def getLastRenderStats():
+    """Return the RenderStats instance of the last rendering, None if nothing has been rendered yet"""
+    return _lastRenderStats
+
+
+def getRenderStatsFilePath(rootPath, takeName, extension="json", suffix=""):
+    """Return the path of the statistics file of the rendering of the specified take
+    Args:
+        suffix: used to get distinct files for the renderings running in parallel, such as the farm workers
+    """
+    return str(Path(rootPath) / f"_RenderStats_{takeName}{suffix}.{extension}")
+
+
+def getDirSize(dirPath):
+    """Return the size in bytes of the files of the specified directory, 0 if it doesn't exist"""
+    if not os.path.isdir(dirPath):
+        return 0
+    dirSize = 0
+    for entry in os.scandir(dirPath):
+        try:
+            if entry.is_file():
+                dirSize += entry.stat().st_size
+        except OSError:
+            # file deleted in the meantime, by the pipeline for example
+            pass
+    return dirSize
+
+
+def getFilesSize(filePaths):
+    """Return the total size in bytes of the specified files, the missing files being ignored"""
+    filesSize = 0
+    for filePath in filePaths:
+        if filePath is not None and os.path.isfile(filePath):
+            filesSize += os.path.getsize(filePath)
+    return filesSize
+
+
+def computeHistogram(values, numBins=10):
+    """Return the histogram of the values as a list of (bin start, bin end, count)"""
+    if not len(values):
+        return []
+    minValue, maxValue = min(values), max(values)
+    if minValue == maxValue:
+        return [(minValue, maxValue, len(values))]
+    binWidth = (maxValue - minValue) / numBins
+    counts = [0] * numBins
+    for value in values:
+        counts[min(numBins - 1, int((value - minValue) / binWidth))] += 1
+    return [(minValue + i * binWidth, minValue + (i + 1) * binWidth, counts[i]) for i in range(numBins)]
+
+
+class RenderStats:
+    """Timings and throughput of the rendering of a take"""
+
+    def __init__(self, takeName, jobInfo=None):
+        """Args:
+        jobInfo: dictionary describing the rendering, such as the scene and the render mode
+        """
+        global _lastRenderStats
+        _lastRenderStats = self
+
+        self.takeName = takeName
+        self.jobInfo = jobInfo if jobInfo is not None else dict()
+        self.date = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.shots = dict()
+        self.totalTimes = dict()
+        self.bytesWritten = 0
+        self.peakTempDiskUsage = 0
+        self._tempDirs = set()
+
+    def _getShotData(self, shotName):
+        if shotName not in self.shots:
+            self.shots[shotName] = {
+                "stageTimes": dict(),
+                "frameTimes": dict(),
+                "averagedFrames": set(),
+                "bytesWritten": 0,
+            }
+        return self.shots[shotName]
+
+    def addStageTime(self, shotName, stage, duration):
+        """Add the wall time of the processing stage of the shot, in seconds"""
+        stageTimes = self._getShotData(shotName)["stageTimes"]
+        stageTimes[stage] = stageTimes.get(stage, 0.0) + duration
+
+    def addFramesTime(self, shotName, frameStart, frameEnd, duration, measuredFrameTimes=None):
+        """Add the render time of the frames of the range, rendered together in the specified duration
+        Args:
+            measuredFrameTimes: dictionary of the render times of the frames measured one by one. The remaining
+                time of the range is averaged over the other frames
+        """
+        shotData = self._getShotData(shotName)
+        frameTimes = shotData["frameTimes"]
+        measuredFrameTimes = dict() if measuredFrameTimes is None else measuredFrameTimes
+        otherFrames = []
+        otherFramesTime = duration
+        for frame in range(frameStart, frameEnd + 1):
+            if frame in measuredFrameTimes:
+                frameTimes[frame] = measuredFrameTimes[frame]
+                otherFramesTime -= measuredFrameTimes[frame]
+                shotData["averagedFrames"].discard(frame)
+            else:
+                otherFrames.append(frame)
+        for frame in otherFrames:
+            frameTimes[frame] = max(0.0, otherFramesTime) / len(otherFrames)
+        shotData["averagedFrames"].update(otherFrames)
+
+    def setTotalTime(self, name, duration):
+        self.totalTimes[name] = duration
+
+    def addWrittenFiles(self, filePaths, shotName=None):
+        """Add the size of the written files to the bytes written by the job and, if specified, by the shot"""
+        filesSize = getFilesSize(filePaths)
+        self.bytesWritten += filesSize
+        if shotName is not None:
+            self._getShotData(shotName)["bytesWritten"] += filesSize
+
+    def addTempDir(self, dirPath):
+        """Register a directory of intermediate files, taken into account by sampleTempDiskUsage()"""
+        self._tempDirs.add(dirPath)
+
+    def sampleTempDiskUsage(self):
+        """Measure the disk space currently used by the intermediate files and update the peak value"""
+        usage = sum([getDirSize(dirPath) for dirPath in self._tempDirs])
+        self.peakTempDiskUsage = max(self.peakTempDiskUsage, usage)
+        return usage
+
+    def getFrameTimes(self, shotName=None):
+        """Return the list of the render times of the frames of the specified shot, or of all the shots if None"""
+        shotNames = self.shots.keys() if shotName is None else [shotName]
+        return [t for name in shotNames if name in self.shots for t in self.shots[name]["frameTimes"].values()]
+
+    def getFrameTimeHistogram(self, shotName=None, numBins=10):
+        """Return the histogram of the frame render times as a list of (bin start, bin end, count)"""
+        return computeHistogram(self.getFrameTimes(shotName), numBins=numBins)
+
+    def toDict(self):
+        shots = dict()
+        for shotName, shotData in self.shots.items():
+            frameTimes = list(shotData["frameTimes"].values())
+            shots[shotName] = {
+                "stageTimes": shotData["stageTimes"],
+                "numFrames": len(frameTimes),
+                "meanFrameTime": sum(frameTimes) / len(frameTimes) if len(frameTimes) else None,
+                "maxFrameTime": max(frameTimes) if len(frameTimes) else None,
+                "frameTimes": {str(frame): t for frame, t in shotData["frameTimes"].items()},
+                "numAveragedFrames": len(shotData["averagedFrames"]),
+                "frameTimeHistogram": self.getFrameTimeHistogram(shotName),
+                "bytesWritten": shotData["bytesWritten"],
+            }
+
+        return {
+            "version": _statsVersion,
+            "date": self.date,
+            "take": self.takeName,
+            "job": self.jobInfo,
+            "machine": {"node": platform.node(), "platform": platform.platform(), "cpuCount": os.cpu_count()},
+            "totalTimes": self.totalTimes,
+            "bytesWritten": self.bytesWritten,
+            "peakTempDiskUsage": self.peakTempDiskUsage,
+            "frameTimeHistogram": self.getFrameTimeHistogram(),
+            "shots": shots,
+        }
+
+    def exportJson(self, filePath):
+        try:
+            with open(filePath, "w") as f:
+                json.dump(self.toDict(), f, indent=4)
+        except Exception:
+            _logger.error_ext(f"Cannot write render statistics file: {filePath}")
+            return False
+        return True
+
+    def exportCsv(self, filePath):
+        """Write one row per shot with its stage times, frame times and written bytes"""
+        stages = []
+        for shotData in self.shots.values():
+            stages.extend([stage for stage in shotData["stageTimes"] if stage not in stages])
+
+        try:
+            with open(filePath, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["shot"] + stages + ["numFrames", "meanFrameTime", "maxFrameTime", "bytesWritten"])
+                for shotName, shotValues in self.toDict()["shots"].items():
+                    writer.writerow(
+                        [shotName]
+                        + [shotValues["stageTimes"].get(stage, "") for stage in stages]
+                        + [
+                            shotValues["numFrames"],
+                            shotValues["meanFrameTime"],
+                            shotValues["maxFrameTime"],
+                            shotValues["bytesWritten"],
+                        ]
+                    )
+        except Exception:
+            _logger.error_ext(f"Cannot write render statistics file: {filePath}")
+            return False
+        return True
+
+    def export(self, rootPath, suffix=""):
+        """Write the statistics as json and csv files in the specified folder
+        Return the list of the written files"""
+        writtenFiles = []
+        jsonFilePath = getRenderStatsFilePath(rootPath, self.takeName, extension="json", suffix=suffix)
+        if self.exportJson(jsonFilePath):
+            writtenFiles.append(jsonFilePath)
+        csvFilePath = getRenderStatsFilePath(rootPath, self.takeName, extension="csv", suffix=suffix)
+        if self.exportCsv(csvFilePath):
+            writtenFiles.append(csvFilePath)
+        return writtenFiles
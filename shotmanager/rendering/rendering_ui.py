@@ -425,13 +425,14 @@ def draw3DRenderPanel(self, context):
     subRow.alignment = "LEFT"
     subRow.prop(props.renderContext, "renderHardwareMode", text="Mode")
 
-    if config.devDebug:
-        # row.alignment = "LEFT"
-        # row.separator(factor=2)
-        subRow = row.row(align=False)
-        subRow.alignment = "RIGHT"
-        subRow.label(text="Iteration (dev.):")
-        subRow.prop(props.renderContext, "renderFrameIterationMode", text="")
+    # row.alignment = "LEFT"
+    # row.separator(factor=2)
+    subRow = row.row(align=False)
+    subRow.alignment = "RIGHT"
+    subRow.label(text="Iteration:")
+    subRow.prop(props.renderContext, "renderFrameIterationMode", text="")
+    if "LOOP" == props.renderContext.renderFrameIterationMode:
+        subRow.prop(props.renderContext, "renderFrameChunkSize", text="Chunk")
 
     # row.prop(bpy.context.scene.render, "engine", text="Engine")
 
@@ -648,6 +649,10 @@ def draw3DRenderPanel(self, context):
             row.label(text="Resolution %:")
             row.prop(props.renderSettingsAnim, "resolutionPercentage", text="")
 
+            row = col.row()
+            row.label(text="Compositing:")
+            row.prop(props.renderSettingsAnim, "compositingBackend", text="")
+
             _separatorRow(bypassItemsCol)
 
             itemsRow = bypassItemsCol.row()
@@ -711,6 +716,10 @@ def draw3DRenderPanel(self, context):
             row.label(text="Resolution %:")
             row.prop(props.renderSettingsAll, "resolutionPercentage", text="")
 
+            row = col.row()
+            row.label(text="Compositing:")
+            row.prop(props.renderSettingsAll, "compositingBackend", text="")
+
             _separatorRow(bypassItemsCol)
 
             itemsRow = bypassItemsCol.row()
@@ -734,6 +743,21 @@ def draw3DRenderPanel(self, context):
         row.prop(props.renderSettingsAll, "renderAllTakes")
         row.prop(props.renderSettingsAll, "renderAlsoDisabled")
 
+        row = col.row()
+        row.prop(props.renderSettingsAll, "farmNumWorkers")
+        row = col.row()
+        row.enabled = "FFMPEG" == props.renderSettingsAll.compositingBackend
+        row.prop(props.renderSettingsAll, "usePipelinedRendering")
+        row = col.row()
+        row.enabled = "VIDEO" in props.renderSettingsAll.outputMediaMode
+        row.prop(props.renderSettingsAll, "concatWithoutReencoding")
+        row = col.row()
+        row.prop(props.renderSettingsAll, "mixdownAudioPerTake")
+        row = col.row()
+        row.prop(props.renderSettingsAll, "resumeRender")
+        row = col.row()
+        row.prop(props.renderSettingsAll, "exportRenderStats")
+
         openButEnabled = not (display_bypass_options and "IMAGE_SEQ" == props.renderSettingsAll.outputMediaMode)
         openButEnabled = openButEnabled and not props.renderSettingsAll.renderAllTakes
         drawAfterRendering(props.renderSettingsAll, box, openButEnabled=openButEnabled)
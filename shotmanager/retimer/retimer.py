@@ -20,9 +20,15 @@ Retimer functions
 """
 
 import bpy
+import time
 
 from shotmanager.utils.utils_markers import sortMarkers
 
+from .retimer_batch import retime_fCurve_frames_batch, retime_GPframes_batch
+from .retimer_batch import getKeyTimes, computeNewKeyTimes, getGPFrameNumbers, computeNewGPFrameNumbers
+from .retimer_batch import countChangedTimes, countCollisions
+from .retimer_report import RetimeReport
+
 from shotmanager.config import config
 from shotmanager.config import sm_logging
 
@@ -1065,6 +1071,80 @@ def retime_vse(scene, mode, start_frame, end_frame, remove_gap=True):
         remove_time(sed, start_frame, end_frame, remove_gap)
 
 
+def getRetimeModeAndRange(retimeMode, start_incl, duration_incl):
+    """Convert the retime mode of retimeScene() to the mode used by the retime functions of the entities
+    Return the tupple (mode, start_incl, end_incl)
+    """
+    mode = retimeMode
+    if "GLOBAL_OFFSET" == retimeMode:
+        if 0 < duration_incl:
+            mode = "INSERT"
+        else:
+            mode = "DELETE"
+            duration_incl = -1 * duration_incl
+
+    end_incl = start_incl + duration_incl - 1
+    return (mode, start_incl, end_incl)
+
+
+def collectRetimeTargets(objects, retimerApplyToSettings):
+    """Gather the animated data of the specified objects that has to be retimed, without modifying it.
+    Actions can be linked to several objects, data blocks or materials so each of them is collected only once.
+    Return a dictionary with:
+        "ACTIONS": a dictionary of the lists of unique actions per category (OBJECTS, DATA, SHAPE_KEYS, MATERIALS,
+                   NODE_TREES, GREASE_PENCIL)
+        "GREASE_PENCIL": the list of the grease pencil objects
+    """
+    actionsPerCategory = {
+        "OBJECTS": [],
+        "DATA": [],
+        "SHAPE_KEYS": [],
+        "MATERIALS": [],
+        "NODE_TREES": [],
+        "GREASE_PENCIL": [],
+    }
+    gpObjects = []
+
+    actionsDone = set()
+    materialsDone = set()
+
+    def _addAction(animatedID, category):
+        if animatedID is None or animatedID.animation_data is None:
+            return
+        action = animatedID.animation_data.action
+        if action is not None and action not in actionsDone:
+            actionsDone.add(action)
+            actionsPerCategory[category].append(action)
+
+    for obj in objects:
+        # standard object keyframes
+        if retimerApplyToSettings.applyToObjects and obj.type != "GPENCIL":
+            _addAction(obj, "OBJECTS")
+
+            # data animation
+            _addAction(obj.data, "DATA")
+
+            # shape keys
+            if retimerApplyToSettings.applyToShapeKeys and obj.type == "MESH":
+                _addAction(obj.data.shape_keys, "SHAPE_KEYS")
+
+            # animated materials
+            for matSlot in obj.material_slots:
+                if matSlot is not None:
+                    mat = matSlot.material
+                    if mat is not None and mat not in materialsDone:
+                        materialsDone.add(mat)
+                        _addAction(mat, "MATERIALS")
+                        _addAction(mat.node_tree, "NODE_TREES")
+
+        # grease pencil
+        if retimerApplyToSettings.applytToGreasePencil and obj.type == "GPENCIL":
+            _addAction(obj, "GREASE_PENCIL")
+            gpObjects.append(obj)
+
+    return {"ACTIONS": actionsPerCategory, "GREASE_PENCIL": gpObjects}
+
+
 def retimeScene(
     *,
     context,
@@ -1078,6 +1158,7 @@ def retimeScene(
     pivot=0,
     keysBeforeRangeMode="DO_NOTHING",
     keysAfterRangeMode="DO_NOTHING",
+    dryRun=False,
 ):
     """Apply the time change for each type of entities
     Args:
@@ -1086,21 +1167,33 @@ def retimeScene(
         duration_incl (int): The range of retime frames (new or deleted)
         keysBeforeRangeMode: Action to do on keys located before the specified time range. Can be DO_NOTHING, OFFSET, RESCALE, SNAP
         keysAfterRangeMode: Action to do on keys located after the specified time range. Can be NOTHING, OFFSET, RESCALE, SNAP
+        dryRun: if True the scene is not modified and the changes that would be done are returned instead
+    Return a RetimeReport instance with the number of retimed entities and the time spent per category,
+    or a RetimePreview instance if dryRun is True
     """
+    if dryRun:
+        from .retimer_preview import previewRetimeScene
+
+        return previewRetimeScene(
+            context=context,
+            retimeMode=retimeMode,
+            retimerApplyToSettings=retimerApplyToSettings,
+            objects=objects,
+            start_incl=start_incl,
+            duration_incl=duration_incl,
+            join_gap=join_gap,
+            factor=factor,
+            pivot=pivot,
+            keysBeforeRangeMode=keysBeforeRangeMode,
+            keysAfterRangeMode=keysAfterRangeMode,
+        )
+
     # prefs = config.getAddonPrefs()
     scene = context.scene
 
     current_frame = scene.frame_current
 
-    mode = retimeMode
-    if "GLOBAL_OFFSET" == retimeMode:
-        if 0 < duration_incl:
-            mode = "INSERT"
-        else:
-            mode = "DELETE"
-            duration_incl = -1 * duration_incl
-
-    end_incl = start_incl + duration_incl - 1
+    mode, start_incl, end_incl = getRetimeModeAndRange(retimeMode, start_incl, duration_incl)
 
     # duration_incl: {duration_incl}
     print(f" - retimeScene(): {retimeMode}, str_inc:{start_incl}, ed_inc:{end_incl}, pivot:{pivot}, factor:{factor}")
@@ -1110,98 +1203,94 @@ def retimeScene(
     retime_args = (mode, start_incl, end_incl, join_gap, factor, pivot)
     #    print("retime_args: ", retime_args)
 
-    # Actions can be linked so we must make sure to only retime them once
-    actions_done = set()
-    action_tmp = bpy.data.actions.new("Retimer_TmpAction")
-
-    def _retimeFcurve(action, addActionToDone=True):
-        if action is not None and action not in actions_done:
-            # wkip can we have animated properties that are not actions?
-            for fcurve in action.fcurves:
-                if not fcurve.lock or retimerApplyToSettings.includeLockAnim:
+    report = RetimeReport()
+
+    # collection phase: actions can be linked so we must make sure to only retime them once
+    report.startTiming("COLLECTION")
+    retimeTargets = collectRetimeTargets(objects, retimerApplyToSettings)
+    report.stopTiming("COLLECTION")
+
+    def _retimeFcurve(action, category):
+        # wkip can we have animated properties that are not actions?
+        numCurves = 0
+        numKeys = 0
+        for fcurve in action.fcurves:
+            if not fcurve.lock or retimerApplyToSettings.includeLockAnim:
+                numCurves += 1
+                if retimerApplyToSettings.useBatchRetime:
+                    numKeys += retime_fCurve_frames_batch(
+                        fcurve, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
+                    )
+                else:
+                    # the changes are computed before the retime since retime_fCurve_frames() doesn't return them
+                    if len(fcurve.keyframe_points):
+                        keyTimes = getKeyTimes(fcurve.keyframe_points)
+                        numKeys += countChangedTimes(
+                            keyTimes,
+                            computeNewKeyTimes(
+                                keyTimes, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
+                            ),
+                        )
                     retime_fCurve_frames(
                         FCurve(fcurve), *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
                     )
-            # NOTE: wkip keep the test??
-            if addActionToDone:
-                actions_done.add(action)
-            # _logger.debug_ext(f"_retimerFcurve: actions_done len: {len(actions_done)}")
+        report.add(category, actions=1, curves=numCurves, keys=numKeys)
 
-    sceneMaterials = []
-    for obj in objects:
-        # print(f"Retiming object named: {obj.name}")
+    # apply phase: standard object keyframes, data, shape keys and animated materials
+    for category, actions in retimeTargets["ACTIONS"].items():
+        report.startTiming(category)
+        for action in actions:
+            _retimeFcurve(action, category)
+        report.stopTiming(category)
 
-        # standard object keyframes
-        if retimerApplyToSettings.applyToObjects:
-            if obj.type != "GPENCIL":
-                if obj.animation_data is not None:
-                    _retimeFcurve(obj.animation_data.action)
-
-                # data animation
-                if obj.data is not None and obj.data.animation_data is not None:
-                    _retimeFcurve(obj.data.animation_data.action)
-
-                # shape keys
-                if retimerApplyToSettings.applyToShapeKeys:
-                    if (
-                        obj.type == "MESH"
-                        and obj.data.shape_keys is not None
-                        and obj.data.shape_keys.animation_data is not None
-                    ):
-                        _retimeFcurve(obj.data.shape_keys.animation_data.action)
-
-                # animated materials
-                for matSlot in obj.material_slots:
-                    if matSlot is not None:
-                        mat = matSlot.material
-                        if mat is not None and mat not in sceneMaterials:
-                            sceneMaterials.append(mat)
-                            if mat.animation_data is not None and mat.animation_data.action is not None:
-                                _retimeFcurve(mat.animation_data.action)
-                            if (
-                                mat.node_tree.animation_data is not None
-                                and mat.node_tree.animation_data.action is not None
-                            ):
-                                _retimeFcurve(mat.node_tree.animation_data.action)
+    # grease pencil
+    report.startTiming("GREASE_PENCIL")
+    action_tmp = None
+    for obj in retimeTargets["GREASE_PENCIL"]:
+        action_tmp_added = False
 
-        # grease pencil
-        if retimerApplyToSettings.applytToGreasePencil:
-            #    retime_args = (mode, start_incl, end_incl, join_gap, factor, pivot)
-
-            if obj.type == "GPENCIL":
-                action_tmp_added = False
-
-                if obj.animation_data is None:
-                    obj.animation_data_create()
-
-                if obj.animation_data is not None:
-                    # when a stroke has no transform animation it has no action and because of a bug
-                    # the stroke frames are not updated. As a turnaround we force an action and
-                    # remove it afterward
-                    if obj.animation_data.action is None:
-                        obj.animation_data.action = action_tmp
-                        action_tmp_added = True
-
-                    _retimeFcurve(obj.animation_data.action, addActionToDone=not action_tmp_added)
-                    # action = obj.animation_data.action
-                    # if action is not None and action not in actions_done:
-                    #     for fcurve in action.fcurves:
-                    #         if not fcurve.lock or retimerApplyToSettings.includeLockAnim:
-                    #             retime_fCurve_frames(FCurve(fcurve), *retime_args, roundToNearestFrame)
-                    #     if not action_tmp_added:
-                    #         actions_done.add(action)
-
-                for layer in obj.data.layers:
-                    #    print(f"Treating GP object: {obj.name} layer: {layer}")
-                    if not layer.lock or retimerApplyToSettings.includeLockAnim:
-                        retime_GPframes(
-                            layer, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
+        if obj.animation_data is None:
+            obj.animation_data_create()
+
+        if obj.animation_data is not None:
+            # when a stroke has no transform animation it has no action and because of a bug
+            # the stroke frames are not updated. As a turnaround we force an action and
+            # remove it afterward
+            if obj.animation_data.action is None:
+                if action_tmp is None:
+                    action_tmp = bpy.data.actions.new("Retimer_TmpAction")
+                obj.animation_data.action = action_tmp
+                action_tmp_added = True
+
+        for layer in obj.data.layers:
+            #    print(f"Treating GP object: {obj.name} layer: {layer}")
+            if not layer.lock or retimerApplyToSettings.includeLockAnim:
+                numFrames = len(layer.frames)
+                layerStartTime = time.monotonic()
+                if retimerApplyToSettings.useBatchRetime:
+                    numModifiedFrames, numCollisions = retime_GPframes_batch(
+                        layer, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
+                    )
+                else:
+                    # the changes are computed before the retime since retime_GPframes() doesn't return them
+                    numModifiedFrames, numCollisions = 0, 0
+                    if numFrames:
+                        frameNumbers = getGPFrameNumbers(layer)
+                        newFrameNumbers = computeNewGPFrameNumbers(
+                            frameNumbers, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
                         )
+                        numModifiedFrames = countChangedTimes(frameNumbers, newFrameNumbers)
+                        numCollisions = countCollisions(frameNumbers, newFrameNumbers)
+                    retime_GPframes(layer, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode)
+                report.add("GREASE_PENCIL", gpLayers=1, gpFrames=numModifiedFrames, gpCollisions=numCollisions)
+                report.addGPLayerTiming(f"{obj.name}: {layer.info}", numFrames, time.monotonic() - layerStartTime)
 
-                if action_tmp_added:
-                    obj.animation_data.action = None
+        if action_tmp_added:
+            obj.animation_data.action = None
+    report.stopTiming("GREASE_PENCIL")
 
-        # force an update on the actions (cause bug. Other approach would be to save the file and reload it)
+    # force an update on the actions (cause bug. Other approach would be to save the file and reload it)
+    for obj in objects:
         if obj.animation_data is not None:
             if obj.animation_data.action is not None:
                 action_backup = obj.animation_data.action
@@ -1212,7 +1301,9 @@ def retimeScene(
     # no operation for CLEAR_ANIM
     if "CLEAR_ANIM" != mode:
         if retimerApplyToSettings.applyToVSE:
+            report.startTiming("VSE")
             retime_vse(scene, mode, start_incl, end_incl)
+            report.stopTiming("VSE")
 
     # Shot ranges
     if retimerApplyToSettings.applyToCameraShotRanges:
@@ -1220,12 +1311,16 @@ def retimeScene(
         shotList = props.getShotsList(ignoreDisabled=False)
 
         if "CLEAR_ANIM" != mode:
+            report.startTiming("SHOT_RANGES")
             for shot in shotList:
                 retime_shot(shot, *retime_args)
+            report.stopTiming("SHOT_RANGES")
 
     # markers
     if retimerApplyToSettings.applyToMarkers:
+        report.startTiming("MARKERS")
         retime_markers(scene, *retime_args, roundToNearestFrame)
+        report.stopTiming("MARKERS")
 
     # anim range
     # NOTE: end_incl = start_incl + duration_incl - 1  <=>  duration_incl = end_incl - start_incl + 1
@@ -1318,4 +1413,6 @@ def retimeScene(
     # id_delete: Deleting ACRetimer_TmpAction which still has 1 users (including 0 'extra' shallow users)
     # bpy.data.actions.remove(action_tmp)
 
-    return ()
+    report.printReport()
+
+    return report
@@ -51,6 +51,14 @@ class UAS_Retimer_ApplyToSettings(PropertyGroup):
         default=True,
         options=set(),
     )
+    useBatchRetime: BoolProperty(
+        name="Batch Retime",
+        description="Retime all the keys of each animation curve and all the frames of each Grease Pencil layer"
+        "\nat once instead of one by one."
+        "\nMuch faster on heavily animated scenes. Disable it to use the key by key reference implementation",
+        default=True,
+        options=set(),
+    )
 
     applyToObjects: BoolProperty(
         name="Objects",
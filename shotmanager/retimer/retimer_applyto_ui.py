@@ -137,6 +137,7 @@ def drawApplyTo(context, retimerProps, layout):
             row = propCol.row(align=True)
             row.separator(factor=0.7)
             row.prop(retimerApplyToSettings, "snapKeysToFrames", text="Snap Keys to Frames")
+            row.prop(retimerApplyToSettings, "useBatchRetime", text="Batch Retime")
 
         propRow = propCol.row()
         propRow.alert = config.devDebug and "LEGACY" != retimerApplyToSettings.id
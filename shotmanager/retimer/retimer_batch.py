@@ -0,0 +1,466 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Batched retime functions
+
+The keys of an fcurve and the frames of a grease pencil layer are read at once with foreach_get, retimed
+as arrays and written back with foreach_set. The results match the ones of the per-key functions of retimer.py,
+which are kept as the reference implementation. This is checked by retimer_batch_check.py, run from the debug panel.
+"""
+
+import numpy as np
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+##########################################################################
+# fcurve keys data
+##########################################################################
+
+
+def getKeysData(keyframe_points):
+    """Return the arrays of the keys coordinates, left handles and right handles of the keyframe points,
+    each of shape (number of keys, 2)
+    """
+    numKeys = len(keyframe_points)
+    co = np.empty(numKeys * 2, dtype=np.float32)
+    handlesLeft = np.empty(numKeys * 2, dtype=np.float32)
+    handlesRight = np.empty(numKeys * 2, dtype=np.float32)
+    keyframe_points.foreach_get("co", co)
+    keyframe_points.foreach_get("handle_left", handlesLeft)
+    keyframe_points.foreach_get("handle_right", handlesRight)
+
+    # computation is done in double precision, values are stored in simple precision by Blender
+    return (
+        co.reshape(-1, 2).astype(np.float64),
+        handlesLeft.reshape(-1, 2).astype(np.float64),
+        handlesRight.reshape(-1, 2).astype(np.float64),
+    )
+
+
+def getKeyTimes(keyframe_points):
+    """Return the array of the times of the keyframe points, without their values and handles"""
+    co = np.empty(len(keyframe_points) * 2, dtype=np.float32)
+    keyframe_points.foreach_get("co", co)
+    return co[0::2].astype(np.float64)
+
+
+def setKeysData(keyframe_points, co, handlesLeft, handlesRight):
+    """Write back the arrays returned by getKeysData to the keyframe points"""
+    keyframe_points.foreach_set("co", co.astype(np.float32).ravel())
+    keyframe_points.foreach_set("handle_left", handlesLeft.astype(np.float32).ravel())
+    keyframe_points.foreach_set("handle_right", handlesRight.astype(np.float32).ravel())
+
+
+##########################################################################
+# key times computation
+##########################################################################
+
+
+def _getChangeModes(keyTimes, start_incl, end_incl, inRangeMode, keysBeforeRangeMode, keysAfterRangeMode):
+    """Return the array of the change mode of each key according to its position relatively to the range"""
+    changeModes = np.full(len(keyTimes), inRangeMode, dtype=object)
+    changeModes[keyTimes < start_incl] = keysBeforeRangeMode
+    changeModes[end_incl < keyTimes] = keysAfterRangeMode
+    return changeModes
+
+
+def _offsetKeys(co, handlesLeft, handlesRight, mask, newKeyTimes):
+    """Move the masked keys to their new time, their handles being moved by the same offset"""
+    offsets = newKeyTimes[mask] - co[mask, 0]
+    co[mask, 0] = newKeyTimes[mask]
+    handlesLeft[mask, 0] += offsets
+    handlesRight[mask, 0] += offsets
+
+
+def computeOffsetKeyTimes(keyTimes, start_incl, offset, roundToNearestFrame=True):
+    """Return the new key times and the mask of the moved keys when keys starting at start_incl are offset"""
+    mask = start_incl <= keyTimes
+    newKeyTimes = keyTimes.copy()
+    newKeyTimes[mask] = keyTimes[mask] + offset
+    if roundToNearestFrame:
+        newKeyTimes[mask] = np.round(newKeyTimes[mask])
+    return (newKeyTimes, mask)
+
+
+def computeRescaleKeyTimes(
+    keyTimes,
+    start_incl,
+    end_incl,
+    factor,
+    pivot,
+    roundToNearestFrame=True,
+    keysBeforeRangeMode="DO_NOTHING",
+    keysAfterRangeMode="DO_NOTHING",
+):
+    """Return the new key times, the mask of the rescaled keys and the mask of the offset keys"""
+    changeModes = _getChangeModes(keyTimes, start_incl, end_incl, "RESCALE", keysBeforeRangeMode, keysAfterRangeMode)
+    rescaleMask = changeModes == "RESCALE"
+    offsetMask = changeModes == "OFFSET"
+
+    newKeyTimes = keyTimes.copy()
+    newKeyTimes[rescaleMask] = pivot + (keyTimes[rescaleMask] - pivot) * factor
+
+    offsetBefore = (pivot - start_incl) * (1.0 - factor)
+    offsetAfter = (pivot - end_incl) * (1.0 - factor)
+    offsets = np.where(keyTimes < start_incl, offsetBefore, offsetAfter)
+    newKeyTimes[offsetMask] = keyTimes[offsetMask] + offsets[offsetMask]
+
+    if roundToNearestFrame:
+        newKeyTimes[rescaleMask | offsetMask] = np.round(newKeyTimes[rescaleMask | offsetMask])
+
+    return (newKeyTimes, rescaleMask, offsetMask)
+
+
+def computeSnapKeyTimes(
+    keyTimes, start_incl, end_incl, keysBeforeRangeMode="DO_NOTHING", keysAfterRangeMode="DO_NOTHING"
+):
+    """Return the new key times and the mask of the snapped keys"""
+    changeModes = _getChangeModes(keyTimes, start_incl, end_incl, "SNAP", keysBeforeRangeMode, keysAfterRangeMode)
+    mask = changeModes == "SNAP"
+    newKeyTimes = keyTimes.copy()
+    newKeyTimes[mask] = np.round(keyTimes[mask])
+    return (newKeyTimes, mask)
+
+
+def computeNewKeyTimes(
+    keyTimes,
+    mode,
+    start_incl=0,
+    end_incl=0,
+    remove_gap=True,
+    factor=1.0,
+    pivot=0,
+    roundToNearestFrame=True,
+    keysBeforeRangeMode="DO_NOTHING",
+    keysAfterRangeMode="DO_NOTHING",
+):
+    """Return the times the keys would have after retime_fCurve_frames_batch(), without modifying anything.
+    Removed keys get NaN as new time. Keys added by FREEZE are not part of the result.
+    """
+    if mode == "INSERT":
+        newKeyTimes, _mask = computeOffsetKeyTimes(keyTimes, start_incl, end_incl - start_incl + 1, roundToNearestFrame)
+
+    elif mode == "DELETE" or mode == "CLEAR_ANIM":
+        newKeyTimes = keyTimes.copy()
+        if remove_gap:
+            newKeyTimes, _mask = computeOffsetKeyTimes(keyTimes, end_incl, start_incl - end_incl - 1, True)
+        newKeyTimes[(start_incl <= keyTimes) & (keyTimes <= end_incl)] = np.nan
+
+    elif mode == "RESCALE":
+        newKeyTimes, _rescaleMask, _offsetMask = computeRescaleKeyTimes(
+            keyTimes,
+            start_incl,
+            end_incl,
+            factor,
+            pivot,
+            roundToNearestFrame=roundToNearestFrame,
+            keysBeforeRangeMode=keysBeforeRangeMode,
+            keysAfterRangeMode=keysAfterRangeMode,
+        )
+
+    elif mode == "SNAP":
+        newKeyTimes, _mask = computeSnapKeyTimes(
+            keyTimes, start_incl, end_incl, keysBeforeRangeMode, keysAfterRangeMode
+        )
+
+    elif mode == "FREEZE":
+        newKeyTimes, _mask = computeOffsetKeyTimes(keyTimes, start_incl, end_incl - start_incl, False)
+
+    else:
+        newKeyTimes = keyTimes.copy()
+
+    return newKeyTimes
+
+
+def countChangedTimes(oldTimes, newTimes):
+    """Return the number of entities that would be moved or removed (NaN new time) by the retime"""
+    return int(np.count_nonzero(oldTimes != newTimes))
+
+
+def countCollisions(oldTimes, newTimes):
+    """Return the number of entities that would share their new time with another entity of the same set,
+    removed entities (NaN new time) and entities already sharing their time before the retime being ignored
+    """
+    keptMask = ~np.isnan(newTimes)
+    numKept = np.count_nonzero(keptMask)
+    if numKept < 2:
+        return 0
+    numNewDuplicates = numKept - len(np.unique(newTimes[keptMask]))
+    numOldDuplicates = numKept - len(np.unique(oldTimes[keptMask]))
+    return max(0, int(numNewDuplicates - numOldDuplicates))
+
+
+##########################################################################
+# fcurve retime
+##########################################################################
+
+
+def _rescale_fCurve_keys(co, handlesLeft, handlesRight, rescaleMask, newKeyTimes, start_incl, end_incl, factor, pivot):
+    """Move the rescaled keys and scale their handles so that they follow the final move of the key,
+    rounding included. Same behavior as retimer._rescale_fCurve_frames()
+    """
+    keyTimes = co[:, 0]
+
+    # keys not on the pivot: the handles are scaled by the factor corresponding to the rounded move of the key
+    notOnPivot = rescaleMask & (keyTimes != pivot)
+    roundedFactors = np.ones(len(keyTimes))
+    roundedFactors[notOnPivot] = (newKeyTimes[notOnPivot] - pivot) / (keyTimes[notOnPivot] - pivot)
+    handlesLeft[notOnPivot, 0] = pivot + (handlesLeft[notOnPivot, 0] - pivot) * roundedFactors[notOnPivot]
+    handlesRight[notOnPivot, 0] = pivot + (handlesRight[notOnPivot, 0] - pivot) * roundedFactors[notOnPivot]
+
+    # keys on the pivot: only the handles inside the range are scaled
+    onPivot = rescaleMask & (keyTimes == pivot)
+    leftMask = onPivot & (start_incl < handlesLeft[:, 0])
+    rightMask = onPivot & (handlesRight[:, 0] < end_incl)
+    handlesLeft[leftMask, 0] = pivot + (handlesLeft[leftMask, 0] - pivot) * factor
+    handlesRight[rightMask, 0] = pivot + (handlesRight[rightMask, 0] - pivot) * factor
+
+    co[rescaleMask, 0] = newKeyTimes[rescaleMask]
+
+
+def retime_fCurve_frames_batch(
+    fcurve,
+    mode,
+    start_incl=0,
+    end_incl=0,
+    remove_gap=True,
+    factor=1.0,
+    pivot=0,
+    roundToNearestFrame=True,
+    keysBeforeRangeMode="DO_NOTHING",
+    keysAfterRangeMode="DO_NOTHING",
+):
+    """Batched equivalent of retimer.retime_fCurve_frames(). Works directly on a Blender fcurve.
+    Args:
+        mode: Can be INSERT, DELETE, RESCALE, CLEAR_ANIM, SNAP, FREEZE
+        start_incl (int): The included start frame
+        end_incl (int): The included end frame
+        keysBeforeRangeMode: Action to do on keys located before the specified time range.
+            Can be DO_NOTHING, OFFSET, RESCALE, SNAP
+        keysAfterRangeMode: Action to do on keys located after the specified time range.
+            Can be DO_NOTHING, OFFSET, RESCALE, SNAP
+    Return the number of keys moved or removed, the keys added by FREEZE being ignored, as counted by
+    countChangedTimes() on the result of computeNewKeyTimes()
+    """
+    keyframe_points = fcurve.keyframe_points
+    if not len(keyframe_points):
+        return 0
+
+    # the keys are written back when some of them or of their handles are modified
+    keysModified = False
+    co, handlesLeft, handlesRight = getKeysData(keyframe_points)
+    keyTimes = co[:, 0].copy()
+
+    if mode == "INSERT":
+        newKeyTimes, mask = computeOffsetKeyTimes(keyTimes, start_incl, end_incl - start_incl + 1, roundToNearestFrame)
+        _offsetKeys(co, handlesLeft, handlesRight, mask, newKeyTimes)
+        keysModified = np.any(mask)
+        numChangedKeys = countChangedTimes(keyTimes, newKeyTimes)
+
+    elif mode == "DELETE" or mode == "CLEAR_ANIM":
+        removedIndices = np.flatnonzero((start_incl <= keyTimes) & (keyTimes <= end_incl))
+        numChangedKeys = len(removedIndices)
+        if numChangedKeys:
+            # removal from the end to keep the indices valid, the curve is recomputed once afterward
+            for i in reversed(removedIndices):
+                keyframe_points.remove(keyframe_points[int(i)], fast=True)
+            fcurve.update()
+
+        if not remove_gap or not len(keyframe_points):
+            return numChangedKeys
+
+        # as in the reference implementation the gap removal always rounds the key times
+        co, handlesLeft, handlesRight = getKeysData(keyframe_points)
+        keptKeyTimes = co[:, 0].copy()
+        newKeyTimes, mask = computeOffsetKeyTimes(keptKeyTimes, end_incl, start_incl - end_incl - 1, True)
+        _offsetKeys(co, handlesLeft, handlesRight, mask, newKeyTimes)
+        keysModified = np.any(mask)
+        numChangedKeys += countChangedTimes(keptKeyTimes, newKeyTimes)
+
+    elif mode == "RESCALE":
+        newKeyTimes, rescaleMask, offsetMask = computeRescaleKeyTimes(
+            keyTimes,
+            start_incl,
+            end_incl,
+            factor,
+            pivot,
+            roundToNearestFrame=roundToNearestFrame,
+            keysBeforeRangeMode=keysBeforeRangeMode,
+            keysAfterRangeMode=keysAfterRangeMode,
+        )
+        _rescale_fCurve_keys(
+            co, handlesLeft, handlesRight, rescaleMask, newKeyTimes, start_incl, end_incl, factor, pivot
+        )
+        _offsetKeys(co, handlesLeft, handlesRight, offsetMask, newKeyTimes)
+        # the handles of the key on the pivot can be scaled even if the key doesn't move
+        keysModified = np.any(rescaleMask | offsetMask)
+        numChangedKeys = countChangedTimes(keyTimes, newKeyTimes)
+
+    elif mode == "SNAP":
+        newKeyTimes, mask = computeSnapKeyTimes(keyTimes, start_incl, end_incl, keysBeforeRangeMode, keysAfterRangeMode)
+        _offsetKeys(co, handlesLeft, handlesRight, mask, newKeyTimes)
+        keysModified = np.any(mask)
+        numChangedKeys = countChangedTimes(keyTimes, newKeyTimes)
+
+    elif mode == "FREEZE":
+        frozenKeys = np.flatnonzero(keyTimes == start_incl)
+        frozenValues = co[frozenKeys, 1].copy()
+        newKeyTimes, mask = computeOffsetKeyTimes(keyTimes, start_incl, end_incl - start_incl, False)
+        _offsetKeys(co, handlesLeft, handlesRight, mask, newKeyTimes)
+        setKeysData(keyframe_points, co, handlesLeft, handlesRight)
+
+        # the key at the start of the frozen range is duplicated
+        for value in frozenValues:
+            keyframe_points.insert(start_incl, value, options={"FAST"})
+        fcurve.update()
+        return countChangedTimes(keyTimes, newKeyTimes)
+
+    else:
+        return 0
+
+    if keysModified:
+        setKeysData(keyframe_points, co, handlesLeft, handlesRight)
+
+        # keys have to stay sorted in time for the curve evaluation
+        if np.any(np.diff(co[:, 0]) < 0):
+            fcurve.update()
+
+    return numChangedKeys
+
+
+##########################################################################
+# grease pencil frames
+##########################################################################
+
+
+def getGPFrameNumbers(layer):
+    """Return the array of the frame numbers of the frames of the grease pencil layer"""
+    frameNumbers = np.empty(len(layer.frames), dtype=np.int32)
+    layer.frames.foreach_get("frame_number", frameNumbers)
+    return frameNumbers.astype(np.float64)
+
+
+def computeNewGPFrameNumbers(
+    frameNumbers,
+    mode,
+    start_incl=0,
+    end_incl=0,
+    remove_gap=True,
+    factor=1.0,
+    pivot=0,
+    roundToNearestFrame=True,
+    keysBeforeRangeMode="DO_NOTHING",
+    keysAfterRangeMode="DO_NOTHING",
+):
+    """Return the frame numbers the grease pencil frames would have after retime_GPframes(), removed frames
+    getting NaN as new frame number. Same behavior as retimer.retime_GPframes()
+    Note: GP frame numbers are integers, rounding is then done whatever the value of roundToNearestFrame
+    """
+    offset = end_incl - start_incl + 1
+    newFrameNumbers = frameNumbers.copy()
+
+    if mode == "INSERT":
+        newFrameNumbers[start_incl <= frameNumbers] += offset
+
+    elif mode == "DELETE" or mode == "CLEAR_ANIM":
+        # as in the reference implementation the gap is always removed in DELETE mode
+        if mode == "DELETE":
+            newFrameNumbers[end_incl <= frameNumbers] -= offset
+        newFrameNumbers[(start_incl <= frameNumbers) & (frameNumbers <= end_incl)] = np.nan
+
+    elif mode == "RESCALE":
+        changeModes = _getChangeModes(
+            frameNumbers, start_incl, end_incl, "RESCALE", keysBeforeRangeMode, keysAfterRangeMode
+        )
+        rescaleMask = changeModes == "RESCALE"
+        offsetMask = changeModes == "OFFSET"
+
+        # same computation as retimer.compute_offset() to get the same rounded values
+        durationsToPivot = pivot - frameNumbers
+        offsets = durationsToPivot - durationsToPivot * factor
+
+        durationToStart = pivot - start_incl
+        durationToEnd = pivot - end_incl
+        offsetBefore = durationToStart - durationToStart * factor
+        offsetAfter = durationToEnd - durationToEnd * factor
+        offsets[offsetMask] = np.where(frameNumbers[offsetMask] < start_incl, offsetBefore, offsetAfter)
+
+        movedMask = rescaleMask | offsetMask
+        newFrameNumbers[movedMask] = np.round(frameNumbers[movedMask] + offsets[movedMask])
+
+    return newFrameNumbers
+
+
+def retime_GPframes_batch(
+    layer,
+    mode,
+    start_incl=0,
+    end_incl=0,
+    remove_gap=True,
+    factor=1.0,
+    pivot=0,
+    roundToNearestFrame=True,
+    keysBeforeRangeMode="DO_NOTHING",
+    keysAfterRangeMode="DO_NOTHING",
+):
+    """Batched equivalent of retimer.retime_GPframes(). The frame numbers of the layer are read at once, retimed
+    as an array and written back at once, so that no intermediate state with frames sharing the same frame
+    number can occur during the retime.
+    Return the tupple (number of frames modified or removed, number of frames colliding with another frame)
+    """
+    if not len(layer.frames):
+        return (0, 0)
+
+    frameNumbers = getGPFrameNumbers(layer)
+    newFrameNumbers = computeNewGPFrameNumbers(
+        frameNumbers,
+        mode,
+        start_incl,
+        end_incl,
+        remove_gap,
+        factor,
+        pivot,
+        roundToNearestFrame,
+        keysBeforeRangeMode,
+        keysAfterRangeMode,
+    )
+
+    removedMask = np.isnan(newFrameNumbers)
+    movedMask = ~removedMask & (frameNumbers != newFrameNumbers)
+    numModifiedFrames = np.count_nonzero(removedMask) + np.count_nonzero(movedMask)
+    if not numModifiedFrames:
+        return (0, 0)
+
+    numCollisions = countCollisions(frameNumbers, newFrameNumbers)
+    if numCollisions:
+        _logger.warning_ext(
+            f"Retime of Grease Pencil layer {layer.info}: {numCollisions} frame(s) moved to an already used frame"
+        )
+
+    # removal from the end to keep the indices valid
+    for i in reversed(np.flatnonzero(removedMask)):
+        layer.frames.remove(layer.frames[int(i)])
+
+    keptFrameNumbers = newFrameNumbers[~removedMask]
+    if np.count_nonzero(movedMask):
+        layer.frames.foreach_set("frame_number", keptFrameNumbers.astype(np.int32))
+
+    return (int(numModifiedFrames), numCollisions)
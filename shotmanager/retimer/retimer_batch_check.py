@@ -0,0 +1,139 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Check of the batched retime functions against the per-key reference functions of retimer.py
+
+Both backends are run on copies of the same keys for every retime mode and their resulting keys are compared.
+Run from the debug panel.
+"""
+
+import bpy
+import numpy as np
+
+from .retimer import FCurve, retime_fCurve_frames
+from .retimer_batch import getKeysData, retime_fCurve_frames_batch
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# key times of the tested fcurves: keys on whole frames, keys between frames, keys on the range limits and on the pivot
+_keySets = {
+    "WHOLE_FRAMES": [0.0, 5.0, 10.0, 12.0, 14.0, 15.0, 20.0, 25.0, 30.0, 35.0, 40.0],
+    "FRACTIONAL": [2.4, 9.5, 10.0, 11.6, 14.5, 17.25, 20.0, 29.8, 30.0, 31.5, 36.7],
+}
+
+# (mode, start_incl, end_incl, remove_gap, factor, pivot, keysBeforeRangeMode, keysAfterRangeMode)
+_retimeCases = (
+    ("INSERT", 10, 14, True, 1.0, 0, "DO_NOTHING", "DO_NOTHING"),
+    ("DELETE", 10, 14, True, 1.0, 0, "DO_NOTHING", "DO_NOTHING"),
+    ("DELETE", 10, 14, False, 1.0, 0, "DO_NOTHING", "DO_NOTHING"),
+    ("CLEAR_ANIM", 10, 14, False, 1.0, 0, "DO_NOTHING", "DO_NOTHING"),
+    ("RESCALE", 10, 30, True, 0.5, 10, "DO_NOTHING", "OFFSET"),
+    ("RESCALE", 10, 30, True, 2.0, 20, "OFFSET", "OFFSET"),
+    ("RESCALE", 10, 30, True, 1.5, 10, "RESCALE", "SNAP"),
+    ("SNAP", 10, 30, True, 1.0, 0, "DO_NOTHING", "DO_NOTHING"),
+    ("SNAP", 10, 30, True, 1.0, 0, "SNAP", "SNAP"),
+    ("FREEZE", 10, 14, True, 1.0, 0, "DO_NOTHING", "DO_NOTHING"),
+)
+
+# keys are stored in simple precision by Blender
+_tolerance = 1e-3
+
+
+def _createTestFCurve(action, index, keyTimes):
+    """Create an fcurve with keys at the specified times, with free handles so that Blender doesn't recompute them"""
+    fcurve = action.fcurves.new("location", index=index)
+    fcurve.keyframe_points.add(len(keyTimes))
+    for i, keyTime in enumerate(keyTimes):
+        key = fcurve.keyframe_points[i]
+        key.co = (keyTime, np.sin(keyTime * 0.3) * 10.0)
+        key.handle_left_type = "FREE"
+        key.handle_right_type = "FREE"
+        key.handle_left = (keyTime - 1.5, key.co[1] - 1.0)
+        key.handle_right = (keyTime + 1.5, key.co[1] + 1.0)
+    return fcurve
+
+
+def _getSortedKeysData(fcurve):
+    """Return the keys coordinates and handles of the fcurve, sorted by key time"""
+    co, handlesLeft, handlesRight = getKeysData(fcurve.keyframe_points)
+    order = np.argsort(co[:, 0], kind="stable")
+    return (co[order], handlesLeft[order], handlesRight[order])
+
+
+def _compareFCurves(batchFCurve, refFCurve):
+    """Return the description of the first difference between the keys of the fcurves, None if they match"""
+    if len(batchFCurve.keyframe_points) != len(refFCurve.keyframe_points):
+        return f"{len(batchFCurve.keyframe_points)} keys instead of {len(refFCurve.keyframe_points)}"
+
+    for dataName, batchData, refData in zip(
+        ("key times and values", "left handles", "right handles"),
+        _getSortedKeysData(batchFCurve),
+        _getSortedKeysData(refFCurve),
+    ):
+        if not np.allclose(batchData, refData, atol=_tolerance):
+            return f"different {dataName}:\n   batch:     {batchData.tolist()}\n   reference: {refData.tolist()}"
+    return None
+
+
+def checkBatchRetimeEquivalence():
+    """Run retime_fCurve_frames_batch() and the reference retime_fCurve_frames() on the same keys for every
+    retime mode, key set and rounding setting, and compare the resulting keys and handles.
+    The temporary action used for the check is removed afterwards.
+    Return the list of the descriptions of the cases giving different results, empty if both backends match
+    """
+    mismatches = []
+    numCases = 0
+    action = bpy.data.actions.new("_SM_RetimeBatchCheck")
+
+    try:
+        for keySetName, keyTimes in _keySets.items():
+            for retimeCase in _retimeCases:
+                for roundToNearestFrame in (True, False):
+                    numCases += 1
+                    mode, start_incl, end_incl, remove_gap, factor, pivot, keysBefore, keysAfter = retimeCase
+                    retimeArgs = (mode, start_incl, end_incl, remove_gap, factor, pivot)
+                    caseName = f"{keySetName} {retimeCase}, roundToNearestFrame: {roundToNearestFrame}"
+
+                    batchFCurve = _createTestFCurve(action, 0, keyTimes)
+                    refFCurve = _createTestFCurve(action, 1, keyTimes)
+                    try:
+                        retime_fCurve_frames_batch(batchFCurve, *retimeArgs, roundToNearestFrame, keysBefore, keysAfter)
+                        retime_fCurve_frames(FCurve(refFCurve), *retimeArgs, roundToNearestFrame, keysBefore, keysAfter)
+                        difference = _compareFCurves(batchFCurve, refFCurve)
+                    except Exception as e:
+                        difference = f"error: {e!r}"
+
+                    if difference is not None:
+                        mismatches.append(f"{caseName}: {difference}")
+
+                    action.fcurves.remove(batchFCurve)
+                    action.fcurves.remove(refFCurve)
+    finally:
+        bpy.data.actions.remove(action)
+
+    for mismatch in mismatches:
+        _logger.error_ext(f"Batch retime check: {mismatch}")
+    if mismatches:
+        _logger.error_ext(f"Batch retime check: {len(mismatches)} / {numCases} cases differ from the reference")
+    else:
+        _logger.info_ext(f"Batch retime check: the {numCases} cases match the reference", col="GREEN")
+
+    return mismatches
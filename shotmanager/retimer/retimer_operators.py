@@ -24,8 +24,7 @@ from bpy.types import Operator
 from bpy.props import StringProperty
 
 from . import retimer
-
-from shotmanager.utils.utils_storyboard import getStoryboardObjects
+from .retimer_retime_engine import invalidatePreviewRetimeCache
 
 from shotmanager.config import config
 from shotmanager.config import sm_logging
@@ -109,128 +108,29 @@ class UAS_ShotManager_RetimerApply(Operator):
         retimeEngine = props.retimer.retimeEngine
         retimerApplyToSettings = props.retimer.getCurrentApplyToSettings()
 
-        if retimerApplyToSettings.onlyOnSelection:
-            sceneObjs = [obj for obj in context.selected_objects]
-        else:
-            sceneObjs = [obj for obj in context.scene.objects]
-
-        if not retimerApplyToSettings.applyToStoryboardShotRanges:
-            stbObjs = getStoryboardObjects(context.scene)
-            for obj in stbObjs:
-                if obj in sceneObjs:
-                    sceneObjs.remove(obj)
-
-        # startFrame = retimeEngine.start_frame
-        # endFrame = retimeEngine.end_frame
-
-        ################################
-        # For the following lines keep in mind that:
-        #    - retimeEngine.insert_duration is inclusive
-        #    - retimeEngine.start_frame is EXCLUSIVE   (in other words it is NOT modified)
-        #    - retimeEngine.end_frame is EXCLUSIVE     (in other words is the first frame to be offset)
-        #
-        # But retimeScene() requires INCLUSIVE range of time for the modifications (= all the frames
-        # created or deleted, not the moved ones).
-        # We then have to adapt the start and end values we get from retimeEngine for the function.
-        ################################
-        if "GLOBAL_OFFSET" == retimeEngine.mode:
-            if 0 == retimeEngine.offset_duration:
-                return {"FINISHED"}
-
-            # if offset_duration > 0 we insert time from a point far in negative time
-            # if offset_duration < 0 we delete time from a point very far in negative time
-            farRefPoint = -100000
-
-            retimer.retimeScene(
-                context=context,
-                retimeMode="GLOBAL_OFFSET",
-                retimerApplyToSettings=retimerApplyToSettings,
-                objects=sceneObjs,
-                start_incl=farRefPoint + 1,
-                duration_incl=retimeEngine.offset_duration,
-                join_gap=retimeEngine.gap,
-            )
-
-        elif -1 < retimeEngine.mode.find("INSERT"):
-            start_excl = retimeEngine.start_frame if "INSERT_AFTER" == retimeEngine.mode else retimeEngine.end_frame - 1
-            end_excl = start_excl + retimeEngine.insert_duration + 1
-            # start = startFrame + 1 if "INSERT_AFTER" == retimeEngine.mode else endFrame
-            print(
-                # f"Retimer - Inserting time: new time range: [{start} .. {start + retimeEngine.insert_duration - 1}], duration:{retimeEngine.insert_duration}"
-                f"\nRetimer - Inserting time: new created frames: [{start_excl + 1} .. {end_excl - 1}], duration: {retimeEngine.insert_duration}"
-            )
-            retimer.retimeScene(
-                context=context,
-                retimeMode="INSERT",
-                retimerApplyToSettings=retimerApplyToSettings,
-                objects=sceneObjs,
-                start_incl=start_excl + 1,
-                duration_incl=retimeEngine.insert_duration,
-                join_gap=retimeEngine.gap,
-                factor=1.0,
-                pivot=retimeEngine.pivot,
-            )
-
-        elif -1 < retimeEngine.mode.find("DELETE"):
-            start_excl = retimeEngine.start_frame
-            end_excl = retimeEngine.end_frame
-            duration_incl = end_excl - start_excl - 1
-            print(
-                f"\nRetimer - Deleting time: deleted frames: [{start_excl + 1} .. {end_excl - 1}], duration: {duration_incl}"
-            )
-            retimer.retimeScene(
-                context=context,
-                retimeMode="DELETE",
-                retimerApplyToSettings=retimerApplyToSettings,
-                objects=sceneObjs,
-                start_incl=start_excl + 1,
-                duration_incl=duration_incl,
-                join_gap=True,
-                factor=1.0,
-                pivot=retimeEngine.pivot,
-            )
-        elif "RESCALE" == retimeEngine.mode:
-            # *** Warning: due to the nature of the time operation the duration is not computed as for Delete Time ***
-            start_excl = retimeEngine.start_frame
-            end_excl = retimeEngine.end_frame
-            duration_incl = end_excl - start_excl
-            print(
-                f"\nRetimer - Rescaling time: modified frames: [{start_excl} .. {end_excl - 1}], duration: {duration_incl}"
-            )
-            retimer.retimeScene(
-                context=context,
-                retimeMode="RESCALE",
-                retimerApplyToSettings=retimerApplyToSettings,
-                objects=sceneObjs,
-                start_incl=start_excl,
-                duration_incl=duration_incl,
-                join_gap=True,
-                factor=retimeEngine.factor,
-                pivot=start_excl,
-                keysBeforeRangeMode="DO_NOTHING",
-                keysAfterRangeMode="OFFSET",
-            )
-
-        elif "CLEAR_ANIM" == retimeEngine.mode:
-            start_excl = retimeEngine.start_frame
-            end_excl = retimeEngine.end_frame
-            duration_incl = end_excl - start_excl - 1
-            print(
-                f"\nRetimer - Deleting animation: cleared frames: [{start_excl + 1} .. {end_excl - 1}], duration:{duration_incl}"
-            )
-            retimer.retimeScene(
-                context=context,
-                retimeMode="CLEAR_ANIM",
-                retimerApplyToSettings=retimerApplyToSettings,
-                objects=sceneObjs,
-                start_incl=start_excl + 1,
-                duration_incl=duration_incl,
-                join_gap=False,
-                factor=retimeEngine.factor,
-                pivot=retimeEngine.pivot,
-            )
-        else:
-            print(f"*** Retimer failed: No Retimer mode named {retimeEngine.mode} ***")
+        sceneObjs = retimeEngine.getRetimedObjects(context, retimerApplyToSettings)
+
+        # retimeScene() requires INCLUSIVE range of time for the modifications, see getRetimeSceneArgs()
+        retimeArgs = retimeEngine.getRetimeSceneArgs()
+        if retimeArgs is None:
+            if "GLOBAL_OFFSET" != retimeEngine.mode:
+                print(f"*** Retimer failed: No Retimer mode named {retimeEngine.mode} ***")
+            return {"FINISHED"}
+
+        start_incl = retimeArgs["start_incl"]
+        end_incl = start_incl + retimeArgs["duration_incl"] - 1
+        print(
+            f"\nRetimer - {retimeEngine.mode}: modified frames: [{start_incl} .. {end_incl}], duration: {retimeArgs['duration_incl']}"
+        )
+        retimer.retimeScene(
+            context=context,
+            retimerApplyToSettings=retimerApplyToSettings,
+            objects=sceneObjs,
+            **retimeArgs,
+        )
+
+        # the keys have changed
+        invalidatePreviewRetimeCache()
 
         context.area.tag_redraw()
         # context.region.tag_redraw()
@@ -246,11 +146,24 @@ class UAS_ShotManager_RetimerApply(Operator):
         return {"FINISHED"}
 
 
+class UAS_ShotManager_RetimerRefreshPreview(Operator):
+    bl_idname = "uas_shot_manager.retimer_refreshpreview"
+    bl_label = "Refresh Preview"
+    bl_description = "Compute again the changes the retime operation would do on the scene"
+    bl_options = {"INTERNAL"}
+
+    def execute(self, context):
+        invalidatePreviewRetimeCache()
+        context.area.tag_redraw()
+        return {"FINISHED"}
+
+
 _classes = (
     UAS_ShotManager_RetimerInitialize,
     UAS_ShotManager_GetTimeRange,
     UAS_ShotManager_GetCurrentFrameFor,
     UAS_ShotManager_RetimerApply,
+    UAS_ShotManager_RetimerRefreshPreview,
 )
 
 
@@ -0,0 +1,240 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Retime preview: computes what a retime operation would do without modifying the scene
+"""
+
+import numpy as np
+
+from .retimer import (
+    collectRetimeTargets,
+    computeNewFrameValue,
+    getRetimeModeAndRange,
+    retime_shot,
+)
+from .retimer_batch import (
+    computeNewGPFrameNumbers,
+    computeNewKeyTimes,
+    countCollisions,
+    getGPFrameNumbers,
+    getKeyTimes,
+)
+
+from shotmanager.config import config
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+class RetimePreview:
+    """Old to new time mappings of the entities affected by a retime operation, and their summary per category.
+    Categories are the ones of RetimeReport: OBJECTS, DATA, SHAPE_KEYS, MATERIALS, NODE_TREES, GREASE_PENCIL,
+    VSE, SHOT_RANGES, MARKERS
+    A removed entity has None (or NaN in the arrays) as new time.
+    For animation keys and grease pencil frames the collisions are the entities that would end at the same time
+    as another entity of the same fcurve or layer, and that would then be merged.
+    """
+
+    def __init__(self):
+        # dict {category: [(label, oldTimes array, newTimes array), ...]}
+        self.mappings = dict()
+        # dict of dicts: {category: {"total": int, "moved": int, "removed": int, "collisions": int}}
+        self.summary = dict()
+
+    def addMapping(self, category, label, oldTimes, newTimes):
+        """Add the old and new times of a set of entities sharing the same time line, such as the keys of an fcurve
+        Args:
+            oldTimes, newTimes: numpy arrays of floats, NaN being used in newTimes for the removed entities
+        """
+        if category not in self.mappings:
+            self.mappings[category] = []
+            self.summary[category] = {"total": 0, "moved": 0, "removed": 0, "collisions": 0}
+        self.mappings[category].append((label, oldTimes, newTimes))
+
+        removedMask = np.isnan(newTimes)
+        categorySummary = self.summary[category]
+        categorySummary["total"] += len(oldTimes)
+        categorySummary["removed"] += int(np.count_nonzero(removedMask))
+        categorySummary["moved"] += int(np.count_nonzero(~removedMask & (oldTimes != newTimes)))
+        categorySummary["collisions"] += countCollisions(oldTimes, newTimes)
+
+    def getMapping(self, category):
+        """Return the list of the (label, old time, new time) of the entities of the category, the new time being
+        None for removed entities
+        """
+        mapping = []
+        for label, oldTimes, newTimes in self.mappings.get(category, []):
+            for oldTime, newTime in zip(oldTimes.tolist(), newTimes.tolist()):
+                mapping.append((label, oldTime, None if np.isnan(newTime) else newTime))
+        return mapping
+
+    def getTotal(self, countName):
+        """Return the sum of the specified count over all the categories
+        Args:
+            countName: can be "total", "moved", "removed", "collisions"
+        """
+        return sum([c[countName] for c in self.summary.values()])
+
+    def printSummary(self, title="Retime Preview"):
+        infoStr = f"\n{title}:"
+        for category, categorySummary in self.summary.items():
+            infoStr += f"\n   - {category}: " + ", ".join([f"{k}: {v}" for k, v in categorySummary.items()])
+        _logger.info_ext(infoStr, tag="RETIMER")
+
+
+class _ShotRangeProxy:
+    """Stand-in of a shot for retime_shot(), with the same behavior as the start and end setters of the shot"""
+
+    def __init__(self, shot):
+        self.name = shot.name
+        self._start = shot.start
+        self._end = shot.end
+        self.durationLocked = shot.durationLocked
+        self.enabled = shot.enabled
+
+    @property
+    def start(self):
+        return self._start
+
+    @start.setter
+    def start(self, value):
+        duration = self._end - self._start + 1
+        self._start = int(value)
+        if self.durationLocked:
+            self._end = self._start + duration - 1
+        elif self._start > self._end:
+            self._start = self._end
+
+    @property
+    def end(self):
+        return self._end
+
+    @end.setter
+    def end(self, value):
+        duration = self._end - self._start + 1
+        self._end = int(value)
+        if self.durationLocked:
+            self._start = self._end - duration + 1
+        elif self._start > self._end:
+            self._end = self._start
+
+
+def _previewVSE(preview, scene, mode, start_frame, end_frame):
+    """Same behavior as retimer.retime_vse(). The strips cut by the retimed range are considered as moved
+    from their start, the split parts being not listed
+    """
+    sed = scene.sequence_editor
+    if sed is None or not len(sed.sequences):
+        return
+
+    starts = np.array([s.frame_final_start for s in sed.sequences], dtype=np.float64)
+    ends = np.array([s.frame_final_end for s in sed.sequences], dtype=np.float64)
+    newStarts = starts.copy()
+
+    if mode == "INSERT":
+        newStarts[start_frame <= starts] += end_frame - start_frame
+
+    elif mode == "DELETE":
+        newStarts[end_frame <= starts] -= end_frame - start_frame
+        newStarts[(start_frame <= starts) & (starts <= end_frame) & (start_frame <= ends) & (ends <= end_frame)] = (
+            np.nan
+        )
+
+    preview.addMapping("VSE", "Strips", starts, newStarts)
+
+
+def previewRetimeScene(
+    *,
+    context,
+    retimeMode: str,
+    retimerApplyToSettings,
+    objects,
+    start_incl: float,
+    duration_incl: float,
+    join_gap=True,
+    factor=1.0,
+    pivot=0,
+    keysBeforeRangeMode="DO_NOTHING",
+    keysAfterRangeMode="DO_NOTHING",
+):
+    """Compute the old to new time mapping of the entities that retimeScene() would modify with the same arguments,
+    without modifying the scene
+    Return a RetimePreview instance
+    """
+    scene = context.scene
+    preview = RetimePreview()
+
+    mode, start_incl, end_incl = getRetimeModeAndRange(retimeMode, start_incl, duration_incl)
+    roundToNearestFrame = retimerApplyToSettings.snapKeysToFrames
+    retime_args = (mode, start_incl, end_incl, join_gap, factor, pivot)
+
+    retimeTargets = collectRetimeTargets(objects, retimerApplyToSettings)
+
+    # animation keys
+    for category, actions in retimeTargets["ACTIONS"].items():
+        for action in actions:
+            for fcurve in action.fcurves:
+                if not len(fcurve.keyframe_points):
+                    continue
+                if not fcurve.lock or retimerApplyToSettings.includeLockAnim:
+                    keyTimes = getKeyTimes(fcurve.keyframe_points)
+                    newKeyTimes = computeNewKeyTimes(
+                        keyTimes, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
+                    )
+                    label = f"{action.name}: {fcurve.data_path}[{fcurve.array_index}]"
+                    preview.addMapping(category, label, keyTimes, newKeyTimes)
+
+    # grease pencil frames
+    for obj in retimeTargets["GREASE_PENCIL"]:
+        for layer in obj.data.layers:
+            if not len(layer.frames):
+                continue
+            if not layer.lock or retimerApplyToSettings.includeLockAnim:
+                frameNumbers = getGPFrameNumbers(layer)
+                newFrameNumbers = computeNewGPFrameNumbers(
+                    frameNumbers, *retime_args, roundToNearestFrame, keysBeforeRangeMode, keysAfterRangeMode
+                )
+                preview.addMapping("GREASE_PENCIL", f"{obj.name}: {layer.info}", frameNumbers, newFrameNumbers)
+
+    # VSE
+    if "CLEAR_ANIM" != mode and retimerApplyToSettings.applyToVSE:
+        _previewVSE(preview, scene, mode, start_incl, end_incl)
+
+    # shot ranges
+    if retimerApplyToSettings.applyToCameraShotRanges and "CLEAR_ANIM" != mode:
+        props = config.getAddonProps(scene)
+        for shot in props.getShotsList(ignoreDisabled=False):
+            shotProxy = _ShotRangeProxy(shot)
+            retime_shot(shotProxy, *retime_args)
+            preview.addMapping(
+                "SHOT_RANGES",
+                shot.name,
+                np.array([shot.start, shot.end], dtype=np.float64),
+                np.array([shotProxy.start, shotProxy.end], dtype=np.float64),
+            )
+
+    # markers
+    if retimerApplyToSettings.applyToMarkers and len(scene.timeline_markers):
+        markerFrames = np.array([m.frame for m in scene.timeline_markers], dtype=np.float64)
+        newMarkerFrames = np.empty(len(markerFrames), dtype=np.float64)
+        for i, frame in enumerate(markerFrames.tolist()):
+            newFrame = computeNewFrameValue(frame, mode, start_incl, end_incl, pivot, factor, roundToNearestFrame=False)
+            newMarkerFrames[i] = np.nan if newFrame is None else round(newFrame)
+        preview.addMapping("MARKERS", "Markers", markerFrames, newMarkerFrames)
+
+    return preview
@@ -0,0 +1,112 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Report of a retime operation
+"""
+
+import time
+
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+class RetimeReport:
+    """Counts of the entities touched by a retime operation and time spent, per category
+    Categories are the kinds of animated data, such as OBJECTS, DATA, SHAPE_KEYS, MATERIALS, NODE_TREES, GREASE_PENCIL,
+    and the scene-level entities VSE, SHOT_RANGES, MARKERS
+    """
+
+    def __init__(self):
+        # dict of dicts: {category: {"actions": int, "curves": int, "keys": int, "gpLayers": int, "gpFrames": int,
+        # "gpCollisions": int}}
+        # actions, curves and gpLayers are the processed entities, keys and gpFrames the ones moved or removed
+        self.counts = dict()
+        # dict {category: time in seconds}
+        self.timings = dict()
+
+        # list of tupples (layer label, number of frames, time in seconds)
+        self.gpLayerTimings = []
+
+        self._categoryStartTime = dict()
+
+    def _getCategoryCounts(self, category):
+        if category not in self.counts:
+            self.counts[category] = {
+                "actions": 0,
+                "curves": 0,
+                "keys": 0,
+                "gpLayers": 0,
+                "gpFrames": 0,
+                "gpCollisions": 0,
+            }
+        return self.counts[category]
+
+    def add(self, category, actions=0, curves=0, keys=0, gpLayers=0, gpFrames=0, gpCollisions=0):
+        categoryCounts = self._getCategoryCounts(category)
+        categoryCounts["actions"] += actions
+        categoryCounts["curves"] += curves
+        categoryCounts["keys"] += keys
+        categoryCounts["gpLayers"] += gpLayers
+        categoryCounts["gpFrames"] += gpFrames
+        categoryCounts["gpCollisions"] += gpCollisions
+
+    def startTiming(self, category):
+        self._categoryStartTime[category] = time.monotonic()
+
+    def stopTiming(self, category):
+        if category in self._categoryStartTime:
+            deltaTime = time.monotonic() - self._categoryStartTime.pop(category)
+            self.timings[category] = self.timings.get(category, 0.0) + deltaTime
+
+    def addGPLayerTiming(self, label, numFrames, deltaTime):
+        self.gpLayerTimings.append((label, numFrames, deltaTime))
+
+    def getSlowestGPLayers(self, numLayers=5):
+        """Return the list of the (layer label, number of frames, time in seconds) of the slowest retimed layers"""
+        return sorted(self.gpLayerTimings, key=lambda t: t[2], reverse=True)[:numLayers]
+
+    def getTotal(self, countName):
+        """Return the sum of the specified count over all the categories
+        Args:
+            countName: can be "actions", "curves", "keys", "gpLayers", "gpFrames", "gpCollisions"
+        """
+        return sum([c[countName] for c in self.counts.values()])
+
+    def getTotalTime(self):
+        return sum(self.timings.values())
+
+    def asDict(self):
+        return {"counts": self.counts, "timings": self.timings, "gpLayerTimings": self.gpLayerTimings}
+
+    def printReport(self, title="Retime Report"):
+        infoStr = f"\n{title}:"
+        for category in sorted(set(self.counts.keys()) | set(self.timings.keys())):
+            infoStr += f"\n   - {category}: "
+            if category in self.counts:
+                infoStr += ", ".join([f"{k}: {v}" for k, v in self.counts[category].items() if v])
+            if category in self.timings:
+                infoStr += f"  ({self.timings[category]:0.3f} sec)"
+        slowestLayers = self.getSlowestGPLayers()
+        if len(slowestLayers):
+            infoStr += "\n   Slowest Grease Pencil layers:"
+            for label, numFrames, deltaTime in slowestLayers:
+                infoStr += f"\n      {label}: {numFrames} frames ({deltaTime:0.4f} sec)"
+        infoStr += f"\n   Total: {self.getTotal('curves')} curves, {self.getTotal('keys')} keys moved or removed"
+        infoStr += f", {self.getTotal('gpFrames')} GP frames moved or removed in {self.getTotalTime():0.3f} sec"
+        _logger.info_ext(infoStr, tag="RETIMER")
@@ -23,6 +23,33 @@ import bpy
 from bpy.types import PropertyGroup
 from bpy.props import IntProperty, EnumProperty, BoolProperty, FloatProperty
 
+from shotmanager.utils.utils_storyboard import getStoryboardObjects
+from shotmanager.properties.shots_index import getShotsDataVersion
+
+# preview of the retime operation displayed in the panel, computed again only when its key changes
+_previewCache = {"key": None, "preview": None}
+
+
+def invalidatePreviewRetimeCache():
+    """Force the computation of the retime preview at the next redraw of the panel"""
+    _previewCache["key"] = None
+    _previewCache["preview"] = None
+
+
+def _getPropertyGroupKey(propertyGroup):
+    """Return a hashable tuple of the values of the properties of the specified property group"""
+    values = []
+    for prop in propertyGroup.bl_rna.properties:
+        if "rna_type" == prop.identifier or prop.type in ("POINTER", "COLLECTION"):
+            continue
+        value = getattr(propertyGroup, prop.identifier)
+        if isinstance(value, set):
+            value = frozenset(value)
+        elif not isinstance(value, str) and hasattr(value, "__len__"):
+            value = tuple(value)
+        values.append(value)
+    return tuple(values)
+
 
 class UAS_Retimer_RetimeEngine(PropertyGroup):
 
@@ -258,6 +285,135 @@ class UAS_Retimer_RetimeEngine(PropertyGroup):
         name="Pivot",
     )
 
+    showPreview: BoolProperty(
+        name="Preview",
+        description="Display a summary of the changes the retime operation would do on the scene",
+        default=False,
+        options=set(),
+    )
+
+    def getRetimedObjects(self, context, retimerApplyToSettings):
+        """Return the list of the objects affected by the retime operation"""
+        if retimerApplyToSettings.onlyOnSelection:
+            sceneObjs = [obj for obj in context.selected_objects]
+        else:
+            sceneObjs = [obj for obj in context.scene.objects]
+
+        if not retimerApplyToSettings.applyToStoryboardShotRanges:
+            stbObjs = getStoryboardObjects(context.scene)
+            for obj in stbObjs:
+                if obj in sceneObjs:
+                    sceneObjs.remove(obj)
+
+        return sceneObjs
+
+    def getRetimeSceneArgs(self):
+        """Return the dictionary of the time arguments of retimer.retimeScene() corresponding to the current mode
+        and values of the engine, or None if there is nothing to retime
+
+        For the following lines keep in mind that:
+           - self.insert_duration is inclusive
+           - self.start_frame is EXCLUSIVE   (in other words it is NOT modified)
+           - self.end_frame is EXCLUSIVE     (in other words is the first frame to be offset)
+
+        But retimeScene() requires INCLUSIVE range of time for the modifications (= all the frames
+        created or deleted, not the moved ones).
+        We then have to adapt the start and end values of the engine for the function.
+        """
+        if "GLOBAL_OFFSET" == self.mode:
+            if 0 == self.offset_duration:
+                return None
+
+            # if offset_duration > 0 we insert time from a point far in negative time
+            # if offset_duration < 0 we delete time from a point very far in negative time
+            farRefPoint = -100000
+            return {
+                "retimeMode": "GLOBAL_OFFSET",
+                "start_incl": farRefPoint + 1,
+                "duration_incl": self.offset_duration,
+                "join_gap": self.gap,
+            }
+
+        elif -1 < self.mode.find("INSERT"):
+            start_excl = self.start_frame if "INSERT_AFTER" == self.mode else self.end_frame - 1
+            return {
+                "retimeMode": "INSERT",
+                "start_incl": start_excl + 1,
+                "duration_incl": self.insert_duration,
+                "join_gap": self.gap,
+                "factor": 1.0,
+                "pivot": self.pivot,
+            }
+
+        elif -1 < self.mode.find("DELETE"):
+            return {
+                "retimeMode": "DELETE",
+                "start_incl": self.start_frame + 1,
+                "duration_incl": self.end_frame - self.start_frame - 1,
+                "join_gap": True,
+                "factor": 1.0,
+                "pivot": self.pivot,
+            }
+
+        elif "RESCALE" == self.mode:
+            # *** Warning: due to the nature of the time operation the duration is not computed as for Delete Time ***
+            return {
+                "retimeMode": "RESCALE",
+                "start_incl": self.start_frame,
+                "duration_incl": self.end_frame - self.start_frame,
+                "join_gap": True,
+                "factor": self.factor,
+                "pivot": self.start_frame,
+                "keysBeforeRangeMode": "DO_NOTHING",
+                "keysAfterRangeMode": "OFFSET",
+            }
+
+        elif "CLEAR_ANIM" == self.mode:
+            return {
+                "retimeMode": "CLEAR_ANIM",
+                "start_incl": self.start_frame + 1,
+                "duration_incl": self.end_frame - self.start_frame - 1,
+                "join_gap": False,
+                "factor": self.factor,
+                "pivot": self.pivot,
+            }
+
+        return None
+
+    def getCachedPreviewRetime(self, context, retimerApplyToSettings):
+        """Return the result of previewRetime(), computed again only when the settings of the engine, the apply to
+        settings or the shots have changed. Use invalidatePreviewRetimeCache() to force its computation
+        """
+        key = (
+            getShotsDataVersion(),
+            context.scene.name,
+            _getPropertyGroupKey(self),
+            _getPropertyGroupKey(retimerApplyToSettings),
+            tuple([obj.name for obj in context.selected_objects]) if retimerApplyToSettings.onlyOnSelection else None,
+        )
+        if key != _previewCache["key"]:
+            _previewCache["preview"] = self.previewRetime(context, retimerApplyToSettings)
+            _previewCache["key"] = key
+        return _previewCache["preview"]
+
+    def previewRetime(self, context, retimerApplyToSettings):
+        """Compute the changes the retime operation would do on the scene, without modifying it
+        Return a RetimePreview instance, or None if there is nothing to retime
+        """
+        from . import retimer
+
+        retimeArgs = self.getRetimeSceneArgs()
+        if retimeArgs is None:
+            return None
+
+        return retimer.retimeScene(
+            context=context,
+            retimerApplyToSettings=retimerApplyToSettings,
+            objects=self.getRetimedObjects(context, retimerApplyToSettings),
+            dryRun=True,
+            **retimeArgs,
+        )
+
 
 # _classes = (UAS_Retimer_RetimeProperties,)
 
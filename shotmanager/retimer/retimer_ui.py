@@ -309,6 +309,29 @@ class UAS_PT_ShotManagerRetimer(Panel):
         if prefs.retimer_applyTo_expanded:
             drawApplyTo(context, retimerProps, box)
 
+        # preview ####################
+        ###############################
+
+        box = layout.box()
+        row = box.row()
+        row.prop(retimeEngine, "showPreview", text="Preview Changes")
+        if retimeEngine.showPreview:
+            row.operator("uas_shot_manager.retimer_refreshpreview", text="", icon="FILE_REFRESH", emboss=False)
+            preview = retimeEngine.getCachedPreviewRetime(context, retimerProps.getCurrentApplyToSettings())
+            if preview is None or not len(preview.summary):
+                box.label(text="No changes")
+            else:
+                col = box.column(align=True)
+                for category, categorySummary in preview.summary.items():
+                    split = col.split(factor=drpdwnSplitFac)
+                    split.label(text=category.replace("_", " ").title() + ":")
+                    subRow = split.row()
+                    subRow.alert = 0 < categorySummary["collisions"]
+                    subRow.label(
+                        text=f"{categorySummary['moved']} moved,  {categorySummary['removed']} removed,  "
+                        f"{categorySummary['collisions']} merged"
+                    )
+
         # apply button ################
         ###############################
 
@@ -592,10 +592,12 @@ class UAS_SMStampInfoSettings(bpy.types.PropertyGroup):
         innerHeight=None,
         renderPath=None,
         renderFilename=None,
+        frameEvaluator=None,
         verbose=False,
     ):
         """Args:
-        resolution: the resolution frame"""
+        resolution: the resolution frame
+        frameEvaluator: StampFrameEvaluator providing the frame dependent values, see getStampFrameEvaluator()"""
 
         if resolution is None or innerHeight is None:
             renderW = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)[0]
@@ -614,9 +616,42 @@ class UAS_SMStampInfoSettings(bpy.types.PropertyGroup):
             innerH,
             renderPath=renderPath,
             renderFilename=renderFilename,
+            frameEvaluator=frameEvaluator,
             verbose=verbose,
         )
 
+    def getStampFrameEvaluator(self, scene):
+        """Return a StampFrameEvaluator, to get the frame dependent values of the stamp fields without evaluating
+        the scene at each frame when possible"""
+        return infoImage.StampFrameEvaluator(scene)
+
+    def getStampFrameData(self, scene, currentFrame, renderPath=None, renderFilename=None, frameEvaluator=None):
+        """Return the tupple (output file path, frame data dictionary) required by
+        renderTmpImagesWithStampedInfoInProcesses() to generate the image of the specified frame"""
+        filepath = infoImage.getStampFilePath(scene, currentFrame, renderPath=renderPath, renderFilename=renderFilename)
+        return (filepath, infoImage.getStampFrameData(scene, currentFrame, frameEvaluator=frameEvaluator))
+
+    def renderTmpImagesWithStampedInfoInProcesses(
+        self, scene, framesToRender, numProcesses, resolution=None, innerHeight=None
+    ):
+        """Generate the images of the specified frames in numProcesses processes running outside of Blender
+        Args:
+        framesToRender: list of the tupples returned by getStampFrameData()"""
+        if resolution is None or innerHeight is None:
+            renderW = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)[0]
+            renderH = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)[1]
+            innerH = getInnerHeight(scene)
+        else:
+            renderW = resolution[0]
+            renderH = resolution[1]
+            innerH = innerHeight
+
+        return infoImage.renderStampedImagesInProcesses(framesToRender, renderW, renderH, innerH, numProcesses)
+
+    def clearStampTemplateLayers(self):
+        """Free the static layers of the stamp images kept in cache during the rendering of the frames"""
+        infoImage.clearStampTemplateLayers()
+
     def getRenderResolutionForStampInfo(self, scene, usePercentage=True, forceMultiplesOf2=True):
         return stamper.getRenderResolutionForStampInfo(
             scene, usePercentage=usePercentage, forceMultiplesOf2=forceMultiplesOf2
@@ -0,0 +1,881 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Drawing of the stamp info images
+
+*** This module must not import bpy nor any module of the add-on ***
+It is imported by the processes generating the stamp images in parallel, which run outside Blender,
+see infoImage.renderStampedImagesInProcesses(). All the values it uses come from the plain dictionaries
+returned by infoImage.getStampFrameData().
+
+The stamp image is made of a static layer, with the borders, the logo and all the texts that do not
+change during the rendering of a shot, and of a dynamic layer with the frame dependent texts (time,
+frame indices, camera and lens).
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from datetime import datetime
+
+# cache of the fonts, per size
+_fonts = dict()
+
+
+class StampData:
+    """Values of the scene and of the stamp info settings used to draw the stamp image of a frame
+    Args:
+        frameData: dictionary returned by infoImage.getStampFrameData()
+    """
+
+    def __init__(self, frameData):
+        self.frame = frameData["frame"]
+        for name, value in frameData["scene"].items():
+            setattr(self, name, value)
+        self.settings = SimpleNamespace(**frameData["settings"])
+
+
+def _getFont(fontSize):
+    from PIL import ImageFont
+
+    if fontSize not in _fonts:
+        _fonts[fontSize] = ImageFont.truetype("arial", fontSize)
+    return _fonts[fontSize]
+
+
+class StampLayout:
+    """Dimensions, fonts and colors of the stamp image, computed from the stamp data and the render size
+    Notes:
+        - Image origine is at TOP LEFT corner
+        - Everything is proportionnal to the HEIGHT of the output image
+    """
+
+    def __init__(self, stampData, renderW, renderH, innerH):
+        siSettings = stampData.settings
+        paddingLeftMetadataTopNorm = 0.0
+        paddingLeftMetadataBottomNorm = 0.0
+
+        self.renderW = renderW
+        self.renderH = renderH
+        self.innerH = innerH
+
+        self.borderTopH = max(
+            int((renderH - innerH) * 0.5), 0
+        )  # border cannot be negative, which happens if render ratio < inner ratio
+        self.borderBottomH = self.borderTopH
+
+        # ---------- framing control settings ----------------
+        paddingTopExtNorm = siSettings.extPaddingNorm
+        # 0.03      # padding near the exterior of the image on the border rectangle
+        paddingTopIntNorm = 0.04  # not used here # padding near the interior of the image on the border rectangle
+        self.paddingLeftNorm = siSettings.extPaddingHorizNorm
+
+        textLineNorm = siSettings.fontScaleHNorm
+        textInterlineNorm = siSettings.interlineHNorm  # 0.01
+        numLinesTop = 3
+        self.numLinesBottom = numLinesTop
+
+        if siSettings.automaticTextSize:
+            borderTopNorm = min(0.5, self.borderTopH / renderH)
+            paddingTopExtNormInBorder = siSettings.extPaddingNorm * 10.0  # 0.2
+            paddingTopIntNormInBorder = 0.1
+            paddingTopExtNorm = paddingTopExtNormInBorder * borderTopNorm
+            paddingTopIntNorm = paddingTopIntNormInBorder * borderTopNorm
+
+            textInterlineNormInBorder = siSettings.interlineHNorm  # 0.04
+            textInterlineNorm = textInterlineNormInBorder * borderTopNorm
+
+            textBorderNorm = borderTopNorm - paddingTopExtNorm - paddingTopIntNorm
+            if textBorderNorm <= (numLinesTop - 1) * textInterlineNorm:
+                textBorderNorm = 0.0
+                textLineNorm = 0.0
+            else:
+                textLineNorm = min(textLineNorm, (textBorderNorm - (numLinesTop - 1) * textInterlineNorm) / 3.0)
+
+        # ---------- framing control settings ----------------
+
+        # All dimensions are normalized as if the image had the size 1.0 * 1.0
+        # fontScaleHNorm      = siSettings.fontScaleHNorm        #0.03
+        # fontsize            = int(fontScaleHNorm * renderH)
+        # font                = ImageFont.truetype("arial", fontsize)
+        # textLineH           = (font.getsize("Aj"))[1]            # line height
+
+        self.textLineH = int(renderH * textLineNorm)
+        self.textInterlineH = int(renderH * textInterlineNorm)
+
+        fontsize = int(1.0 * textLineNorm * renderH)
+        self.font = _getFont(fontsize)
+        self.fontHeight = (self.font.getsize("Text"))[1]
+        fontLargeFactor = 1.6
+        self.fontLarge = _getFont(int(fontsize * fontLargeFactor))
+        self.fontLargeHeight = (self.fontLarge.getsize("Text"))[1]
+
+        self.paddingLeft = int((self.paddingLeftNorm) * renderW)
+        self.paddingLeftMetadataTop = int((paddingLeftMetadataTopNorm) * renderW)
+        self.paddingLeftMetadataBottom = int((paddingLeftMetadataBottomNorm) * renderW)
+        # paddingLeft         = int((paddingLeftNorm + paddingLeftMetadataTopNorm) * renderW)
+        #    paddingRight = paddingLeft
+
+        self.paddingTopExt = int(paddingTopExtNorm * renderH)
+        self.paddingBottomExt = self.paddingTopExt
+        #    paddingTopInt = int(paddingTopIntNorm * renderH)
+        #    paddingBottomInt = paddingTopInt
+
+        borderColorRGB = siSettings.borderColor  # (0, 0, 0, 255)
+        self.borderColorRGBA = (
+            int(borderColorRGB[0] * 255),
+            int(borderColorRGB[1] * 255),
+            int(borderColorRGB[2] * 255),
+            int(borderColorRGB[3] * 255),
+        )
+
+        # innerAspectRatio    = siSettings.innerImageRatio              #16/9   # must be >= 1
+        # if 1.0 >= innerAspectRatio:
+        #     innerAspectRatio = 1.0
+        # innerH              = renderW * 1.0 / innerAspectRatio
+        textColorRGB = siSettings.textColor  # (0, 0, 0, 255)
+        self.textColorRGBA = (
+            int(textColorRGB[0] * 255),
+            int(textColorRGB[1] * 255),
+            int(textColorRGB[2] * 255),
+            int(textColorRGB[3] * 255),
+        )
+
+        # textColorWhite = (235, 235, 235, 255)
+
+        # alertColorRGB = siSettings.textColor
+        alertColorRGB = (0.7, 0.2, 0.2, 255)
+        self.alertColorRGBA = (
+            int(alertColorRGB[0] * 255),
+            int(alertColorRGB[1] * 255),
+            int(alertColorRGB[2] * 255),
+            int(alertColorRGB[3] * 255),
+        )
+
+        # move the content (border + text) toward center
+        self.offsetToCenterH = int(siSettings.offsetToCenterHNorm * renderH)
+
+        # positions shared by the static and the dynamic layers
+        self.topCol01 = self.paddingLeft + self.paddingLeftMetadataTop
+        self.videoFramesTop = self.offsetToCenterH + self.paddingTopExt + self.textLineH + self.textInterlineH
+        self.videoFramesRight = renderW * (1.0 - self.paddingLeftNorm)
+        self.bottomCol01 = self.paddingLeft + self.paddingLeftMetadataBottom
+        self.bottomTextTop = (
+            renderH
+            - self.paddingBottomExt
+            - self.numLinesBottom * self.textLineH
+            - (self.numLinesBottom - 1) * self.textInterlineH
+            - self.offsetToCenterH
+        )
+
+
+def drawStampStaticLayer(stampData, layout):
+    """Draw the parts of the stamp image that are the same for all the frames of a shot"""
+    from PIL import Image, ImageDraw
+
+    siSettings = stampData.settings
+
+    renderW = layout.renderW
+    renderH = layout.renderH
+    borderTopH = layout.borderTopH
+    borderBottomH = layout.borderBottomH
+    paddingLeft = layout.paddingLeft
+    paddingTopExt = layout.paddingTopExt
+    paddingBottomExt = layout.paddingBottomExt
+    offsetToCenterH = layout.offsetToCenterH
+    textLineH = layout.textLineH
+    textInterlineH = layout.textInterlineH
+    font = layout.font
+    fontLarge = layout.fontLarge
+    fontHeight = layout.fontHeight
+    textColorRGBA = layout.textColorRGBA
+
+    imgInfo = Image.new("RGBA", (renderW, renderH), (0, 0, 0, 0))
+
+    def _debug_drawPadding(borderInd):
+        myCol = (200, 250, 0, 100)
+        if 0 == borderInd:  # top
+            imgBorderRect = Image.new("RGBA", (renderW - 2 * paddingLeft, borderTopH - 2 * paddingTopExt), myCol)
+            imgInfo.paste(imgBorderRect, (paddingLeft, paddingTopExt))
+        else:  # bottom
+            imgBorderRect = Image.new("RGBA", (renderW - 2 * paddingLeft, borderBottomH - 2 * paddingBottomExt), myCol)
+            imgInfo.paste(imgBorderRect, (paddingLeft, renderH - borderBottomH + paddingTopExt))
+        return
+
+    # -------------------------------- #
+    # stamp borders with PIL
+    # -------------------------------- #
+    if siSettings.borderUsed:
+        imgBorderRect = Image.new("RGBA", (renderW, borderTopH), layout.borderColorRGBA)
+        imgInfo.paste(imgBorderRect, (0, offsetToCenterH))
+        imgBorderRect = Image.new("RGBA", (renderW, borderBottomH), layout.borderColorRGBA)
+        imgInfo.paste(imgBorderRect, (0, renderH - borderBottomH - offsetToCenterH))
+
+    # -------------------------------- #
+    # Debug - Draw text lines
+    # -------------------------------- #
+    if siSettings.debug_DrawTextLines:
+        currentTextLeft = layout.topCol01
+        currentTextTop = offsetToCenterH + paddingTopExt
+
+        for borderInd in range(0, 2):
+            if 0 == borderInd:  # top
+                numLines = 6  # numLinesTop
+                currentTextLeft = layout.topCol01
+                currentTextTop = offsetToCenterH + paddingTopExt
+                directionSign = 1
+            else:  # bottom
+                numLines = 6  # numLinesBottom
+                currentTextLeft = layout.topCol01
+                currentTextTop = (
+                    renderH
+                    - paddingBottomExt
+                    # - numLines * textLineH
+                    - textLineH
+                    - offsetToCenterH
+                )
+                directionSign = -1
+
+            _debug_drawPadding(borderInd)
+
+            for lineInd in range(0, numLines):
+                # first line top
+                myCol = (255, 20, 0, 200)
+                imgBorderRect = Image.new("RGBA", (80, textLineH), myCol)
+                imgInfo.paste(imgBorderRect, (currentTextLeft + lineInd * 20, currentTextTop))
+
+                # first interline top
+                myCol = (20, 250, 0, 100)
+                imgBorderRect = Image.new("RGBA", (int(1.0 * renderW), textInterlineH), myCol)
+                if 0 == borderInd:  # top
+                    imgInfo.paste(
+                        imgBorderRect, (currentTextLeft + lineInd * 20, currentTextTop + directionSign * textLineH)
+                    )
+                else:  # bottom
+                    imgInfo.paste(
+                        imgBorderRect, (currentTextLeft + lineInd * 20, currentTextTop + directionSign * textInterlineH)
+                    )
+
+                currentTextTop += directionSign * (textLineH + textInterlineH)
+
+    # -------------------------------- #
+    # stamp logo
+    # if the logo is not found a red fake logo is stamped instead
+    # -------------------------------- #
+
+    if siSettings.logoUsed:
+
+        # the logo path is resolved and checked when the stamp data is gathered, see infoImage.getStampFrameData()
+        logoFile = stampData.logoFilepath
+        logoFilePathIsValid = "" != logoFile
+
+        # logoScaleW = 0.09                                         # logo size is in % of width relatively to the outpur render size. In other words: 1.0 => logo width = renderW
+        # logoScaleH = 0.08                                         # logo size is in % of height relatively to the outpur render size. In other words: 1.0 => logo height = renderH
+        logoScaleH = siSettings.logoScaleH
+        logoPositionNorm = [
+            renderW * siSettings.logoPosNormX,
+            renderH * siSettings.logoPosNormY,
+        ]  # normalized in range [0,1]
+
+        imgLogoSource = None
+        if logoFilePathIsValid:
+            imgLogoSource = Image.open(logoFile).convert("RGBA")
+        else:
+            imgLogoSource = Image.new("RGBA", (150, 150), "red")
+
+        #   logoScaleH = logoScaleW * imgLogoSource.size[1] * 1.0 / imgLogoSource.size[0]
+        #   newLogoSize = (int(logoScaleW * renderW), int(logoScaleH * renderW)                                         # preserve logo size on widht
+        logoScaleW = logoScaleH * imgLogoSource.size[0] * 1.0 / imgLogoSource.size[1]
+        newLogoSize = (int(logoScaleW * renderH), int(logoScaleH * renderH))  # preserve logo size on height
+
+        #  newLogoSize = (int(logoScale * imgLogoSource.size[0]), int(logoScale * imgLogoSource.size[1]))             # to get a precise logo size when output res in pixels is known
+        imgLogoSource = imgLogoSource.resize(newLogoSize, Image.ANTIALIAS)  # size in pixels # resamplming mode
+
+        # put logo on image in position (0, 0)
+        imgInfo.paste(
+            imgLogoSource, (int(logoPositionNorm[0]), int(logoPositionNorm[1])), mask=imgLogoSource
+        )  # left align
+    # imgInfo.paste(imgLogoSource, (renderW - newLogoSize[0] - paddingRight, paddingRight), mask = imgLogoSource)      # right align
+
+    # put text on image
+    img_draw = ImageDraw.Draw(imgInfo)
+
+    stampLabel = siSettings.stampPropertyLabel
+    stampValue = siSettings.stampPropertyValue
+    textProp = ""
+
+    # ---------------------------------
+    # top border
+    # ---------------------------------
+
+    col01 = layout.topCol01
+    col02 = 0.1 * renderW
+    col028 = 0.69 * renderW
+
+    currentTextTop = offsetToCenterH + paddingTopExt
+
+    # ---------- project -------------
+    if siSettings.projectUsed:
+        textProp = "Project: " if stampLabel and not stampValue else ""
+        textProp += siSettings.projectName if stampValue else ""
+        img_draw.text((col02, currentTextTop), textProp, font=fontLarge, fill=textColorRGBA)
+
+    # ---------------------
+    # Code for date and time aligned from bottom:
+    # ---------------------
+    currentTextTop = borderTopH - paddingTopExt - fontHeight
+
+    # ---------- user -------------
+    if siSettings.userNameUsed:
+        textProp = "By: "  # if stampLabel else ""
+        textProp += stampData.userName if stampValue else ""
+
+        img_draw.text((col01, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+    # ---------- date -------------
+    # drawn in the dynamic layer
+
+    # ---------- image sequence indices in video ref system -------------
+    # drawn in the dynamic layer
+
+    # ------------ corner note ---------------
+    currentTextTop = offsetToCenterH + paddingTopExt / 2.0
+    currentTextRight = renderW * (1.0 - layout.paddingLeftNorm)
+
+    if siSettings.cornerNoteUsed:
+        # textProp = "Corner Note: " if stampLabel else ""
+        textProp = siSettings.cornerNote if stampValue else ""
+        img_draw.text(
+            (currentTextRight - (font.getsize(textProp))[0], currentTextTop),
+            textProp,
+            font=font,
+            fill=layout.alertColorRGBA,
+        )
+
+    # ---------- fps and 3D edit -------------
+    currentTextTop = layout.videoFramesTop + textLineH + textInterlineH
+
+    if siSettings.framerateUsed:
+        textProp = "Framerate: " if stampLabel else ""
+        textProp += str(stampData.fps) + " fps" if stampValue else ""
+        img_draw.text(
+            (layout.videoFramesRight - (font.getsize(textProp))[0], currentTextTop),
+            textProp,
+            font=font,
+            fill=textColorRGBA,
+        )
+
+    # edit 3D frame is drawn in the dynamic layer
+
+    # ---------- video duration -------------
+    # currentTextTop += textLineH + textInterlineH
+    if siSettings.animDurationUsed:
+        textProp = "Duration: "
+        textProp += str(stampData.frame_end - stampData.frame_start + 1) + " fr." if stampValue else ""
+        img_draw.text((col028, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+    # currentTextTop += textLineH + textInterlineH
+
+    # ---------- notes -------------
+    currentTextTop = offsetToCenterH + paddingTopExt
+
+    if siSettings.notesUsed:
+        # colNotes = col02
+
+        currentBoxTop = currentTextTop - 0.005 * renderH
+        currentBoxBottom = currentTextTop + 4 * (textLineH + textInterlineH) + 0.005 * renderH
+
+        colBoxLeft = 0.26 * renderW
+        colBoxRight = colBoxLeft + 0.43 * renderW
+        colNotesLabel = colBoxLeft + 0.01 * renderW
+        colNotes = colBoxLeft + 0.02 * renderW
+
+        boxLineThickness = max(1, int(0.002 * renderH))
+        textColorGray = (50, 50, 50, 255)
+
+        textProp = "Notes: " if stampLabel else ""
+        img_draw.text((colNotesLabel, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+        currentTextTop += textLineH + textInterlineH
+        textProp = siSettings.notesLine01 if stampValue else ("Notes Line 1" if stampLabel else "")
+        img_draw.text((colNotes, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+        currentTextTop += textLineH + textInterlineH
+        textProp = siSettings.notesLine02 if stampValue else ("Notes Line 2" if stampLabel else "")
+        img_draw.text((colNotes, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+        currentTextTop += textLineH + textInterlineH
+        textProp = siSettings.notesLine03 if stampValue else ("Notes Line 3" if stampLabel else "")
+        img_draw.text((colNotes, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+        # draw box
+        img_draw.line(
+            [(colBoxLeft, currentBoxTop), (colBoxRight, currentBoxTop)],
+            fill=textColorGray,
+            width=boxLineThickness,
+        )
+        img_draw.line(
+            [(colBoxLeft, currentBoxBottom), (colBoxRight, currentBoxBottom)],
+            fill=textColorGray,
+            width=boxLineThickness,
+        )
+        img_draw.line(
+            [(colBoxLeft, currentBoxTop), (colBoxLeft, currentBoxBottom)],
+            fill=textColorGray,
+            width=boxLineThickness,
+        )
+        img_draw.line(
+            [(colBoxRight, currentBoxTop), (colBoxRight, currentBoxBottom)],
+            fill=textColorGray,
+            width=boxLineThickness,
+        )
+
+    # ---------------------------------
+    # bottom border
+    # ---------------------------------
+
+    col01 = layout.bottomCol01
+    lineTextXEnd = paddingLeft
+    separatorX = 0.015 * renderW
+    currentTextTop = layout.bottomTextTop
+    currentTextFromBottom = renderH - paddingBottomExt - textLineH + textInterlineH
+
+    # ---------- shot -------------
+    stampLabel3D = stampLabel or stampValue
+
+    yPos = currentTextTop + -1.0 * layout.fontLargeHeight + 1.0 * textInterlineH
+    if siSettings.shotUsed:
+        # textProp = "Shot: " if stampLabel3D else ""
+        textProp = siSettings.shotName if stampValue else ""
+        img_draw.text((col01, yPos), textProp, font=fontLarge, fill=textColorRGBA)  # textColorRGBA
+        lineTextXEnd += (fontLarge.getsize(textProp))[0] + separatorX
+
+    # ---------- shot duration -------------
+    # currentTextTop += fontHeight * (1.2 / fontLargeFactor)
+    if siSettings.shotDurationUsed:
+        # textProp = "Shot Duration: "
+        textProp = (
+            str(stampData.frame_end - stampData.frame_start + 1 - 2 * siSettings.shotHandles) + " fr."
+            if stampValue
+            else ""
+        )
+        img_draw.text((lineTextXEnd, yPos), textProp, font=font, fill=textColorRGBA)
+        lineTextXEnd += (font.getsize(textProp))[0] + separatorX
+
+    # ---------- sequence -------------
+    if siSettings.sequenceUsed:
+        textProp = "Seq: " if stampLabel3D else ""
+        textProp += siSettings.sequenceName if stampValue else ""
+        yPos = currentTextTop + -1.0 * fontHeight + 1.0 * textInterlineH
+        img_draw.text((lineTextXEnd, yPos), textProp, font=font, fill=textColorRGBA)
+        lineTextXEnd += (font.getsize(textProp))[0] + separatorX
+
+    # ---------- take -------------
+    if siSettings.takeUsed:
+        textProp = "Take: " if stampLabel3D else ""
+        textProp += siSettings.takeName if stampValue else ""
+        yPos = currentTextTop + -1.0 * fontHeight + 1.0 * textInterlineH
+        img_draw.text((lineTextXEnd, yPos), textProp, font=font, fill=textColorRGBA)
+        lineTextXEnd += (font.getsize(textProp))[0] + separatorX
+
+    # ---------- 3d frames and range -------------
+    # drawn in the dynamic layer
+
+    lineTextXEnd = col01
+    # ---------- scene -------------
+    if siSettings.sceneUsed:
+        textProp = "Scene: " if stampLabel3D else ""
+        textProp += str(stampData.sceneName) if stampValue else ""
+        # yPos = currentTextTop
+        yPos = currentTextFromBottom - textInterlineH - textLineH
+        img_draw.text((lineTextXEnd, yPos), textProp, font=font, fill=textColorRGBA)
+        lineTextXEnd += (font.getsize(textProp))[0] + separatorX
+
+    # ---------- bottom note -------------
+    if siSettings.bottomNoteUsed:
+        # textProp = "Scene: " if stampLabel3D else ""
+        # yPos = currentTextTop
+        yPos = currentTextFromBottom - textInterlineH - textLineH
+        textProp = siSettings.bottomNote if stampValue else ""
+        img_draw.text((lineTextXEnd, yPos), textProp, font=font, fill=textColorRGBA)
+
+    # ---------- camera -------------
+    # drawn in the dynamic layer
+
+    # ---------- file -------------
+    # currentTextTop += textLineH + textInterlineH  # * 2
+
+    if siSettings.filenameUsed or siSettings.filepathUsed:
+        textProp = "Blender file: " if stampLabel else ""
+        if stampValue:
+            filenameStr = ""
+            if "" != siSettings.customFileFullPath:
+                filenameStr = siSettings.customFileFullPath
+                if "" == filenameStr:
+                    textProp += "*** Custom File not specified ***"
+            else:
+                filenameStr = stampData.blendFilepath
+                if "" == filenameStr:
+                    textProp += "*** File not saved ***"
+            if "" != filenameStr:
+                # head, tail = ntpath.split(filenameStr)
+                if siSettings.filepathUsed:
+                    textProp += str(Path(filenameStr).parent) + "\\"
+                if siSettings.filenameUsed:
+                    textProp += Path(filenameStr).name
+            # textProp  += str(os.path.basename(stampData.blendFilepath))
+        # img_draw.text((col01, currentTextTop), textProp, font=font, fill=textColorRGBA)
+        img_draw.text((col01, currentTextFromBottom), textProp, font=font, fill=textColorRGBA)
+
+    return imgInfo
+
+
+def drawStampDynamicLayer(stampData, layout, imgInfo, currentFrame):
+    """Draw the frame dependent parts of the stamp image on the specified image, usually a copy of the static layer"""
+    from PIL import ImageDraw
+
+    siSettings = stampData.settings
+
+    renderW = layout.renderW
+    textLineH = layout.textLineH
+    textInterlineH = layout.textInterlineH
+    font = layout.font
+    fontLarge = layout.fontLarge
+    textColorRGBA = layout.textColorRGBA
+
+    img_draw = ImageDraw.Draw(imgInfo)
+
+    stampLabel = siSettings.stampPropertyLabel
+    stampValue = siSettings.stampPropertyValue
+    stampLabel3D = stampLabel or stampValue
+    textProp = ""
+
+    # ---------------------------------
+    # top border
+    # ---------------------------------
+
+    # ---------- date -------------
+
+    # wkip use pytz to get the right time zone
+    currentTextTop = layout.borderTopH - layout.paddingTopExt - layout.fontHeight - (textLineH + textInterlineH)
+
+    now = datetime.now()
+    timeStr = now.strftime("%H:%M:%S")
+    if siSettings.dateUsed:
+        textProp = "Date: " if stampLabel else ""
+        textProp += now.strftime("%b-%d-%Y") if stampValue else ""  # Month abbreviation, day and year
+        if siSettings.timeUsed:
+            textProp += "  " + timeStr if stampValue else ""
+    elif siSettings.timeUsed:
+        textProp = "Time: " if stampLabel else ""
+        textProp += "  " + timeStr if stampValue else ""
+
+    if siSettings.dateUsed or siSettings.timeUsed:
+        img_draw.text((layout.topCol01, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+    # ---------- image sequence indices in video ref system -------------
+    if siSettings.videoFrameUsed:
+        if siSettings.videoFirstFrameIndexUsed:
+            currentImage = stampData.frame_current - stampData.frame_start + siSettings.videoFirstFrameIndex
+            firstFrameInd = siSettings.videoFirstFrameIndex
+            lastFrameInd = stampData.frame_end - stampData.frame_start + siSettings.videoFirstFrameIndex
+        else:
+            currentImage = stampData.frame_current - stampData.frame_start
+            firstFrameInd = 0
+            lastFrameInd = stampData.frame_end - stampData.frame_start
+
+        # _logger.debug_ext(
+        #     f"drawRangesAndFrame: currentImage: {currentImage}, firstFrameInd: {firstFrameInd}, lastFrameInd: {lastFrameInd}"
+        # )
+        drawRangesAndFrame(
+            stampData,
+            img_draw,
+            "VIDEOFRAME",
+            currentImage,
+            firstFrameInd,
+            lastFrameInd,
+            siSettings.shotHandles,
+            siSettings.currentFrameUsed,
+            siSettings.animRangeUsed,
+            siSettings.handlesUsed,
+            layout.videoFramesRight,
+            layout.videoFramesTop,
+            font,
+            fontLarge,
+            textColorRGBA,
+            siSettings.frameDigitsPadding,
+        )
+
+    # ---------- 3D edit -------------
+    currentTextTop = layout.videoFramesTop + textLineH + textInterlineH
+
+    if siSettings.edit3DFrameUsed:
+        col035 = 0.84 * renderW
+        textProp = "Index in 3D Edit: " if stampLabel else ""
+        #  textProp += '{:03d}'.format(stampData.fps) + " fps" if stampValue else ""
+        currentImage = siSettings.edit3DFrame
+        totalImages = siSettings.edit3DTotalNumber
+        textProp += str(int(currentImage)) if stampValue else ""
+        if siSettings.edit3DTotalNumberUsed:
+            textProp += " / " + str(int(totalImages)) + " fr." if stampValue else ""
+        img_draw.text((col035, currentTextTop), textProp, font=font, fill=textColorRGBA)
+
+    # ---------------------------------
+    # bottom border
+    # ---------------------------------
+
+    currentTextTop = layout.bottomTextTop
+
+    # ---------- 3d frames and range -------------
+    if siSettings.currentFrameUsed:
+        currentTextTopFor3DFrames = currentTextTop  # - fontHeight
+        currentTextLeftFor3DFrames = renderW * (1.0 - layout.paddingLeftNorm)
+        drawRangesAndFrame(
+            stampData,
+            img_draw,
+            "3DFRAME",
+            currentFrame,
+            stampData.frame_start,
+            stampData.frame_end,
+            siSettings.shotHandles,
+            siSettings.currentFrameUsed,
+            siSettings.animRangeUsed,
+            siSettings.handlesUsed,
+            currentTextLeftFor3DFrames,
+            currentTextTopFor3DFrames,
+            font,
+            fontLarge,
+            textColorRGBA,
+            siSettings.frameDigitsPadding,
+        )
+
+    currentTextTop += textLineH + 2.0 * textInterlineH
+
+    # ---------- camera -------------
+    currentTextRight = renderW * (1.0 - layout.paddingLeftNorm)
+
+    if siSettings.cameraLensUsed:
+        if siSettings.cameraUsed:
+            textProp = ""
+        else:
+            textProp = "Lens: " if stampLabel else ""
+        # textProp += f"{(stampData.cameraLens):05.0f}" + " mm" if stampValue else ""       # :05.2f}
+        textProp += (str(int(stampData.cameraLens))).rjust(3, " ") + " mm" if stampValue else ""  # :05.2f}
+        img_draw.text(
+            (currentTextRight - (font.getsize(textProp))[0], currentTextTop), textProp, font=font, fill=textColorRGBA
+        )
+
+    if siSettings.cameraUsed:
+        if siSettings.cameraLensUsed:
+            currentTextRight -= (font.getsize(textProp))[0]
+        textProp = "Cam: " if stampLabel3D else ""
+        textProp += str(stampData.cameraName) if stampValue else ""
+        if siSettings.cameraLensUsed:
+            textProp += "    "
+        col04 = 0.7 * renderW
+        img_draw.text(
+            (col04, currentTextTop),
+            textProp,
+            font=font,
+            fill=textColorRGBA,
+        )
+
+
+def drawRangesAndFrame(
+    stampData,
+    img_draw,
+    framemode,
+    currentFrame,
+    startRange,
+    endRange,
+    handle,
+    frameUsed,
+    rangeUsed,
+    handlesUsed,
+    textRight,
+    textTop,
+    font,
+    fontLarge,
+    color,
+    padding,
+):
+    """
+    framemode can be '3DFRAME' or 'VIDEOFRAME'
+    """
+    siSettings = stampData.settings
+
+    #    currentTextTopFor3DFrames += textLineH + textInterlineH
+    #    currentTextLeftFor3DFrames = renderW * (1.0 - 0.05)
+
+    # print(f"currentFrame: {currentFrame}")
+    currentTextTopFor3DFrames = textTop
+    currentTextLeftFor3DFrames = textRight
+    textColorRGBA = color
+    textColorGray = (128, 128, 128, 255)
+    textColorGrayLight = (200, 200, 200, 255)
+    textColorWhite = (235, 235, 235, 255)
+    textColorRed = (200, 100, 100, 255)
+    textColorGreen = (70, 210, 70, 255)
+    textColorOrange = (245, 135, 42, 255)
+
+    # stampLabel = siSettings.stampPropertyLabel
+    stampValue = siSettings.stampPropertyValue
+    textProp = ""
+
+    # fontsize            = int(fontScaleHNorm * renderH)
+    # font                = ImageFont.truetype("arial", fontsize)
+    # textLineH           = (font.getsize("Aj"))[1]            # line height
+
+    # text is aligned on the right !!! ###
+
+    if stampValue:
+        if rangeUsed or handlesUsed:
+            textProp = " ]"
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA
+            )
+
+        if rangeUsed:
+            fmt = f"0{padding}d"
+            textProp = f"{endRange:{fmt}}"
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            textColor = textColorOrange if not handlesUsed and currentFrame == endRange else textColorGray
+            if handlesUsed and (endRange - handle < currentFrame):
+                textColor = textColorRed
+            img_draw.text((currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColor)
+
+        if rangeUsed and handlesUsed:
+            textProp = " / "
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA
+            )
+
+        if handlesUsed:
+            textProp = f"{(endRange - handle):{fmt}}"
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            textColor = textColorOrange if currentFrame == endRange - handle else textColorGrayLight
+            img_draw.text((currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColor)
+
+        if rangeUsed or handlesUsed:
+            textProp = " / "
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA
+            )
+
+        if frameUsed:
+            textProp = f"{currentFrame:{fmt}}"
+            currentTextLeftFor3DFrames -= (fontLarge.getsize(textProp))[0]
+            # currentTextHeight = (font.getsize(textProp))[1]
+            textColor = textColorWhite
+            if currentFrame < startRange + handle:
+                textColor = textColorRed
+            elif currentFrame == startRange + handle:
+                textColor = textColorGreen
+            elif currentFrame > endRange - handle:
+                textColor = textColorRed
+            elif currentFrame == endRange - handle:
+                textColor = textColorOrange
+
+            newTextHeight = (fontLarge.getsize(textProp))[1] - (font.getsize(textProp))[1]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames - newTextHeight),
+                textProp,
+                font=fontLarge,
+                fill=textColor,
+            )
+
+        if (rangeUsed or handlesUsed) and frameUsed:
+            textProp = " /  "
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA
+            )
+
+        if handlesUsed:
+            textProp = f"{(startRange + handle):{fmt}}"
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            textColor = textColorGreen if currentFrame == startRange + handle else textColorGrayLight
+            img_draw.text((currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColor)
+
+        if rangeUsed and handlesUsed:
+            textProp = " / "
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA
+            )
+
+        if rangeUsed:
+            textProp = f"{startRange:{fmt}}"
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            textColor = textColorGreen if not handlesUsed and currentFrame == startRange else textColorGray
+            if handlesUsed and (currentFrame < startRange + handle):
+                textColor = textColorRed
+            img_draw.text((currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColor)
+
+        if rangeUsed or handlesUsed:
+            textProp = "[ "
+            currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+            img_draw.text(
+                (currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA
+            )
+
+    if frameUsed:  # and stampLabel:
+        textProp = ""
+        # textProp += "Handle / " if handlesUsed else ""
+        # textProp += "Range / " if rangeUsed else ""
+        if "3DFRAME" == framemode:
+            textProp += "3D Frame: " if frameUsed else ""
+        else:
+            textProp += "Video Frame: " if frameUsed else ""
+        currentTextLeftFor3DFrames -= (font.getsize(textProp))[0]
+        img_draw.text((currentTextLeftFor3DFrames, currentTextTopFor3DFrames), textProp, font=font, fill=textColorRGBA)
+
+        # if siSettings.sceneFrameHandlesUsed:
+        #     textProp += " / " + '{:03d}'.format(stampData.frame_end - siSettings.shotHandles) + " / " if stampValue else ""
+        # if siSettings.sceneFrameRangeUsed:
+        #     textProp += '{:03d}'.format(stampData.frame_end) + "]" if stampValue else ""
+        # img_draw.text((currentTextLeftFor3DFrames, currentTextTop ), textProp, font=font, fill=textColorRGBA )
+
+    # if siSettings.sceneFrameRangeUsed:
+    #     textProp = "Range: " if stampLabel else ""
+    #     textProp += "[" + str(stampData.frame_start) + " / " + str(stampData.frame_end) + "]" if stampValue else ""
+    #     img_draw.text((col03, currentTextTop), textProp, font=font, fill=textColorRGBA )
+
+
+def renderStampImages(renderW, renderH, innerH, framesToRender):
+    """Draw and save the stamp images of the specified frames. The static layer is drawn once for all the frames
+    sharing the same template key
+    Args:
+        framesToRender: list of tupples (output file path, frame data dictionary, template key)
+    Return the number of written images
+    """
+    templateLayers = dict()
+    for filepath, frameData, templateKey in framesToRender:
+        stampData = StampData(frameData)
+        layout = StampLayout(stampData, renderW, renderH, innerH)
+        if templateKey not in templateLayers:
+            templateLayers[templateKey] = drawStampStaticLayer(stampData, layout)
+
+        imgInfo = templateLayers[templateKey].copy()
+        drawStampDynamicLayer(stampData, layout, imgInfo, stampData.frame)
+        imgInfo.save(filepath)
+
+    return len(framesToRender)
@@ -430,6 +430,8 @@ def convertToSupportedRenderResolution(res):
 def getAreasByType(context, area_type):
     """Return a list of the areas of the specifed type from the specified context"""
     areasList = list()
+    if context.screen is None:  # case where Blender is running in background
+        return areasList
     for area in context.screen.areas:
         if area.type == area_type:
             areasList.append(area)
@@ -0,0 +1,415 @@
+# GPLv3 License
+#
+# Copyright (C) 2021 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compositing of the rendered media with an FFmpeg subprocess
+
+Except getFFmpegPath(), these functions do not use bpy so that they can be called outside of the main thread.
+"""
+
+import os
+import re
+import math
+import shutil
+import subprocess
+import tempfile
+
+from shotmanager.config import config
+from shotmanager.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# video encoding settings matching the ones of the VSE compositing (constant rate factor of PERC_LOSSLESS,
+# keyframe interval of 5, AAC audio)
+_videoEncodingArgs = ["-c:v", "libx264", "-crf", "17", "-g", "5", "-pix_fmt", "yuv420p"]
+_audioEncodingArgs = ["-c:a", "aac"]
+
+
+def getFFmpegPath():
+    """Return the path to the FFmpeg executable specified in the add-on preferences, or the one found in
+    the system PATH, None if no FFmpeg is available
+    """
+    prefs = config.getAddonPrefs()
+    ffmpegPath = prefs.ffmpegFilePath
+    if "" != ffmpegPath:
+        return ffmpegPath if os.path.exists(ffmpegPath) else None
+    return shutil.which("ffmpeg")
+
+
+def getNativeFilePath(filePath):
+    """Return the file path with the separators of the current OS, Blender accepting both kinds of separators
+    in the paths it writes"""
+    return filePath.replace("\\", "/") if "\\" != os.sep else filePath
+
+
+def getFFmpegImageSequencePattern(imageSequencePath):
+    """Convert an image sequence path using # for the frame index, such as img_#####.png, into an FFmpeg
+    pattern such as img_%05d.png
+    """
+    return re.sub(r"#+", lambda m: f"%0{len(m.group(0))}d", getNativeFilePath(imageSequencePath))
+
+
+def getImageSequenceFrameRange(imageSequencePath):
+    """Return the index of the first image and the number of images of the sequence found on disk, (None, 0) if
+    there is no image. A path without # is considered as a single image
+    """
+    imageSequencePath = getNativeFilePath(imageSequencePath)
+    if "#" not in imageSequencePath:
+        return (None, 1) if os.path.exists(imageSequencePath) else (None, 0)
+
+    dirPath, fileName = os.path.split(imageSequencePath)
+    if not os.path.isdir(dirPath):
+        return (None, 0)
+    prefix, hashes, suffix = re.split(r"(#+)", fileName, maxsplit=1)
+    pattern = re.compile(re.escape(prefix) + r"(\d{%d,})" % len(hashes) + re.escape(suffix) + "$")
+    frames = sorted([int(m.group(1)) for m in map(pattern.match, os.listdir(dirPath)) if m is not None])
+    if not len(frames):
+        return (None, 0)
+    return (frames[0], frames[-1] - frames[0] + 1)
+
+
+def runFFmpeg(ffmpegPath, args):
+    """Run FFmpeg with the specified arguments, raise a RuntimeError if it fails"""
+    command = [ffmpegPath, "-y", "-hide_banner", "-loglevel", "error"] + args
+    _logger.debug_ext(f"FFmpeg command: {' '.join(command)}", col="PURPLE")
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if 0 != result.returncode:
+        raise RuntimeError(f"FFmpeg failed with return code {result.returncode}: {result.stderr}")
+
+
+def _getStreamParameters(ffmpegOutput, streamType):
+    """Return the description of the first stream of the specified type ("Video" or "Audio") found in the output
+    of FFmpeg, without its bitrate, None if there is no such stream"""
+    streamMatch = re.search(r"Stream #\d+:\d+.*?: " + streamType + r": (.*)", ffmpegOutput)
+    if streamMatch is None:
+        return None
+    return re.sub(r"\s*\d+ kb/s,?|\s*\(default\)", "", streamMatch.group(1)).strip()
+
+
+def getVideoInfo(ffmpegPath, videoFilePath):
+    """Return a dictionary with the number of frames of the video, whether it has an audio stream and the
+    parameters of its video and audio streams.
+    The frames are counted by copying the video stream to a null output, which does not decode it, since
+    ffprobe may not be available
+    """
+    command = [ffmpegPath, "-hide_banner", "-i", getNativeFilePath(videoFilePath)]
+    command += ["-map", "0:v:0", "-c", "copy", "-f", "null", "-"]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    frameCounts = re.findall(r"frame=\s*(\d+)", result.stderr)
+    audioParameters = _getStreamParameters(result.stderr, "Audio")
+    return {
+        "numFrames": int(frameCounts[-1]) if len(frameCounts) else None,
+        "hasAudio": audioParameters is not None,
+        "streamParameters": (_getStreamParameters(result.stderr, "Video"), audioParameters),
+    }
+
+
+def getVideoKeyFrames(ffmpegPath, videoFilePath, fps):
+    """Return the set of the indices of the key frames of the video, the first frame having the index 0.
+    Only the key frames are decoded
+    """
+    command = [ffmpegPath, "-hide_banner", "-skip_frame", "nokey", "-i", getNativeFilePath(videoFilePath)]
+    command += ["-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    keyTimes = [float(t) for t in re.findall(r"pts_time:\s*(-?[\d.]+)", result.stderr)]
+    if not len(keyTimes):
+        return set()
+    return {round((t - keyTimes[0]) * fps) for t in keyTimes}
+
+
+def _addImageInput(args, fps, imagePath, startFrame):
+    if "#" in imagePath:
+        args += ["-framerate", str(fps), "-start_number", str(startFrame)]
+    args += ["-i", getFFmpegImageSequencePattern(imagePath)]
+
+
+def _addShotImagesInputs(
+    args, filters, inputInd, fps, outputResolution, bgSequencePath, startFrame, overSequencePath, outputLabel
+):
+    """Add the inputs of the images of a shot to args, and the filters compositing them in the stream outputLabel
+    to filters. As in the VSE compositing, the rendered images are cropped when bigger than the output resolution
+    and the over images are centered on the output image.
+    Return the index of the next input
+    """
+    width, height = outputResolution[0], outputResolution[1]
+    useOver = overSequencePath is not None and "" != overSequencePath
+    bgLabel = outputLabel + "_bg" if useOver else outputLabel
+
+    _addImageInput(args, fps, bgSequencePath, startFrame)
+    filters.append(
+        f"[{inputInd}:v]crop='min(iw,{width})':'min(ih,{height})',pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+        f"[{bgLabel}]"
+    )
+    inputInd += 1
+
+    if useOver:
+        _addImageInput(args, fps, overSequencePath, startFrame)
+        filters.append(f"[{bgLabel}][{inputInd}:v]overlay=(W-w)/2:(H-h)/2[{outputLabel}]")
+        inputInd += 1
+
+    return inputInd
+
+
+def compositeMedia(
+    ffmpegPath,
+    outputFilePath,
+    fps,
+    outputResolution,
+    bgSequencePath,
+    startFrame,
+    numFrames,
+    overSequencePath=None,
+    audioFilePath=None,
+    outputStartFrame=0,
+    handles=0,
+):
+    """Generate the media of a shot by compositing the image sequence of the Stamp Info framing over the image
+    sequence rendered from the scene, and by adding the sound.
+    The type of the output media depends on outputFilePath: an image sequence if it contains #, a still image
+    if it is a png or jpg file, a video otherwise.
+    Args:
+        bgSequencePath, overSequencePath: image sequence paths using # for the frame index
+        startFrame: index of the first image of the sequences
+        numFrames: number of images of the sequences, and then of the output media
+        outputResolution: array [width, height]
+        outputStartFrame: index of the first image of the output image sequence
+        handles: number of handle frames at each end of the shot. Key frames are set at the first frame of the shot
+            range and after its last one so that the video can be cut without re-encoding, see
+            concatVideosWithoutReencoding()
+    """
+    args = []
+    filters = []
+    inputInd = _addShotImagesInputs(
+        args, filters, 0, fps, outputResolution, bgSequencePath, startFrame, overSequencePath, "comp"
+    )
+
+    outputFilePath = getNativeFilePath(outputFilePath)
+    if "" != os.path.dirname(outputFilePath):
+        os.makedirs(os.path.dirname(outputFilePath), exist_ok=True)
+
+    if "#" in outputFilePath:
+        args += ["-filter_complex", ";".join(filters), "-map", "[comp]"]
+        args += ["-start_number", str(outputStartFrame), "-frames:v", str(numFrames)]
+        args += [getFFmpegImageSequencePattern(outputFilePath)]
+    elif os.path.splitext(outputFilePath)[1].lower() in (".png", ".jpg", ".jpeg"):
+        args += ["-filter_complex", ";".join(filters), "-map", "[comp]"]
+        args += ["-frames:v", "1", "-update", "1", outputFilePath]
+    else:
+        useAudio = audioFilePath is not None and os.path.exists(getNativeFilePath(audioFilePath))
+        if useAudio:
+            args += ["-i", getNativeFilePath(audioFilePath)]
+        args += ["-filter_complex", ";".join(filters), "-map", "[comp]"]
+        if useAudio:
+            args += ["-map", f"{inputInd}:a"] + _audioEncodingArgs
+        if 0 < handles and 2 * handles < numFrames:
+            args += ["-force_key_frames", f"expr:eq(n,{handles})+eq(n,{numFrames - handles})"]
+        # the duration is set so that the sound cannot make the video longer than the images
+        args += _videoEncodingArgs + ["-frames:v", str(numFrames), "-t", f"{numFrames / fps:.6f}", outputFilePath]
+
+    runFFmpeg(ffmpegPath, args)
+    return outputFilePath
+
+
+def concatVideos(ffmpegPath, outputFilePath, mediaFiles, handles, fps):
+    """Generate a video made of the specified shot videos put one after the other, their handles being removed.
+    The videos are re-encoded with the same settings as the shot videos.
+    Return the path of the generated video
+    """
+    videoInfos = [getVideoInfo(ffmpegPath, mediaFile) for mediaFile in mediaFiles]
+    useAudio = all([info["hasAudio"] for info in videoInfos])
+
+    outputFilePath = getNativeFilePath(outputFilePath)
+    if "" != os.path.dirname(outputFilePath):
+        os.makedirs(os.path.dirname(outputFilePath), exist_ok=True)
+
+    if 0 == handles:
+        # the concat demuxer reads the videos one after the other as a single input
+        with tempfile.NamedTemporaryFile("w", prefix="ShotManager_Concat_", suffix=".txt", delete=False) as listFile:
+            for mediaFile in mediaFiles:
+                escapedPath = getNativeFilePath(mediaFile).replace("'", "'\\''")
+                listFile.write(f"file '{escapedPath}'\n")
+
+        args = ["-f", "concat", "-safe", "0", "-i", listFile.name, "-map", "0:v"]
+        if useAudio:
+            args += ["-map", "0:a"] + _audioEncodingArgs
+        args += _videoEncodingArgs + [outputFilePath]
+        try:
+            runFFmpeg(ffmpegPath, args)
+        finally:
+            os.remove(listFile.name)
+
+    else:
+        # the handles are removed frame accurately with the trim filters, then the shots are joined by the
+        # concat filter
+        args = []
+        filters = []
+        concatInputs = ""
+        for i, mediaFile in enumerate(mediaFiles):
+            numFrames = videoInfos[i]["numFrames"]
+            if numFrames is None:
+                raise RuntimeError(f"Cannot read the number of frames of the video: {mediaFile}")
+            args += ["-i", getNativeFilePath(mediaFile)]
+            filters.append(
+                f"[{i}:v]trim=start_frame={handles}:end_frame={numFrames - handles},setpts=PTS-STARTPTS[v{i}]"
+            )
+            concatInputs += f"[v{i}]"
+            if useAudio:
+                filters.append(
+                    f"[{i}:a]atrim=start={handles / fps:.6f}:end={(numFrames - handles) / fps:.6f},"
+                    f"asetpts=PTS-STARTPTS[a{i}]"
+                )
+                concatInputs += f"[a{i}]"
+
+        filters.append(f"{concatInputs}concat=n={len(mediaFiles)}:v=1:a={int(useAudio)}[outv]" + useAudio * "[outa]")
+        args += ["-filter_complex", ";".join(filters), "-map", "[outv]"]
+        if useAudio:
+            args += ["-map", "[outa]"] + _audioEncodingArgs
+        args += _videoEncodingArgs + [outputFilePath]
+        runFFmpeg(ffmpegPath, args)
+
+    return outputFilePath
+
+
+def compositeSequenceVideo(ffmpegPath, outputFilePath, fps, outputResolution, mediaDictArr):
+    """Generate a video made of the composited image sequences of the shots put one after the other
+    Args:
+        mediaDictArr: list of dictionaries with the "bg", "fg_sequence" and "sound" media of each shot, as in
+            ShotManager_Vse_Render.buildSequenceVideoFromMedia()
+        outputResolution: array [width, height]
+    Return the path of the generated video, None if no shot images were found
+    """
+    useAudio = any(
+        [
+            mediaDict.get("sound", None) is not None and os.path.exists(getNativeFilePath(mediaDict["sound"]))
+            for mediaDict in mediaDictArr
+        ]
+    )
+
+    args = []
+    filters = []
+    concatInputs = ""
+    inputInd = 0
+    numShots = 0
+    for i, mediaDict in enumerate(mediaDictArr):
+        startFrame, numFrames = getImageSequenceFrameRange(mediaDict["bg"])
+        if 0 == numFrames:
+            _logger.error_ext(f" *** Rendered shot not found: {mediaDict['bg']}")
+            continue
+
+        inputInd = _addShotImagesInputs(
+            args,
+            filters,
+            inputInd,
+            fps,
+            outputResolution,
+            mediaDict["bg"],
+            startFrame,
+            mediaDict.get("fg_sequence", None),
+            f"v{i}",
+        )
+        concatInputs += f"[v{i}]"
+
+        if useAudio:
+            # each shot gets an audio segment of the duration of its images so that the shots stay in sync
+            duration = numFrames / fps
+            soundFilePath = mediaDict.get("sound", None)
+            if soundFilePath is not None and os.path.exists(getNativeFilePath(soundFilePath)):
+                args += ["-i", getNativeFilePath(soundFilePath)]
+                filters.append(
+                    f"[{inputInd}:a]atrim=end={duration:.6f},apad=whole_dur={duration:.6f},asetpts=PTS-STARTPTS[a{i}]"
+                )
+                inputInd += 1
+            else:
+                filters.append(f"anullsrc=r=48000:cl=stereo,atrim=end={duration:.6f}[a{i}]")
+            concatInputs += f"[a{i}]"
+        numShots += 1
+
+    if 0 == numShots:
+        return None
+
+    filters.append(f"{concatInputs}concat=n={numShots}:v=1:a={int(useAudio)}[outv]" + useAudio * "[outa]")
+    args += ["-filter_complex", ";".join(filters), "-map", "[outv]"]
+    if useAudio:
+        args += ["-map", "[outa]"] + _audioEncodingArgs
+
+    outputFilePath = getNativeFilePath(outputFilePath)
+    if "" != os.path.dirname(outputFilePath):
+        os.makedirs(os.path.dirname(outputFilePath), exist_ok=True)
+    args += _videoEncodingArgs + [outputFilePath]
+
+    runFFmpeg(ffmpegPath, args)
+    return outputFilePath
+
+
+def concatVideosWithoutReencoding(ffmpegPath, outputFilePath, mediaFiles, handles, fps):
+    """Generate a video made of the specified shot videos put one after the other, their handles being removed,
+    by copying their streams instead of re-encoding them.
+    This requires all the videos to have the same stream parameters and, when there are handles, key frames at
+    the first and after the last frame of their shot range.
+    Return the path of the generated video, None if the videos cannot be joined without re-encoding
+    """
+    listLines = []
+    refStreamParameters = None
+    for mediaFile in mediaFiles:
+        videoInfo = getVideoInfo(ffmpegPath, mediaFile)
+        numFrames = videoInfo["numFrames"]
+        if numFrames is None or numFrames <= 2 * handles:
+            _logger.debug_ext(f"Cannot join without re-encoding, invalid video: {mediaFile}")
+            return None
+
+        if refStreamParameters is None:
+            refStreamParameters = videoInfo["streamParameters"]
+        elif refStreamParameters != videoInfo["streamParameters"]:
+            _logger.debug_ext(f"Cannot join without re-encoding, different stream parameters: {mediaFile}")
+            return None
+
+        # the frames before the in point and from the out point are not displayed but they must not be needed
+        # to decode the ones in the shot range
+        inFrame, outFrame = handles, numFrames - handles
+        if 0 < handles:
+            keyFrames = getVideoKeyFrames(ffmpegPath, mediaFile, fps)
+            if inFrame not in keyFrames or outFrame not in keyFrames:
+                _logger.debug_ext(f"Cannot join without re-encoding, no key frame at the shot limits: {mediaFile}")
+                return None
+
+        escapedPath = getNativeFilePath(mediaFile).replace("'", "'\\''")
+        listLines.append(f"file '{escapedPath}'")
+        if 0 < handles:
+            # the in point is rounded up so that the demuxer seeks to the key frame of the first frame of the range,
+            # the out point is rounded down so that the key frame after the range is dropped. The difference gives
+            # the exact duration of the shot, used to offset the next one
+            listLines.append(f"inpoint {math.ceil(inFrame / fps * 1e6) / 1e6:.6f}")
+            listLines.append(f"outpoint {math.floor(outFrame / fps * 1e6) / 1e6:.6f}")
+
+    outputFilePath = getNativeFilePath(outputFilePath)
+    if "" != os.path.dirname(outputFilePath):
+        os.makedirs(os.path.dirname(outputFilePath), exist_ok=True)
+
+    with tempfile.NamedTemporaryFile("w", prefix="ShotManager_Concat_", suffix=".txt", delete=False) as listFile:
+        listFile.write("\n".join(listLines) + "\n")
+
+    args = ["-f", "concat", "-safe", "0", "-i", listFile.name, "-map", "0:v"]
+    if refStreamParameters[1] is not None:
+        args += ["-map", "0:a"]
+    args += ["-c", "copy", outputFilePath]
+    try:
+        runFFmpeg(ffmpegPath, args)
+    finally:
+        os.remove(listFile.name)
+
+    return outputFilePath
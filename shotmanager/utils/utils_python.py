@@ -19,6 +19,8 @@
 Functions useful in a generic context
 """
 
+import heapq
+
 
 def copyString(str1):
     resStr = ""
@@ -35,3 +37,34 @@ def asciiColor(r, g, b):
 def clamp(v, minV, maxV):
     res = min(v, maxV)
     return max(res, minV)
+
+
+def packIntervalsInLanes(intervals, gap=0):
+    """Place the intervals on lanes so that the intervals of a lane don't overlap, using as few lanes as possible
+    Each interval is placed on the first lane free at its start, intervals being processed by increasing start.
+    Runs in O(n log n)
+    Args:
+        intervals:  list of (start, end), bounds included, such as the frame ranges of shots
+        gap:        minimum number of free values between two successive intervals of a lane
+    Return the list of the lane indices of the intervals, starting at 0, in the order of the intervals list
+    """
+    lanes = [0] * len(intervals)
+    # lanes in use, as (end of their last interval, lane index)
+    busyLanes = []
+    # indices of the lanes available at the current start
+    freeLanes = []
+    numLanes = 0
+
+    for i in sorted(range(len(intervals)), key=lambda i: intervals[i][0]):
+        start, end = intervals[i]
+        while len(busyLanes) and busyLanes[0][0] + gap < start:
+            heapq.heappush(freeLanes, heapq.heappop(busyLanes)[1])
+        if len(freeLanes):
+            lane = heapq.heappop(freeLanes)
+        else:
+            lane = numLanes
+            numLanes += 1
+        heapq.heappush(busyLanes, (end, lane))
+        lanes[i] = lane
+
+    return lanes
@@ -33,6 +33,7 @@ from bpy.props import (
 
 from ..config import config
 from ..utils import utils
+from ..utils import utils_ffmpeg
 
 from shotmanager.config import config
 from shotmanager.config import sm_logging
@@ -150,6 +151,56 @@ class UAS_VSE_OpenFileBrowser(Operator):  # from bpy_extras.io_utils import Impo
         return {"RUNNING_MODAL"}
 
 
+def getCompositedMediaPath(
+    output_media_type,
+    output_filepath,
+    output_filename=None,
+    compositedImgSeqPath=None,
+    output_file_prefix="",
+    frame_padding=-1,
+    specificFrame=None,
+):
+    """Return the path of the media generated by compositeVideoInVSE(), whatever the compositing backend
+    Args:
+        output_media_type: can be "IMAGE", "IMAGE_SEQ" or "VIDEO"
+    """
+    # get output file format from specified output (can be emtpy !!)
+    fileExt = str(Path(output_filepath).suffix).upper()
+    if len(fileExt) and "." == fileExt[0]:
+        fileExt = fileExt[1:]
+    # get file name without extention
+    if output_filename is None:
+        fileNoExt = str(Path(output_filepath).stem)
+    else:
+        fileNoExt = output_filename
+    # get file path only
+    filePathOnly = str(Path(output_filepath).parent) + "\\"
+
+    # get either "#####" or a formated string for specificFrame
+    if specificFrame is None:
+        frameIndStr = "".rjust(frame_padding, "#")
+    else:
+        frameIndStr = str(specificFrame).rjust(frame_padding, "0")
+
+    # TODO: add a separator as global parameter
+    frameIndStr = "_" + frameIndStr
+
+    if "IMAGE" == output_media_type:
+        return filePathOnly + output_file_prefix + fileNoExt + frameIndStr + ".png"
+
+    elif "IMAGE_SEQ" == output_media_type:
+        if compositedImgSeqPath is not None:
+            ext = str(Path(compositedImgSeqPath).suffix).lower()
+        elif len(fileExt):
+            ext = "." + fileExt.lower()
+        else:
+            ext = ".png"
+        return filePathOnly + fileNoExt + "\\" + output_file_prefix + fileNoExt + frameIndStr + ext
+
+    # "VIDEO" == output_media_type:
+    return filePathOnly + output_file_prefix + fileNoExt + ".mp4"
+
+
 class ShotManager_Vse_Render(PropertyGroup):
     def get_inputOverMediaPath(self):
         val = self.get("inputOverMediaPath", "")
@@ -740,16 +791,150 @@ class ShotManager_Vse_Render(PropertyGroup):
         #        infoStr += f"\n    Start: {self.get_frame_start()}, End (incl.):{self.get_frame_end() - 1}, Duration: {self.get_frame_duration()}, fps: {self.get_fps()}, Sequences: {self.get_num_sequences()}"
         print(infoStr)
 
+    def getFFmpegPathForBackend(self):
+        """Return the path to FFmpeg for the FFMPEG compositing backend, None if FFmpeg is not available, in which
+        case the VSE is used"""
+        ffmpegPath = utils_ffmpeg.getFFmpegPath()
+        if ffmpegPath is None:
+            _logger.warning_ext("FFmpeg not found, the compositing is done in the VSE")
+        return ffmpegPath
+
+    def _buildSequenceVideoWithFFmpeg(self, ffmpegPath, outputFile, handles, fps, mediaDictArr=None, mediaFiles=None):
+        """FFMPEG backend of buildSequenceVideoFromMedia()"""
+        try:
+            if mediaDictArr is not None:
+                # even resolution values, as in the VSE
+                output_res = list(mediaDictArr[0]["output_resolution"])
+                output_res = [output_res[0] + output_res[0] % 2, output_res[1] + output_res[1] % 2]
+                utils_ffmpeg.compositeSequenceVideo(ffmpegPath, outputFile, fps, output_res, mediaDictArr)
+            elif len(mediaFiles):
+                utils_ffmpeg.concatVideos(ffmpegPath, outputFile, mediaFiles, handles, fps)
+            else:
+                _logger.warning_ext(f"No media to build the sequence video: {outputFile}")
+        except RuntimeError as e:
+            _logger.error_ext(f" *** Cannot build the sequence video {outputFile}: {e}")
+
+    def _compositeVideoWithFFmpeg(
+        self,
+        ffmpegPath,
+        fps,
+        frame_start,
+        frame_end,
+        output_filepath,
+        output_filename=None,
+        compositedImgSeqPath=None,
+        output_file_prefix="",
+        output_resolution=None,
+        output_media_mode="VIDEO",
+        frame_padding=-1,
+        handles=0,
+    ):
+        """FFMPEG backend of compositeVideoInVSE(), the bg media has to be an image sequence or an image
+        Return True if all the media have been generated
+        """
+        specificFrame = frame_start if frame_start == frame_end else None
+
+        if output_resolution is not None:
+            output_res = list(output_resolution)
+        else:
+            output_res = list(self.inputBGResolution)
+
+        startFrame, numImages = utils_ffmpeg.getImageSequenceFrameRange(self.inputBGMediaPath)
+        if 0 == numImages:
+            _logger.error_ext(f" *** Rendered shot not found: {self.inputBGMediaPath}")
+            return False
+
+        overMediaPath = None
+        if "" != self.inputOverMediaPath:
+            overMediaPath = self.inputOverMediaPath
+            # the bg media is a single image when a specific frame is rendered
+            if startFrame is None:
+                startFrame = utils_ffmpeg.getImageSequenceFrameRange(overMediaPath)[0]
+
+        audioFilePath = None
+        if specificFrame is None and "" != self.inputAudioMediaPath:
+            audioFilePath = self.inputAudioMediaPath
+
+        if specificFrame is not None:
+            outputMediaTypes = ["IMAGE"]
+        else:
+            outputMediaTypes = [mediaType for mediaType in ("IMAGE_SEQ", "VIDEO") if mediaType in output_media_mode]
+
+        for mediaType in outputMediaTypes:
+            self.outputMediaPath = getCompositedMediaPath(
+                mediaType,
+                output_filepath,
+                output_filename=output_filename,
+                compositedImgSeqPath=compositedImgSeqPath,
+                output_file_prefix=output_file_prefix,
+                frame_padding=frame_padding,
+                specificFrame=specificFrame,
+            )
+            try:
+                utils_ffmpeg.compositeMedia(
+                    ffmpegPath,
+                    self.outputMediaPath,
+                    fps,
+                    output_res,
+                    self.inputBGMediaPath,
+                    0 if startFrame is None else startFrame,
+                    frame_end - frame_start + 1,
+                    overSequencePath=overMediaPath,
+                    audioFilePath=audioFilePath,
+                    outputStartFrame=frame_start,
+                    handles=handles,
+                )
+            except RuntimeError as e:
+                _logger.error_ext(f" *** Cannot composite media {self.outputMediaPath}: {e}")
+                return False
+        return True
+
     # NOTE: This function has 2 different behaviors depending if we use mediaDictArr or mediaFiles
     # FIXME: wkipwkipwkip this has to be fixed to harmonize the behavior
-    def buildSequenceVideoFromMedia(self, outputFile, handles, fps, mediaDictArr=None, mediaFiles=None):
+    def buildSequenceVideoFromMedia(
+        self,
+        outputFile,
+        handles,
+        fps,
+        mediaDictArr=None,
+        mediaFiles=None,
+        backend="VSE",
+        concatWithoutReencoding=False,
+    ):
         """Create a composited output (image sequence or video according to the extension of outputFile) from
         the bg, fg and audio media provided either by mediaDictArr or mediaFiles
 
         Args:
             mediaDictArr: dictionary specifying the source media and their resolution
             mediaFiles: list of 2 media and an audio
+            backend: "VSE" or "FFMPEG". With FFMPEG the media are composited by an FFmpeg subprocess, without
+            creating a scene in the file
+            concatWithoutReencoding: if True, the videos of mediaFiles are joined by FFmpeg by copying their streams,
+            whatever the backend. They are re-encoded if their parameters differ or if they cannot be cut at
+            their handles
         """
+        if mediaFiles is not None and len(mediaFiles) and concatWithoutReencoding:
+            ffmpegPath = self.getFFmpegPathForBackend()
+            if ffmpegPath is not None:
+                concatenatedFile = None
+                try:
+                    concatenatedFile = utils_ffmpeg.concatVideosWithoutReencoding(
+                        ffmpegPath, outputFile, mediaFiles, handles, fps
+                    )
+                except RuntimeError as e:
+                    _logger.error_ext(f" *** Cannot join the shot videos without re-encoding: {e}")
+                if concatenatedFile is not None:
+                    return
+                _logger.info_ext("The shot videos cannot be joined without re-encoding, the sequence is re-encoded")
+
+        if "FFMPEG" == backend:
+            ffmpegPath = self.getFFmpegPathForBackend()
+            if ffmpegPath is not None:
+                self._buildSequenceVideoWithFFmpeg(
+                    ffmpegPath, outputFile, handles, fps, mediaDictArr=mediaDictArr, mediaFiles=mediaFiles
+                )
+                return
+
         previousScene = bpy.context.window.scene
 
         sequenceScene = None
@@ -969,6 +1154,8 @@ class ShotManager_Vse_Render(PropertyGroup):
         output_media_mode="VIDEO",
         importAtFrame=0,
         frame_padding=-1,
+        backend="VSE",
+        handles=0,
     ):
         """Low level function that will use the bg and fg media already held by this vse_render class to generate
         a media
@@ -978,34 +1165,27 @@ class ShotManager_Vse_Render(PropertyGroup):
             output_media_mode: can be "IMAGE_SEQ", "VIDEO", "IMAGE_SEQ_AND_VIDEO". Specify the file format of the rendered
             media.
             frame_padding: THIS ARGUMENT MUST BE ENTERED. Usually it is 4 or 5.
+            backend: "VSE" or "FFMPEG". With FFMPEG the media are composited by an FFmpeg subprocess, which does not
+            change the current scene of the window and can then be used when Blender runs in background
+            handles: number of handle frames at each end of the media. With FFMPEG key frames are set at the limits
+            of the shot range so that the video can be joined to others without re-encoding
+
+        Returns:
+            False if the media could not be generated by FFmpeg, True otherwise
         """
 
         def _setOutputMediaAndRender(output_media_type):
             """output_media_type can be "IMAGE", "IMAGE_SEQ" or "VIDEO" """
             # _logger.debug_ext(f"_setOutputMediaAndRender output_media_type: {output_media_type}")
-
-            # get output file format from specified output (can be emtpy !!)
-            fileExt = str(Path(output_filepath).suffix).upper()
-            # get file name without extention
-            # fileNoExt = output_filepath[: len(output_filepath) - len(fileExt)]
-            if output_filename is None:
-                fileNoExt = str(Path(output_filepath).stem)
-            else:
-                fileNoExt = output_filename
-            # get file path only
-            filePathOnly = str(Path(output_filepath).parent) + "\\"
-
-            if "." == fileExt[0]:
-                fileExt = fileExt[1:]
-
-            # get either "#####" or a formated string for specificFrame
-            if specificFrame is None:
-                frameIndStr = "".rjust(frame_padding, "#")
-            else:
-                frameIndStr = str(specificFrame).rjust(frame_padding, "0")
-
-            # TODO: add a separator as global parameter
-            frameIndStr = "_" + frameIndStr
+            self.outputMediaPath = getCompositedMediaPath(
+                output_media_type,
+                output_filepath,
+                output_filename=output_filename,
+                compositedImgSeqPath=compositedImgSeqPath,
+                output_file_prefix=output_file_prefix,
+                frame_padding=frame_padding,
+                specificFrame=specificFrame,
+            )
 
             # case where specificFrame is NOT none
             if "IMAGE" == output_media_type:
@@ -1014,10 +1194,6 @@ class ShotManager_Vse_Render(PropertyGroup):
                 if config.devDebug:
                     print(f"specificFrame: {specificFrame}")
 
-                # remove the end digits if there are some
-                # fileNoExt = fileNoExt.rstrip("0123456789")
-
-                self.outputMediaPath = filePathOnly + output_file_prefix + fileNoExt + frameIndStr + ".png"
                 vse_scene.render.filepath = self.outputMediaPath
 
                 # vse_scene.frame_set(specificFrame)
@@ -1029,33 +1205,9 @@ class ShotManager_Vse_Render(PropertyGroup):
                 bpy.ops.render.opengl(animation=False, sequencer=True, write_still=True)
 
             elif "IMAGE_SEQ" == output_media_type:
-                if compositedImgSeqPath is not None:
-                    ext = str(Path(compositedImgSeqPath).suffix).lower()
-
-                elif len(fileExt):
-                    # if "JPG" == fileExt:
-                    #     vse_scene.render.image_settings.file_format = "JPEG"
-                    #     ext = ".jpg"
-                    # # if "PNG" == fileExt:
-                    # else:
-                    #     # output file is PNG otherwise
-                    #     vse_scene.render.image_settings.file_format = "PNG"
-                    #     ext = ".png"
-                    ext = "." + fileExt.lower()
-
-                else:
+                if compositedImgSeqPath is None and "" == Path(output_filepath).suffix:
                     # output file is PNG otherwise
                     vse_scene.render.image_settings.file_format = "PNG"
-                    ext = ".png"
-
-                # self.outputMediaPath = (
-                #     filePathOnly + fileNoExt + "\\" + output_file_prefix + fileNoExt + frameIndStr + ext
-                # )
-                # wkipwkipwkipmerge
-                self.outputMediaPath = (
-                    filePathOnly + fileNoExt + "\\" + output_file_prefix + fileNoExt + frameIndStr + ext
-                )
-                vse_scene.render.filepath = self.outputMediaPath
 
                 vse_scene.render.filepath = self.outputMediaPath
 
@@ -1076,7 +1228,6 @@ class ShotManager_Vse_Render(PropertyGroup):
                 vse_scene.render.ffmpeg.gopsize = 5  # keyframe interval
                 vse_scene.render.ffmpeg.audio_codec = "AAC"
 
-                self.outputMediaPath = filePathOnly + output_file_prefix + fileNoExt + ".mp4"
                 vse_scene.render.filepath = self.outputMediaPath
 
                 vse_scene.render.use_file_extension = False
@@ -1098,6 +1249,27 @@ class ShotManager_Vse_Render(PropertyGroup):
             specificFrame = frame_start
             # specificFrame = importAtFrame
 
+        if "FFMPEG" == backend and "" != self.inputBGMediaPath:
+            ffmpegPath = self.getFFmpegPathForBackend()
+            if ffmpegPath is not None:
+                compositeDone = self._compositeVideoWithFFmpeg(
+                    ffmpegPath,
+                    fps,
+                    frame_start,
+                    frame_end,
+                    output_filepath,
+                    output_filename=output_filename,
+                    compositedImgSeqPath=compositedImgSeqPath,
+                    output_file_prefix=output_file_prefix,
+                    output_resolution=output_resolution,
+                    output_media_mode=output_media_mode,
+                    frame_padding=frame_padding,
+                    handles=handles,
+                )
+                if compositeDone and specificFrame is not None:
+                    utils.openMedia(output_filepath, inExternalPlayer=False)
+                return compositeDone
+
         previousScene = bpy.context.window.scene
         previousWorkspace = bpy.context.workspace.name
         # print(f"Previous Workspace: {previousWorkspace}")
@@ -1265,6 +1437,8 @@ class ShotManager_Vse_Render(PropertyGroup):
         if specificFrame is not None:
             utils.openMedia(output_filepath, inExternalPlayer=False)
 
+        return True
+
 
 _classes = (
     # UAS_PT_VSERender,